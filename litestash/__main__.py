@@ -0,0 +1,7 @@
+"""Runs the litestash command: python -m litestash"""
+# pylint: disable=invalid-name
+import sys
+
+from litestash.cli import main
+
+sys.exit(main())
@@ -0,0 +1,99 @@
+"""LiteStash Command
+
+Manages the data directory of a LiteStash from the command line.
+
+Example:
+
+```
+litestash info ./data
+litestash reshard ./data --shards 32 --tables-per-shard 4
+litestash reshard ./data --resume
+```
+"""
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+from typing import Optional
+
+import orjson
+
+from litestash.core.config.litestash_conf import CliConf
+from litestash.core.topology import Topology
+from litestash.core.util.topology_util import manifest_path
+from litestash.core.util.topology_util import read_manifest
+from litestash.logging import root_logger as logger
+from litestash.store import LiteStash
+
+
+def mk_parser() -> ArgumentParser:
+    """Return the parser of the litestash command."""
+    parser = ArgumentParser(prog=CliConf.PROG.value,
+                            description=CliConf.DESCRIPTION.value)
+    commands = parser.add_subparsers(dest=CliConf.COMMAND.value,
+                                     required=True)
+
+    info_parser = commands.add_parser(CliConf.INFO.value,
+                                      help=CliConf.INFO_HELP.value)
+    info_parser.add_argument('data', help=CliConf.DATA_HELP.value)
+
+    reshard_parser = commands.add_parser(CliConf.RESHARD.value,
+                                         help=CliConf.RESHARD_HELP.value)
+    reshard_parser.add_argument('data', help=CliConf.DATA_HELP.value)
+    target = reshard_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--shards', type=int, help=CliConf.SHARDS_HELP.value)
+    target.add_argument('--prefix',
+                        action='store_true',
+                        help=CliConf.PREFIX_HELP.value)
+    target.add_argument('--resume',
+                        action='store_true',
+                        help=CliConf.RESUME_HELP.value)
+    reshard_parser.add_argument('--tables-per-shard',
+                                type=int,
+                                help=CliConf.TABLES_HELP.value)
+    reshard_parser.add_argument('--chunk-size',
+                                type=int,
+                                help=CliConf.CHUNK_HELP.value)
+    return parser
+
+
+def info(data: str) -> int:
+    """Print the topology manifest of a data directory."""
+    manifest = read_manifest(manifest_path(data))
+    if manifest is None:
+        print(f'{CliConf.NO_MANIFEST.value} {data}', file=sys.stderr)
+        return 1
+    print(orjson.dumps(manifest, option=orjson.OPT_INDENT_2).decode())
+    return 0
+
+
+def reshard(data: str,
+            topology: Optional[Topology],
+            chunk_size: Optional[int] = None) -> int:
+    """Move the keys of a data directory to a topology, or finish the
+    reshard recorded in its manifest when topology is None."""
+    if not Path(data).is_dir():
+        print(f'{CliConf.NO_DATA.value} {data}', file=sys.stderr)
+        return 1
+    with LiteStash(data=data) as stash:
+        moved = stash.reshard(topology, chunk_size)
+        print(CliConf.moved(moved, stash.topology))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the litestash command and return its exit status."""
+    args = mk_parser().parse_args(argv)
+    try:
+        if args.command == CliConf.INFO.value:
+            return info(args.data)
+        topology = None
+        if args.prefix:
+            topology = Topology()
+        elif not args.resume:
+            topology = Topology(args.shards, args.tables_per_shard)
+        return reshard(args.data, topology, args.chunk_size)
+    except ValueError as error:
+        logger.error('%s failed: %s', args.command, error)
+        print(f'{CliConf.PROG.value}: {error}', file=sys.stderr)
+        return 1
@@ -10,6 +10,13 @@ Modules:
 * `engine`:  Manages database engines.
 * `schema`:  Handles database schema definitions and metadata.
 * `session`: Provides session management for database interactions.
+* `fast_path`: Provides raw sqlite3 connections for single key operations.
+* `read_cache`: Provides the optional in-process LRU read cache.
+* `write_behind`: Provides the optional group commit buffer for set.
+* `sweeper`: Provides the optional background expiry sweeper.
+* `reaper`: Deletes the expired rows found by reads in the background.
+* `checkpointer`: Provides the optional background WAL checkpointer.
+* `topology`: Names the databases and routes each key hash to one of them.
 * `tasks`: Manages the Queue and threads for each database.
 """
 from litestash.core.config.root import Core
@@ -18,6 +25,13 @@ from litestash.core import util
 from litestash.core.engine import Engine
 from litestash.core.schema import Metadata
 from litestash.core.session import Session
+from litestash.core.fast_path import FastPath
+from litestash.core.read_cache import ReadCache
+from litestash.core.write_behind import WriteBehind
+from litestash.core.sweeper import Sweeper
+from litestash.core.reaper import Reaper
+from litestash.core.checkpointer import Checkpointer
+from litestash.core.topology import Topology
 
 __all__ = [
     Core.CONFIG.value,
@@ -25,4 +39,11 @@ __all__ = [
     Core.ENGINE.value,
     Core.SCHEMA.value,
     Core.SESSION.value,
+    Core.FAST_PATH.value,
+    Core.READ_CACHE.value,
+    Core.WRITE_BEHIND.value,
+    Core.SWEEPER.value,
+    Core.REAPER.value,
+    Core.CHECKPOINTER.value,
+    Core.TOPOLOGY.value,
 ]
@@ -0,0 +1,273 @@
+"""LiteStash Checkpointer
+
+Provides a background thread that keeps the WAL file of each open database
+in check: PASSIVE checkpoints once a WAL passes a size threshold, and a
+RESTART or TRUNCATE checkpoint once a WAL has gone quiet.
+"""
+from collections import namedtuple
+from threading import Event
+from threading import Lock
+from threading import Thread
+from time import perf_counter
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from pydantic import StrictFloat
+from pydantic import StrictInt
+from pydantic import StrictStr
+
+from litestash.core.config.litestash_conf import CheckpointConf
+from litestash.core.config.litestash_conf import CheckpointStatsAttr
+from litestash.logging import root_logger as logger
+
+
+CheckpointStats = namedtuple(
+    CheckpointStatsAttr.TYPE_NAME.value,
+    [
+        CheckpointStatsAttr.CHECKPOINTS.value,
+        CheckpointStatsAttr.QUIET.value,
+        CheckpointStatsAttr.BUSY.value,
+        CheckpointStatsAttr.LAST_DURATION.value,
+        CheckpointStatsAttr.MAX_DURATION.value,
+        CheckpointStatsAttr.TOTAL_DURATION.value,
+        CheckpointStatsAttr.WAL_BYTES.value
+    ]
+)
+CheckpointStats.__doc__ = CheckpointStatsAttr.DOC.value
+
+
+class Checkpointer:
+    """LiteStash Checkpointer
+
+    Every `interval` seconds each open database has the size and
+    modification time of its WAL file checked. A WAL of at least
+    `threshold` bytes gets a PASSIVE checkpoint, which copies what it can
+    without blocking readers or writers. A WAL left unchanged since the last
+    check belongs to a quiet database and gets one `quiet_mode` checkpoint,
+    which waits for readers to finish so the WAL starts over; TRUNCATE also
+    shrinks the file. A quiet database is not checkpointed again until it
+    is written to.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        check(): Checks every open database once and returns the
+        checkpoints run.
+
+        stats(): Returns the CheckpointStats counters.
+
+        after_fork(): Restarts the background thread in a child process.
+
+        close(): Stops the background thread.
+    """
+    __slots__ = (
+        'databases',
+        'wal_stat',
+        'checkpoint',
+        'threshold',
+        'interval',
+        'quiet_mode',
+        'seen',
+        'quieted',
+        'checkpoints',
+        'quiet',
+        'busy',
+        'last_duration',
+        'max_duration',
+        'total_duration',
+        'lock',
+        'stopped',
+        'thread'
+    )
+
+    def __init__(self,
+                 databases: Callable[[], Iterable[str]],
+                 wal_stat: Callable[[str], Optional[Tuple[int, int]]],
+                 checkpoint: Callable[[str, str], Optional[Tuple[int, ...]]],
+                 threshold: Optional[StrictInt] = None,
+                 interval: Optional[Union[StrictFloat, StrictInt]] = None,
+                 quiet_mode: Optional[StrictStr] = None,
+                 start: bool = True):
+        """Initializes the checkpointer and starts its thread.
+
+        Args:
+            databases (Callable): Returns the names of the open databases.
+            wal_stat (Callable): Called as wal_stat(db_name) to return the
+                bytes and st_mtime_ns of the WAL file, or None without one.
+            checkpoint (Callable): Called as checkpoint(db_name, mode) to run
+                PRAGMA wal_checkpoint(mode). Returns the busy flag, the WAL
+                frames and the frames checkpointed.
+            threshold (int): WAL bytes that start a PASSIVE checkpoint.
+            interval (float): Seconds between checks.
+            quiet_mode (str): 'RESTART' or 'TRUNCATE', the checkpoint of a
+                quiet database.
+            start (bool): Start the background thread.
+
+        Raises:
+            ValueError: If the threshold or interval is not positive, or the
+                quiet mode is unknown.
+        """
+        if threshold is None:
+            threshold = CheckpointConf.threshold()
+        if interval is None:
+            interval = CheckpointConf.interval()
+        if quiet_mode is None:
+            quiet_mode = CheckpointConf.quiet_mode()
+        if isinstance(threshold, bool) or not isinstance(threshold, int) or any(
+            isinstance(value, bool) or not isinstance(value, (int, float))
+            or value <= 0
+            for value in (threshold, interval)
+        ):
+            logger.error('%s: %s %s',
+                         CheckpointConf.value_error(), threshold, interval)
+            raise ValueError(CheckpointConf.value_error())
+        if quiet_mode not in CheckpointConf.quiet_modes():
+            logger.error('%s: %s', CheckpointConf.mode_error(), quiet_mode)
+            raise ValueError(CheckpointConf.mode_error())
+
+        self.databases = databases
+        self.wal_stat = wal_stat
+        self.checkpoint = checkpoint
+        self.threshold = threshold
+        self.interval = interval
+        self.quiet_mode = quiet_mode
+        self.seen: Dict[str, Tuple[int, int]] = {}
+        self.quieted = set()
+        self.checkpoints = 0
+        self.quiet = 0
+        self.busy = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread = None
+        if start:
+            self.start_thread()
+
+
+    def start_thread(self) -> None:
+        """Starts the background thread."""
+        self.thread = Thread(
+            target=self.run,
+            name=CheckpointConf.thread_name(),
+            daemon=True
+        )
+        self.thread.start()
+
+
+    def check(self) -> StrictInt:
+        """Checks the WAL of every open database once.
+
+        Returns:
+            int: The number of checkpoints run.
+        """
+        with self.lock:
+            ran = 0
+            seen = {}
+            for db_name in self.databases():
+                if self.stopped.is_set():
+                    break
+                stat = self.wal_stat(db_name)
+                if stat is None or not stat[0]:
+                    continue
+                seen[db_name] = stat
+                if stat != self.seen.get(db_name):
+                    self.quieted.discard(db_name)
+                    if stat[0] < self.threshold:
+                        continue
+                    mode = CheckpointConf.passive()
+                elif db_name in self.quieted:
+                    continue
+                else:
+                    mode = self.quiet_mode
+                if self.run_checkpoint(db_name, mode):
+                    ran += 1
+                    seen[db_name] = self.wal_stat(db_name) or (0, 0)
+                    if mode != CheckpointConf.passive():
+                        self.quieted.add(db_name)
+            self.seen = seen
+        return ran
+
+
+    def run_checkpoint(self, db_name: StrictStr, mode: StrictStr) -> bool:
+        """Runs and times one checkpoint; False if the database closed."""
+        began = perf_counter()
+        result = self.checkpoint(db_name, mode)
+        duration = perf_counter() - began
+        if result is None:
+            return False
+        busy, log, checkpointed = result
+        self.checkpoints += 1
+        if mode != CheckpointConf.passive():
+            self.quiet += 1
+        if busy or checkpointed < log:
+            self.busy += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        logger.debug('%s checkpoint of %s: %s/%s frames in %.6fs',
+                     mode, db_name, checkpointed, log, duration)
+        return True
+
+
+    def stats(self) -> CheckpointStats:
+        """Returns a snapshot of the checkpointer counters."""
+        return CheckpointStats(
+            self.checkpoints,
+            self.quiet,
+            self.busy,
+            self.last_duration,
+            self.max_duration,
+            self.total_duration,
+            {db_name: stat[0] for db_name, stat in self.seen.items()}
+        )
+
+
+    def run(self) -> None:
+        """Background loop that checks every interval until closed."""
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            # A WAL left unchecked keeps growing, so a failed pass is logged
+            # and the thread checks again after the next interval.
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logger.error('wal checkpoint failed: %s', error)
+
+
+    def after_fork(self) -> None:
+        """Replaces the locks and the thread a child process inherited."""
+        self.lock = Lock()
+        stopped = Event()
+        if self.stopped.is_set():
+            stopped.set()
+        self.stopped = stopped
+        if self.thread is not None and not stopped.is_set():
+            self.start_thread()
+
+
+    def close(self) -> None:
+        """Stops the background thread."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+    def __repr__(self):
+        """Return the settings and counters of the checkpointer."""
+        return (
+            f'Checkpointer(threshold={self.threshold}, '
+            f'interval={self.interval}, {self.stats()})'
+        )
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash Checkpointer"""
+        return f'Checkpointer(checkpoints={self.checkpoints})'
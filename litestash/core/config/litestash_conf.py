@@ -7,12 +7,37 @@ LiteStash, including:
 
 - **DataScheme:**  Constraints and options for key-value data validation.
 - **StashSlots:** Attribute names used in the main `LiteStash` class.
+- **StashWorkers:** Defaults for the optional parallel shard workers.
+- **ReadCacheConf:** Default bounds for the optional LRU read cache.
+- **WriteBehindConf:** Defaults for the optional group commit buffer.
+- **SweeperConf:** Defaults for the optional background expiry sweeper.
+- **ReaperConf:** Defaults for deleting expired rows found by reads.
+- **CheckpointConf:** Defaults and modes of the optional WAL checkpointer.
+- **ScanConf:** Defaults and errors of the resumable key scan.
+- **TopologyConf:** Shard layout, hash ring and manifest of a LiteStash.
+- **PlacementConf:** Policies that spread the databases over directories.
+- **ReadOnlyConf:** URIs and errors of read-only and immutable stores.
+- **CliConf:** Command names, help and output of the litestash command.
 - **Utils:**  Default values and error messages for utility functions.
-- **EngineAttr/MetaAttr/SessionAttr/TimeAttr:** Named tuple structures for
-organizing engine, metadata, session, and time-related information.
+- **EngineAttr/KeyHashAttr/MetaAttr/SessionAttr/TimeAttr:** Named tuple
+structures for organizing engine, lookup key, metadata, session, and
+time-related information.
+- **BatchAttr:** Named tuple structure for the outcome of one mset batch.
+- **RouteAttr:** Named tuple structure for the database and table of a hash
+prefix character.
+- **FastAttr/FastStatementAttr:** Named tuple structures for the raw sqlite3
+fast path connections and statements.
+- **CacheStatsAttr:** Named tuple structure for the read cache counters.
+- **SweepStatsAttr:** Named tuple structure for the sweeper counters.
+- **CheckpointStatsAttr:** Named tuple structure for the checkpointer
+counters.
+- **MigrationAttr:** Named tuple structure for the previous layout of a
+running reshard.
+- **WriterConf:** Pool settings of the single writer connection.
 - **EngineConf:** Configuration parameters for setting up the SQLAlchemy engine.
 """
 from pathlib import Path
+from urllib.parse import quote
 
 from litestash.core.config.root import Valid
 
@@ -61,6 +86,11 @@ class StashError(Valid):
     """
     SET_TYPE = 'value must be JSON serializable'
     KEY_TYPE = 'Key must be a string'
+    TTL_VALUE = 'ttl must be a positive number of seconds'
+    DEADLINE_TYPE = 'Expire time must be a timestamp, datetime or GetTime'
+    CHUNK_SIZE = 'chunk_size must be a positive integer'
+    MATCH_TYPE = 'Key prefix and pattern must be strings'
+    CLOSED = 'LiteStash is closed'
 
 
 class DataScheme(Valid):
@@ -81,11 +111,565 @@ class StashSlots(Valid):
     ENGINE = 'engine'
     METADATA = 'metadata'
     DB_SESSION = 'db_session'
+    EXECUTOR = 'executor'
+    WORKERS = 'workers'
+    FAST_PATH = 'fast_path'
+    READ_CACHE = 'read_cache'
+    WRITE_BEHIND = 'write_behind'
+    SWEEPER = 'sweeper'
+    CHECKPOINTER = 'checkpointer'
+    REAPER = 'reaper'
+    TOPOLOGY = 'topology'
+    MIGRATION = 'migration'
+    DATA_LOCK = 'data_lock'
+    CLOSED = 'closed'
+    WEAKREF = '__weakref__'
 
     @staticmethod
     def slots():
         return tuple(slot.value for slot in StashSlots)
 
+class StashWorkers(Valid):
+    """Shard Workers
+
+    Configuration of the optional worker pool that runs the batch of each
+    database in parallel.
+    """
+    THREAD_NAME = 'litestash_shard'
+    MAX_WORKERS = 16
+    VALUE_ERROR = 'Worker count must be a positive integer'
+
+    @staticmethod
+    def thread_name() -> str:
+        return StashWorkers.THREAD_NAME.value
+
+    @staticmethod
+    def max_workers() -> int:
+        return StashWorkers.MAX_WORKERS.value
+
+
+class ReadCacheConf(Valid):
+    """Read Cache
+
+    Bounds of the optional in-process LRU cache in front of LiteStash.get.
+    """
+    MAX_ENTRIES = 4096
+    MAX_BYTES = 64 * 1024 * 1024
+    VALUE_ERROR = 'Read cache bounds must be positive integers'
+
+    @staticmethod
+    def max_entries() -> int:
+        return ReadCacheConf.MAX_ENTRIES.value
+
+    @staticmethod
+    def max_bytes() -> int:
+        return ReadCacheConf.MAX_BYTES.value
+
+    @staticmethod
+    def value_error() -> str:
+        return ReadCacheConf.VALUE_ERROR.value
+
+
+class WriteBehindConf(Valid):
+    """Write Behind
+
+    Defaults of the optional buffer that groups set calls into one
+    transaction per database.
+
+    FLUSH_SIZE (int): pending entries of one database that start a flush
+    FLUSH_INTERVAL (float): seconds between background flushes
+    """
+    THREAD_NAME = 'litestash_flush'
+    FLUSH_SIZE = 1000
+    FLUSH_INTERVAL = 0.05
+    VALUE_ERROR = 'Flush size and interval must be positive numbers'
+    CLOSED_ERROR = 'Write behind buffer is closed'
+
+    @staticmethod
+    def thread_name() -> str:
+        return WriteBehindConf.THREAD_NAME.value
+
+    @staticmethod
+    def flush_size() -> int:
+        return WriteBehindConf.FLUSH_SIZE.value
+
+    @staticmethod
+    def flush_interval() -> float:
+        return WriteBehindConf.FLUSH_INTERVAL.value
+
+    @staticmethod
+    def value_error() -> str:
+        return WriteBehindConf.VALUE_ERROR.value
+
+    @staticmethod
+    def closed_error() -> str:
+        return WriteBehindConf.CLOSED_ERROR.value
+
+
+class SweeperConf(Valid):
+    """Expiry Sweeper
+
+    Defaults of the optional background sweeper that reclaims expired rows
+    table by table.
+
+    LIMIT (int): most rows deleted by one statement
+    INTERVAL (float): seconds between sweeps
+    MIN_INTERVAL (float): shortest wait while expired rows keep piling up
+    MAX_INTERVAL (float): longest wait while nothing is expiring
+    BUDGET (float): seconds one sweep may spend before yielding
+    """
+    THREAD_NAME = 'litestash_sweep'
+    LIMIT = 500
+    INTERVAL = 1.0
+    MIN_INTERVAL = 0.1
+    MAX_INTERVAL = 10.0
+    BUDGET = 0.025
+    VALUE_ERROR = 'Sweep limit, interval and budget must be positive numbers'
+
+    @staticmethod
+    def thread_name() -> str:
+        return SweeperConf.THREAD_NAME.value
+
+    @staticmethod
+    def limit() -> int:
+        return SweeperConf.LIMIT.value
+
+    @staticmethod
+    def interval() -> float:
+        return SweeperConf.INTERVAL.value
+
+    @staticmethod
+    def min_interval() -> float:
+        return SweeperConf.MIN_INTERVAL.value
+
+    @staticmethod
+    def max_interval() -> float:
+        return SweeperConf.MAX_INTERVAL.value
+
+    @staticmethod
+    def budget() -> float:
+        return SweeperConf.BUDGET.value
+
+    @staticmethod
+    def value_error() -> str:
+        return SweeperConf.VALUE_ERROR.value
+
+
+class ReaperConf(Valid):
+    """Lazy Expiry Reaper
+
+    Defaults of the background thread that deletes the expired rows found by
+    reads.
+
+    MAX_PENDING (int): most hash keys waiting; later ones are left to expire
+    DELAY (float): seconds to gather hash keys into one batch
+    """
+    THREAD_NAME = 'litestash_reap'
+    MAX_PENDING = 10000
+    DELAY = 0.01
+    VALUE_ERROR = 'Reap max pending and delay must be positive numbers'
+
+    @staticmethod
+    def thread_name() -> str:
+        return ReaperConf.THREAD_NAME.value
+
+    @staticmethod
+    def max_pending() -> int:
+        return ReaperConf.MAX_PENDING.value
+
+    @staticmethod
+    def delay() -> float:
+        return ReaperConf.DELAY.value
+
+    @staticmethod
+    def value_error() -> str:
+        return ReaperConf.VALUE_ERROR.value
+
+
+class CheckpointConf(Valid):
+    """WAL Checkpointer
+
+    Defaults of the optional background thread that keeps the WAL file of
+    each open database from growing without bound.
+
+    THRESHOLD (int): WAL bytes that start a PASSIVE checkpoint
+    INTERVAL (float): seconds between checks of the WAL files
+    PASSIVE: copies what it can without waiting on readers or writers
+    RESTART/TRUNCATE: wait for readers so the WAL starts over, and
+    TRUNCATE also shrinks the file to zero bytes; run once a WAL is quiet
+    SIZE_LIMIT (int): the journal_size_limit of a checkpointed writer, so
+    the WAL shrinks when it starts over and its size counts new frames only
+    """
+    THREAD_NAME = 'litestash_checkpoint'
+    THRESHOLD = 67108864
+    INTERVAL = 1.0
+    PASSIVE = 'PASSIVE'
+    RESTART = 'RESTART'
+    TRUNCATE = 'TRUNCATE'
+    WAL = '-wal'
+    SIZE_LIMIT = 0
+    VALUE_ERROR = 'Checkpoint threshold and interval must be positive numbers'
+    MODE_ERROR = 'The quiet checkpoint mode must be RESTART or TRUNCATE'
+
+    @staticmethod
+    def thread_name() -> str:
+        return CheckpointConf.THREAD_NAME.value
+
+    @staticmethod
+    def threshold() -> int:
+        return CheckpointConf.THRESHOLD.value
+
+    @staticmethod
+    def interval() -> float:
+        return CheckpointConf.INTERVAL.value
+
+    @staticmethod
+    def passive() -> str:
+        return CheckpointConf.PASSIVE.value
+
+    @staticmethod
+    def quiet_mode() -> str:
+        return CheckpointConf.TRUNCATE.value
+
+    @staticmethod
+    def quiet_modes() -> tuple:
+        return (CheckpointConf.RESTART.value, CheckpointConf.TRUNCATE.value)
+
+    @staticmethod
+    def wal(database: str) -> str:
+        return f'{database}{CheckpointConf.WAL.value}'
+
+    @staticmethod
+    def size_limit() -> int:
+        return CheckpointConf.SIZE_LIMIT.value
+
+    @staticmethod
+    def value_error() -> str:
+        return CheckpointConf.VALUE_ERROR.value
+
+    @staticmethod
+    def mode_error() -> str:
+        return CheckpointConf.MODE_ERROR.value
+
+
+class ScanConf(Valid):
+    """Key Scan
+
+    Defaults of the resumable scan over every table.
+
+    START (str): the cursor that starts a scan and the one that ends it
+    COUNT (int): rows examined by one scan call
+    GLOB (str): the wildcard characters of a key pattern
+    """
+    START = '0'
+    COUNT = 100
+    GLOB = '*?['
+    CURSOR_ERROR = 'Invalid scan cursor'
+    COUNT_ERROR = 'Scan count must be a positive integer'
+
+    @staticmethod
+    def start() -> str:
+        return ScanConf.START.value
+
+    @staticmethod
+    def count() -> int:
+        return ScanConf.COUNT.value
+
+    @staticmethod
+    def glob() -> str:
+        return ScanConf.GLOB.value
+
+    @staticmethod
+    def cursor_error() -> str:
+        return ScanConf.CURSOR_ERROR.value
+
+    @staticmethod
+    def count_error() -> str:
+        return ScanConf.COUNT_ERROR.value
+
+
+class TopologyConf(Valid):
+    """Shard Topology
+
+    The prefix router is the original layout of 16 databases with 4 tables,
+    picked by the first character of a key hash. The ring router places the
+    shards on a consistent-hash ring of VNODES points each: the first
+    RING_BYTES of the key digest pick the shard and the next RING_BYTES pick
+    its table. The topology of a data directory is kept in its manifest,
+    which also records the previous topology while a reshard is running.
+    Every LiteStash holds a shared lock on the LOCK file of its data
+    directory; a reshard needs it alone.
+
+    SHARDS (int): the default number of databases of a ring topology
+    TABLES_PER_SHARD (int): the default number of tables of each database
+    MAX_SHARDS (int): the largest number of databases
+    MAX_TABLES (int): the largest number of tables of a database
+    """
+    PREFIX = 'prefix'
+    RING = 'blake2b-ring'
+    VERSION = 1
+    SHARDS = 16
+    TABLES_PER_SHARD = 4
+    VNODES = 128
+    RING_BYTES = 8
+    MAX_SHARDS = 1024
+    MAX_TABLES = 256
+    DB_NAME = 'shard_{index:04d}'
+    TABLE_NAME = '{db_name}_table_{index:03d}'
+    VNODE = '{db_name}#{index}'
+    MANIFEST = 'litestash_manifest.json'
+    LOCK = 'litestash.lock'
+    DB_FILES = ('{db_name}.db',
+                '{db_name}.db-wal',
+                '{db_name}.db-shm',
+                '{db_name}.db-journal')
+    KEY_VERSION = 'version'
+    KEY_ROUTER = 'router'
+    KEY_SHARDS = 'shards'
+    KEY_TABLES = 'tables_per_shard'
+    KEY_VNODES = 'vnodes'
+    KEY_PREVIOUS = 'previous'
+    SHARDS_ERROR = 'shards must be an integer from 1 to 1024'
+    TABLES_ERROR = 'tables_per_shard must be an integer from 1 to 256'
+    VNODES_ERROR = 'vnodes must be a positive integer'
+    MANIFEST_ERROR = 'Invalid topology manifest'
+    MISMATCH_ERROR = 'The requested topology differs from the manifest'
+    LAYOUT_ERROR = 'Prefix routed databases exist without a manifest'
+    SEARCH_ERROR = 'Full-text search needs the prefix topology'
+    RESHARD_ERROR = 'Another reshard has not finished'
+    BUSY_ERROR = ('Another LiteStash has the data directory open; '
+                  'stop it before a reshard')
+    LOCKED_ERROR = 'A reshard of the data directory is running'
+
+    @staticmethod
+    def prefix() -> str:
+        return TopologyConf.PREFIX.value
+
+    @staticmethod
+    def ring() -> str:
+        return TopologyConf.RING.value
+
+    @staticmethod
+    def version() -> int:
+        return TopologyConf.VERSION.value
+
+    @staticmethod
+    def shards() -> int:
+        return TopologyConf.SHARDS.value
+
+    @staticmethod
+    def tables_per_shard() -> int:
+        return TopologyConf.TABLES_PER_SHARD.value
+
+    @staticmethod
+    def vnodes() -> int:
+        return TopologyConf.VNODES.value
+
+    @staticmethod
+    def ring_bytes() -> int:
+        return TopologyConf.RING_BYTES.value
+
+    @staticmethod
+    def max_shards() -> int:
+        return TopologyConf.MAX_SHARDS.value
+
+    @staticmethod
+    def max_tables() -> int:
+        return TopologyConf.MAX_TABLES.value
+
+    @staticmethod
+    def db_name(index: int) -> str:
+        return TopologyConf.DB_NAME.value.format(index=index)
+
+    @staticmethod
+    def table_name(db_name: str, index: int) -> str:
+        return TopologyConf.TABLE_NAME.value.format(db_name=db_name,
+                                                    index=index)
+
+    @staticmethod
+    def vnode(db_name: str, index: int) -> str:
+        return TopologyConf.VNODE.value.format(db_name=db_name, index=index)
+
+    @staticmethod
+    def manifest() -> str:
+        return TopologyConf.MANIFEST.value
+
+    @staticmethod
+    def lock() -> str:
+        return TopologyConf.LOCK.value
+
+    @staticmethod
+    def db_files(db_name: str) -> tuple:
+        return tuple(name.format(db_name=db_name)
+                     for name in TopologyConf.DB_FILES.value)
+
+    @staticmethod
+    def shards_error() -> str:
+        return TopologyConf.SHARDS_ERROR.value
+
+    @staticmethod
+    def tables_error() -> str:
+        return TopologyConf.TABLES_ERROR.value
+
+    @staticmethod
+    def vnodes_error() -> str:
+        return TopologyConf.VNODES_ERROR.value
+
+    @staticmethod
+    def manifest_error() -> str:
+        return TopologyConf.MANIFEST_ERROR.value
+
+    @staticmethod
+    def mismatch_error() -> str:
+        return TopologyConf.MISMATCH_ERROR.value
+
+    @staticmethod
+    def layout_error() -> str:
+        return TopologyConf.LAYOUT_ERROR.value
+
+    @staticmethod
+    def search_error() -> str:
+        return TopologyConf.SEARCH_ERROR.value
+
+    @staticmethod
+    def reshard_error() -> str:
+        return TopologyConf.RESHARD_ERROR.value
+
+    @staticmethod
+    def busy_error() -> str:
+        return TopologyConf.BUSY_ERROR.value
+
+    @staticmethod
+    def locked_error() -> str:
+        return TopologyConf.LOCKED_ERROR.value
+
+
+class PlacementConf(Valid):
+    """Shard Placement
+
+    Spreads the database files of a topology over several directories,
+    e.g. one per drive, so their WAL streams write in parallel. The
+    'round-robin' policy deals the databases out in turn; 'free-space'
+    weights each directory by the free space of its file system. The
+    assignment is made once and kept in the manifest.
+    """
+    ROUND_ROBIN = 'round-robin'
+    FREE_SPACE = 'free-space'
+    KEY_PLACEMENT = 'placement'
+    KEY_POLICY = 'policy'
+    KEY_DIRECTORIES = 'directories'
+    KEY_DATABASES = 'databases'
+    POLICY_ERROR = 'placement must be round-robin or free-space'
+    DIRECTORIES_ERROR = 'directories must be a non-empty list of paths'
+    CACHE_ERROR = 'directories need database files, not cache'
+    MISMATCH_ERROR = 'The requested directories differ from the manifest'
+
+    @staticmethod
+    def round_robin() -> str:
+        return PlacementConf.ROUND_ROBIN.value
+
+    @staticmethod
+    def free_space() -> str:
+        return PlacementConf.FREE_SPACE.value
+
+    @staticmethod
+    def policies() -> tuple:
+        return (PlacementConf.ROUND_ROBIN.value,
+                PlacementConf.FREE_SPACE.value)
+
+    @staticmethod
+    def policy_error() -> str:
+        return PlacementConf.POLICY_ERROR.value
+
+    @staticmethod
+    def directories_error() -> str:
+        return PlacementConf.DIRECTORIES_ERROR.value
+
+    @staticmethod
+    def cache_error() -> str:
+        return PlacementConf.CACHE_ERROR.value
+
+    @staticmethod
+    def mismatch_error() -> str:
+        return PlacementConf.MISMATCH_ERROR.value
+
+
+class ReadOnlyConf(Valid):
+    """Read-Only Stores
+
+    A read-only LiteStash opens each database file with mode=ro and
+    query_only=ON and never creates tables. An immutable one also tells
+    SQLite the files cannot change, so it skips locking and the WAL.
+    """
+    URI = 'file:{path}?mode=ro&uri=true'
+    IMMUTABLE = '&immutable=1'
+    EMPTY = 'reading as empty, no database file yet'
+    WRITE_ERROR = 'This LiteStash is read-only'
+    CACHE_ERROR = 'A read-only LiteStash needs a data directory, not cache'
+    OPTION_ERROR = 'A read-only LiteStash cannot write_behind, sweep, ' \
+        'checkpoint or create search tables'
+    SCHEMA_ERROR = 'The database is not at the current schema version; ' \
+        'open it writable once to upgrade it'
+    WAL_ERROR = 'An immutable database must have its WAL checkpointed first'
+
+    @staticmethod
+    def uri(path: str, immutable: bool = False) -> str:
+        uri = ReadOnlyConf.URI.value.format(path=quote(path))
+        return f'{uri}{ReadOnlyConf.IMMUTABLE.value}' if immutable else uri
+
+    @staticmethod
+    def empty() -> str:
+        return ReadOnlyConf.EMPTY.value
+
+    @staticmethod
+    def write_error() -> str:
+        return ReadOnlyConf.WRITE_ERROR.value
+
+    @staticmethod
+    def cache_error() -> str:
+        return ReadOnlyConf.CACHE_ERROR.value
+
+    @staticmethod
+    def option_error() -> str:
+        return ReadOnlyConf.OPTION_ERROR.value
+
+    @staticmethod
+    def schema_error() -> str:
+        return ReadOnlyConf.SCHEMA_ERROR.value
+
+    @staticmethod
+    def wal_error() -> str:
+        return ReadOnlyConf.WAL_ERROR.value
+
+
+class CliConf(Valid):
+    """LiteStash Command
+
+    Names, help and output of the litestash command line tool.
+    """
+    PROG = 'litestash'
+    DESCRIPTION = 'Manage the data directory of a LiteStash.'
+    COMMAND = 'command'
+    RESHARD = 'reshard'
+    RESHARD_HELP = ('Move every key of a data directory to a new topology. '
+                    'Stop every other process using the directory first.')
+    INFO = 'info'
+    INFO_HELP = 'Print the topology manifest of a data directory.'
+    DATA_HELP = 'The data directory of the LiteStash.'
+    SHARDS_HELP = 'The number of databases of the new ring topology.'
+    TABLES_HELP = 'The tables of each database of the new ring topology.'
+    PREFIX_HELP = 'Move back to the 16 prefix routed databases.'
+    CHUNK_HELP = 'The rows moved per transaction.'
+    RESUME_HELP = 'Finish the reshard recorded in the manifest.'
+    NO_MANIFEST = 'No topology manifest in'
+    NO_DATA = 'No data directory at'
+    MOVED = 'moved {moved} keys to {topology}'
+
+    @staticmethod
+    def moved(moved: int, topology) -> str:
+        return CliConf.MOVED.value.format(moved=moved, topology=topology)
+
+
 class Utils(Valid):
     """Defaults for util functions
 
@@ -94,6 +678,26 @@ class Utils(Valid):
     SIZE = 41
     DB_NAME_ERROR = 'Invalid character'
     INVALID_CHAR_LENGTH = 'Incorrect number of characters'
+    MAX_VARIABLES = 999
+    BATCH_SIZE = 5000
+    CHUNK_SIZE = 1000
+    MICROSECONDS = 1000000
+
+    @staticmethod
+    def max_variables() -> int:
+        return Utils.MAX_VARIABLES.value
+
+    @staticmethod
+    def microseconds() -> int:
+        return Utils.MICROSECONDS.value
+
+    @staticmethod
+    def batch_size() -> int:
+        return Utils.BATCH_SIZE.value
+
+    @staticmethod
+    def chunk_size() -> int:
+        return Utils.CHUNK_SIZE.value
 
 
 class EngineAttr(Valid):
@@ -101,14 +705,59 @@ class EngineAttr(Valid):
     TYPE_NAME = 'EngineAttributes'
     DB_NAME = 'db_name'
     ENGINE = 'engine'
+    READER = 'reader'
     DOC = '''Defines a namedtuple for tuple returned by utils.setup_engine.
     Attributes:
         db_name (str): name of the database for this engine
-        engine (Engine): the sqlalchemy engine object
+        engine (Engine): the sqlalchemy engine of the single writer
+        reader (Engine): the sqlalchemy engine of the query_only read pool
     '''
     VALUE_ERROR = 'No such engine found'
 
 
+class KeyHashAttr(Valid):
+    """The namedtuple config for a hashed lookup key of a LiteStash"""
+    TYPE_NAME = 'KeyHash'
+    KEY_HASH = 'key_hash'
+    KEY = 'key'
+    DOC = '''Defines a namedtuple for a key and its hash for batched lookups.
+    Attributes:
+        key_hash (str): the urlsafe base64 primary key of the key
+        key (str): the key name as given by the caller
+    '''
+
+
+class BatchAttr(Valid):
+    """The namedtuple config for the outcome of one mset batch"""
+    TYPE_NAME = 'BatchResult'
+    DB_NAME = 'db_name'
+    TABLE_NAME = 'table_name'
+    COUNT = 'count'
+    ERROR = 'error'
+    DOC = '''Defines a namedtuple for the outcome of one bulk upsert batch.
+    Attributes:
+        db_name (str): name of the database of the batch
+        table_name (str): name of the table of the batch
+        count (int): number of entries in the batch
+        error (str): the error message, or None if the batch was stored
+    '''
+
+
+class RouteAttr(Valid):
+    """The namedtuple config for the route of a hash prefix character"""
+    TYPE_NAME = 'Route'
+    DB_NAME = 'db_name'
+    TABLE_NAME = 'table_name'
+    TABLE = 'table'
+    DOC = '''Defines a namedtuple for the storage location of a hash prefix.
+    Attributes:
+        db_name (str): name of the database for this prefix
+        table_name (str): name of the table for this prefix
+        table (Table): the Table enum member of this prefix, or None for
+        a route of the ring topology
+    '''
+
+
 class MetaAttr(Valid):
     """The namedtuple config for all metadata attributes of a LiteStash"""
     TYPE_NAME = 'MetaAttributes'
@@ -126,14 +775,151 @@ class SessionAttr(Valid):
     TYPE_NAME = 'SessionAttributes'
     DB_NAME = f'{EngineAttr.DB_NAME.value}'
     SESSION = 'session'
+    READER = f'{EngineAttr.READER.value}'
     VALUE_ERROR = 'Invalid database: no tables found'
     DOC = '''Defines a namedtuple for all session attributes of a LiteStash.
     Attributes:
         db_name (str): name of the database for this session
-        session (Session): the sqlalchemy session object
+        session (Session): the sqlalchemy session factory of the writer
+        reader (Session): the sqlalchemy session factory of the readers
+    '''
+
+
+class FastAttr(Valid):
+    """The namedtuple config for all fast path attributes of a LiteStash"""
+    TYPE_NAME = 'FastAttributes'
+    DB_NAME = f'{EngineAttr.DB_NAME.value}'
+    CONNECTION = 'connection'
+    LOCK = 'lock'
+    STATEMENTS = 'statements'
+    WRITER = 'writer'
+    DOC = '''Defines a namedtuple for all fast path attributes of a LiteStash.
+    Attributes:
+        db_name (str): name of the database for this connection
+        connection (Connection): the long-lived pooled sqlite3 reader
+        lock (Lock): serializes use of the connection across threads
+        statements (dict): the FastStatements for each table name
+        writer (Engine): the engine whose single connection runs writes
+    '''
+
+
+class FastStatementAttr(Valid):
+    """The namedtuple config for the fast path SQL of a table"""
+    TYPE_NAME = 'FastStatements'
+    GET = 'get'
+    SET = 'set'
+    DELETE = 'delete'
+    EXISTS = 'exists'
+    DOC = '''Defines a namedtuple for the fast path statements of a table.
+    Attributes:
+        get (str): select the key, value and expires_at for a key_hash
+        set (str): upsert a full row
+        delete (str): delete the row for a key_hash
+        exists (str): select the expires_at for a key_hash
+    '''
+
+
+class CacheStatsAttr(Valid):
+    """The namedtuple config for the counters of the read cache"""
+    TYPE_NAME = 'CacheStats'
+    HITS = 'hits'
+    MISSES = 'misses'
+    EVICTIONS = 'evictions'
+    ENTRIES = 'entries'
+    NBYTES = 'nbytes'
+    DOC = '''Defines a namedtuple for a snapshot of the read cache counters.
+    Attributes:
+        hits (int): lookups answered by the cache
+        misses (int): lookups that fell through to the database
+        evictions (int): entries dropped to stay within the bounds
+        entries (int): entries currently held
+        nbytes (int): estimated size of the values currently held
+    '''
+
+
+class SweepStatsAttr(Valid):
+    """The namedtuple config for the counters of the expiry sweeper"""
+    TYPE_NAME = 'SweepStats'
+    SWEEPS = 'sweeps'
+    RECLAIMED = 'reclaimed'
+    LAST_RECLAIMED = 'last_reclaimed'
+    LAST_DURATION = 'last_duration'
+    TOTAL_DURATION = 'total_duration'
+    INTERVAL = 'interval'
+    DOC = '''Defines a namedtuple for a snapshot of the sweeper counters.
+    Attributes:
+        sweeps (int): sweeps run so far
+        reclaimed (int): expired rows deleted so far
+        last_reclaimed (int): expired rows deleted by the last sweep
+        last_duration (float): seconds the last sweep took
+        total_duration (float): seconds spent sweeping so far
+        interval (float): current seconds between sweeps
     '''
 
 
+class CheckpointStatsAttr(Valid):
+    """The namedtuple config for the counters of the WAL checkpointer"""
+    TYPE_NAME = 'CheckpointStats'
+    CHECKPOINTS = 'checkpoints'
+    QUIET = 'quiet'
+    BUSY = 'busy'
+    LAST_DURATION = 'last_duration'
+    MAX_DURATION = 'max_duration'
+    TOTAL_DURATION = 'total_duration'
+    WAL_BYTES = 'wal_bytes'
+    DOC = '''Defines a namedtuple for a snapshot of the checkpointer counters.
+    Attributes:
+        checkpoints (int): checkpoints run so far
+        quiet (int): RESTART or TRUNCATE checkpoints of quiet databases
+        busy (int): checkpoints that could not copy the whole WAL
+        last_duration (float): seconds the last checkpoint took
+        max_duration (float): seconds the slowest checkpoint took
+        total_duration (float): seconds spent checkpointing so far
+        wal_bytes (dict): WAL file bytes of each open database when last
+            checked
+    '''
+
+
+class MigrationAttr(Valid):
+    """The namedtuple config for the previous layout of a running reshard"""
+    TYPE_NAME = 'Migration'
+    TOPOLOGY = 'topology'
+    METADATA = 'metadata'
+    DB_SESSION = 'db_session'
+    LOCK = 'lock'
+    DOC = '''Defines a namedtuple for the layout a reshard moves keys from.
+    Attributes:
+        topology (Topology): the previous topology
+        metadata (Metadata): the tables of the previous topology
+        db_session (Session): the session factories of the previous topology
+        lock (Lock): serializes moving a chunk with deleting from both layouts
+    '''
+
+
+class WriterConf(Valid):
+    """The Writer Pool
+
+    Each database has one writer connection. Writers queue for it in the
+    pool for up to POOL_TIMEOUT seconds instead of contending for the
+    SQLite write lock.
+    """
+    POOL_SIZE = 1
+    MAX_OVERFLOW = 0
+    POOL_TIMEOUT = 30
+
+    @staticmethod
+    def pool_size() -> int:
+        return WriterConf.POOL_SIZE.value
+
+    @staticmethod
+    def max_overflow() -> int:
+        return WriterConf.MAX_OVERFLOW.value
+
+    @staticmethod
+    def pool_timeout() -> int:
+        return WriterConf.POOL_TIMEOUT.value
+
+
 class EngineConf(Valid):
     """The Engine Config
 
@@ -141,6 +927,10 @@ class EngineConf(Valid):
     """
     CACHE = ':memory:'
     SQLITE = 'sqlite:///'
+    MEMORY = 'sqlite://'
+    MEMDB = 'file:/litestash_{db_name}_{token}?vfs=memdb'
+    MEMDB_VERSION = (3, 36, 0)
+    MEMDB_TOKEN_BYTES = 8
     DIR_NAME = f'{Path.cwd()}/data'
     NAME_MIN_LENGTH = 3
     NAME_MAX_LENGTH = 128
@@ -156,6 +946,9 @@ class EngineConf(Valid):
     DIR_NOT_FOUND = 'No such file or directory'
     NO_DIR_ACCESS = 'Directory inaccessible'
     DIR_PATH_ERROR = 'Path Exception'
+    PROFILE_ERROR = 'Unknown PRAGMA profile'
+    PRAGMA_ERROR = 'PRAGMA overrides must name a profile setting and give ' \
+        'an integer or a keyword'
 
 
     @staticmethod
@@ -166,6 +959,22 @@ class EngineConf(Valid):
     def sqlite() -> str:
         return EngineConf.SQLITE.value
 
+    @staticmethod
+    def memory() -> str:
+        return EngineConf.MEMORY.value
+
+    @staticmethod
+    def memdb(db_name: str, token: str) -> str:
+        return EngineConf.MEMDB.value.format(db_name=db_name, token=token)
+
+    @staticmethod
+    def memdb_version() -> tuple:
+        return EngineConf.MEMDB_VERSION.value
+
+    @staticmethod
+    def memdb_token_bytes() -> int:
+        return EngineConf.MEMDB_TOKEN_BYTES.value
+
     @staticmethod
     def dirname() -> str:
         return EngineConf.DIR_NAME.value
@@ -225,3 +1034,11 @@ class EngineConf(Valid):
     @staticmethod
     def dir_path_error() -> str:
         return EngineConf.DIR_PATH_ERROR.value
+
+    @staticmethod
+    def profile_error() -> str:
+        return EngineConf.PROFILE_ERROR.value
+
+    @staticmethod
+    def pragma_error() -> str:
+        return EngineConf.PRAGMA_ERROR.value
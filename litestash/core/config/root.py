@@ -53,6 +53,13 @@ class Core(Valid):
     ENGINE = 'engine'
     SCHEMA = 'schema'
     SESSION = 'session'
+    FAST_PATH = 'fast_path'
+    READ_CACHE = 'read_cache'
+    WRITE_BEHIND = 'write_behind'
+    SWEEPER = 'sweeper'
+    REAPER = 'reaper'
+    CHECKPOINTER = 'checkpointer'
+    TOPOLOGY = 'topology'
 
 
 class Exceptions(Valid):
@@ -65,6 +72,9 @@ class Util(Valid):
     SCHEMA = 'schema_util'
     TABLE = 'table_util'
     MODEL = 'model_util'
+    FAST_PATH = 'fast_path_util'
+    TOPOLOGY = 'topology_util'
+    RESHARD = 'reshard_util'
 
 
 class Config(Valid):
@@ -6,6 +6,10 @@ schema.
 This module includes the following configuration elements:
 
 - **`Pragma`:**  SQLite PRAGMA statements for database setup and optimization.
+- **`PragmaProfile`:**  Named sets of the tunable PRAGMAs.
+- **`FastSql`:**  Parameterized SQL for the raw sqlite3 fast path.
+- **`CountSql`:**  SQL of the trigger-maintained row counters.
+- **`VersionSql`:**  SQL of the schema version check and upgrade.
 - **`ColumnSetup`:**  Column names used in the LiteStash tables.
 - **`ColumnConfig`:** Configuration for mapping column types and validating
 column definitions.
@@ -25,6 +29,10 @@ class Pragma(Valid):
     SYNCHRONOUS = 'synchronous=NORMAL;'
     FOREIGN_KEYS = 'foreign_keys=ON;'
     JSON = 'json_valid = 1;'
+    PAGE_SIZE = 'page_size'
+    QUERY_ONLY = 'query_only=ON;'
+    CHECKPOINT = 'wal_checkpoint'
+    JOURNAL_SIZE_LIMIT = 'journal_size_limit'
 
     @staticmethod
     def journal_mode() -> str:
@@ -42,6 +50,87 @@ class Pragma(Valid):
     def valid_json() -> str:
         return f'{Sql.PRAGMA.value} {Pragma.JSON.value}'
 
+    @staticmethod
+    def query_only() -> str:
+        return f'{Sql.PRAGMA.value} {Pragma.QUERY_ONLY.value}'
+
+    @staticmethod
+    def setting(name: str, value) -> str:
+        return f'{Sql.PRAGMA.value} {name}={value};'
+
+    @staticmethod
+    def checkpoint(mode: str) -> str:
+        return f'{Sql.PRAGMA.value} {Pragma.CHECKPOINT.value}({mode});'
+
+    @staticmethod
+    def journal_size_limit(limit: int) -> str:
+        return Pragma.setting(Pragma.JOURNAL_SIZE_LIMIT.value, limit)
+
+
+class PragmaProfile(Valid):
+    """Sqlite Pragma Profiles
+
+    Named sets of the tunable PRAGMAs applied to every new connection.
+    page_size is set before journal_mode=WAL since it only takes effect on
+    a new database. cache_size is negative KiB per connection and mmap_size
+    is bytes.
+
+    THROUGHPUT: large page cache and mmap, commits without an fsync each
+    DURABLE: fsync on every commit, small WAL, patient lock waits
+    MEMORY_LEAN: small page cache, no mmap, temporary data on disk
+    READ_REPLICA: largest page cache and mmap for read-mostly copies
+    """
+    THROUGHPUT = (
+        ('page_size', 4096),
+        ('cache_size', -32768),
+        ('mmap_size', 268435456),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 5000),
+        ('wal_autocheckpoint', 10000),
+        ('synchronous', 'NORMAL')
+    )
+    DURABLE = (
+        ('page_size', 4096),
+        ('cache_size', -8192),
+        ('mmap_size', 0),
+        ('temp_store', 'DEFAULT'),
+        ('busy_timeout', 10000),
+        ('wal_autocheckpoint', 1000),
+        ('synchronous', 'FULL')
+    )
+    MEMORY_LEAN = (
+        ('page_size', 4096),
+        ('cache_size', -1024),
+        ('mmap_size', 0),
+        ('temp_store', 'FILE'),
+        ('busy_timeout', 5000),
+        ('wal_autocheckpoint', 500),
+        ('synchronous', 'NORMAL')
+    )
+    READ_REPLICA = (
+        ('page_size', 4096),
+        ('cache_size', -65536),
+        ('mmap_size', 1073741824),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 30000),
+        ('wal_autocheckpoint', 1000),
+        ('synchronous', 'NORMAL')
+    )
+
+    @staticmethod
+    def default() -> str:
+        return 'throughput'
+
+    @staticmethod
+    def names() -> tuple:
+        return tuple(
+            profile.name.lower().replace('_', '-') for profile in PragmaProfile
+        )
+
+    @staticmethod
+    def settings(name: str) -> tuple:
+        return PragmaProfile[name.upper().replace('-', '_')].value
+
 
 class Sql(Valid):
     """SQL Terms
@@ -49,6 +138,7 @@ class Sql(Valid):
     Enumerations of regularly used SQL terms.
     Members:
         BEGIN:
+        BEGIN_IMMEDIATE:
         INSERT:
         DELETE:
         AND:
@@ -60,6 +150,7 @@ class Sql(Valid):
     """
     PRAGMA = 'PRAGMA'
     BEGIN = 'BEGIN'
+    BEGIN_IMMEDIATE = 'BEGIN IMMEDIATE'
     INSERT = 'INSERT INTO'
     DELETE = 'DELETE FROM'
     AND = 'AND'
@@ -73,6 +164,10 @@ class Sql(Valid):
     def begin():
         return f'{Sql.BEGIN.value}'
 
+    @staticmethod
+    def begin_immediate():
+        return f'{Sql.BEGIN_IMMEDIATE.value}'
+
     @staticmethod
     def insert():
         return f'{Sql.INSERT.value}'
@@ -102,6 +197,154 @@ class Sql(Valid):
         return f'{Sql.END.value}'
 
 
+class FastSql(Valid):
+    """Fast Path SQL
+
+    Parameterized statements for the raw sqlite3 fast path. Each statement is
+    formatted once per table and then kept prepared by the sqlite3 statement
+    cache of the shard connection.
+    """
+    GET = 'SELECT key, value, expires_at FROM {table} WHERE key_hash = ?'
+    SET = (
+        'INSERT INTO {table} '
+        '(key_hash, key, value, timestamp, microsecond, expires_at) '
+        'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key_hash) DO UPDATE SET '
+        'key = excluded.key, value = excluded.value, '
+        'timestamp = excluded.timestamp, microsecond = excluded.microsecond, '
+        'expires_at = excluded.expires_at'
+    )
+    DELETE = 'DELETE FROM {table} WHERE key_hash = ?'
+    EXISTS = 'SELECT expires_at FROM {table} WHERE key_hash = ? LIMIT 1'
+
+    @staticmethod
+    def get(table_name: str) -> str:
+        return FastSql.GET.value.format(table=table_name)
+
+    @staticmethod
+    def set(table_name: str) -> str:
+        return FastSql.SET.value.format(table=table_name)
+
+    @staticmethod
+    def delete(table_name: str) -> str:
+        return FastSql.DELETE.value.format(table=table_name)
+
+    @staticmethod
+    def exists(table_name: str) -> str:
+        return FastSql.EXISTS.value.format(table=table_name)
+
+
+class CountSql(Valid):
+    """Row Counter SQL
+
+    Each database keeps the row count of its tables in a small counter table.
+    Insert and delete triggers on every table keep the count current, so
+    counting never scans a table. An upsert that updates an existing key
+    fires neither trigger.
+    """
+    TABLE = 'stash_counts'
+    CREATE = (
+        'CREATE TABLE IF NOT EXISTS stash_counts '
+        '(table_name TEXT PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID'
+    )
+    INSERT_TRIGGER = (
+        'CREATE TRIGGER IF NOT EXISTS {table}_count_insert '
+        'AFTER INSERT ON {table} BEGIN '
+        'UPDATE stash_counts SET count = count + 1 '
+        "WHERE table_name = '{table}'; END"
+    )
+    DELETE_TRIGGER = (
+        'CREATE TRIGGER IF NOT EXISTS {table}_count_delete '
+        'AFTER DELETE ON {table} BEGIN '
+        'UPDATE stash_counts SET count = count - 1 '
+        "WHERE table_name = '{table}'; END"
+    )
+    INIT = (
+        'INSERT INTO stash_counts (table_name, count) '
+        "SELECT '{table}', (SELECT count(*) FROM {table}) "
+        'WHERE NOT EXISTS '
+        "(SELECT 1 FROM stash_counts WHERE table_name = '{table}')"
+    )
+    RESET = "DELETE FROM stash_counts WHERE table_name = '{table}'"
+    COUNTS = 'SELECT table_name, count FROM stash_counts'
+
+    @staticmethod
+    def table() -> str:
+        return CountSql.TABLE.value
+
+    @staticmethod
+    def create() -> str:
+        return CountSql.CREATE.value
+
+    @staticmethod
+    def insert_trigger(table_name: str) -> str:
+        return CountSql.INSERT_TRIGGER.value.format(table=table_name)
+
+    @staticmethod
+    def delete_trigger(table_name: str) -> str:
+        return CountSql.DELETE_TRIGGER.value.format(table=table_name)
+
+    @staticmethod
+    def init(table_name: str) -> str:
+        return CountSql.INIT.value.format(table=table_name)
+
+    @staticmethod
+    def reset(table_name: str) -> str:
+        return CountSql.RESET.value.format(table=table_name)
+
+    @staticmethod
+    def counts() -> str:
+        return CountSql.COUNTS.value
+
+
+class VersionSql(Valid):
+    """Schema Version SQL
+
+    The schema version of a database is kept in PRAGMA user_version, a field
+    of the file header that is read without touching sqlite_master. A
+    database at VERSION is opened without creating or reflecting any table.
+    Databases created before the version stamp are upgraded in place: tables
+    without the expires_at column gain it along with its index.
+    """
+    VERSION = 1
+    GET = 'PRAGMA user_version'
+    SET = 'PRAGMA user_version = {version}'
+    RESET = 'PRAGMA user_version = 0'
+    COLUMNS = 'PRAGMA table_info({table})'
+    ADD_EXPIRES_AT = 'ALTER TABLE {table} ADD COLUMN expires_at INTEGER'
+    INDEX_EXPIRES_AT = (
+        'CREATE INDEX IF NOT EXISTS ix_{table}_expires_at '
+        'ON {table} (expires_at)'
+    )
+
+    @staticmethod
+    def version() -> int:
+        return VersionSql.VERSION.value
+
+    @staticmethod
+    def get() -> str:
+        return VersionSql.GET.value
+
+    @staticmethod
+    def set(version: int) -> str:
+        return VersionSql.SET.value.format(version=version)
+
+    @staticmethod
+    def reset() -> str:
+        return VersionSql.RESET.value
+
+    @staticmethod
+    def columns(table_name: str) -> str:
+        return VersionSql.COLUMNS.value.format(table=table_name)
+
+    @staticmethod
+    def add_expires_at(table_name: str) -> str:
+        return VersionSql.ADD_EXPIRES_AT.value.format(table=table_name)
+
+    @staticmethod
+    def index_expires_at(table_name: str) -> str:
+        return VersionSql.INDEX_EXPIRES_AT.value.format(table=table_name)
+
+
 class ColumnFields(Valid):
     """The Column Setup
 
@@ -113,6 +356,7 @@ class ColumnFields(Valid):
     VALUE = 'value'
     TIMESTAMP = 'timestamp'
     MICROSECOND = 'microsecond'
+    EXPIRES_AT = 'expires_at'
 
 
 class ColumnConfig(Valid):
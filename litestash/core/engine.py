@@ -1,51 +1,134 @@
 """LiteStash Engine Manager
 
 This module provides engines for all SQLite databases used in the LiteStash
-key-value store.
+key-value store. Engines are created on first use.
 """
+from copy import copy
+from pathlib import Path
+from threading import Lock
+from typing import Dict
+from typing import Iterable
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 from pydantic import StrictBool
+from pydantic import StrictInt
 from pydantic import StrictStr
 
 from sqlalchemy import Engine as SQL_Engine
+from sqlalchemy.pool import StaticPool
 
-from litestash.core.config.root import Tables
+from litestash.core.config.litestash_conf import CheckpointConf
+from litestash.core.config.litestash_conf import ReadOnlyConf
 from litestash.core.config.root import ErrorMessage
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
+from litestash.core.util.engine_util import checkpoint_wal
+from litestash.core.util.engine_util import database_path
+from litestash.core.util.engine_util import mk_pragmas
 from litestash.core.util.engine_util import setup_engine
+from litestash.core.util.engine_util import wal_stat
+from litestash.logging import root_logger as logger
 
 class Engine:
     """LiteStash Engine Class
 
     This class manages the creation and access of SQLAlchemy engines for each
-    SQLite database file used in the LiteStash key-value store. Each database
-    file is associated with a specific range of hash prefixes, ensuring
-    efficient data distribution.
+    SQLite database file used in the LiteStash key-value store. The topology
+    names the database files, places them in directories and routes each key
+    hash to one of them. The engine of a database is created the first time
+    it is requested.
+
+    A readonly engine opens the database files without writing to them. A
+    database without a file yet is read from an empty in-memory stand-in
+    until the engine is disposed.
 
     Attributes:
 
         __slots__ (tuple): A tuple of attribute names for memory optimization.
 
+        topology (Topology): The databases and the route of each key hash.
+
+        readonly (bool): The database files are opened read-only.
+
+        immutable (bool): The database files are opened as snapshots.
+
     Methods:
 
-        __init__(): Initializes the Engine object, creating engine instances
-        for each database file.
+        __init__(): Initializes the Engine object with the settings of every
+        engine.
+
+        get(name): Retrieves a specific SQLAlchemy engine by its name,
+        creating it on first use.
+
+        opened(): Returns the names of the databases with an engine.
+
+        with_topology(topology): Returns an Engine of another topology that
+        shares the open databases.
+
+        dispose(names): Closes the connections of databases.
+
+        writable(name): Whether the tables of a database may be created.
+
+        after_fork(): Drops the pooled connections a child process
+        inherited.
 
-        get(name): Retrieves a specific SQLAlchemy engine by its name.
+        wal_stat(name): Returns the size and modification time of the WAL
+        file of an open database.
+
+        checkpoint(name, mode): Runs a WAL checkpoint on an open database.
 
         __iter__(): Returns an iterator that yields all the engine attributes.
     """
-    __slots__ = Tables.slots()
+    __slots__ = ('topology',
+                 'readonly',
+                 'immutable',
+                 '_databases',
+                 '_empty',
+                 '_cache',
+                 '_data',
+                 '_settings',
+                 '_locks')
 
 
     def __init__(self,
                  cache: StrictBool = False,
-                 data: Optional[StrictStr] = None):
-        """Initializes the Engine object by creating SQLAlchemy engines for
-        each database file.
+                 data: Optional[StrictStr] = None,
+                 profile: Optional[StrictStr] = None,
+                 pragmas: Optional[
+                     Dict[StrictStr, Union[StrictInt, StrictStr]]
+                 ] = None,
+                 topology: Optional[Topology] = None,
+                 readonly: StrictBool = False,
+                 immutable: StrictBool = False):
+        """Initializes the Engine object with the settings used to create the
+        SQLAlchemy engine of each database file.
+
+        Args:
+            cache: Keep all databases in memory.
+            data: The directory for the database files.
+            profile: The PRAGMA profile of every connection: 'throughput'
+                (the default), 'durable', 'memory-lean' or 'read-replica'.
+            pragmas: Settings of the profile to override.
+            topology: The databases and routing; defaults to the prefix
+                topology.
+            readonly: Open the database files with mode=ro and query_only.
+            immutable: Also open them as snapshots, without file locking;
+                implies readonly.
+
+        Raises:
+            ValueError: If the profile or an override is invalid.
         """
-        for db in self.__slots__:
-            setattr(self, db, setup_engine(db, cache, data))
+        self.topology = PREFIX_TOPOLOGY if topology is None else topology
+        self.readonly = readonly or immutable
+        self.immutable = immutable
+        self._databases = {}
+        self._empty = set()
+        self._cache = cache
+        self._data = data
+        self._settings = mk_pragmas(profile, pragmas)
+        self._locks = {db: Lock() for db in self.topology.databases}
 
 
     def get(self, name: StrictStr) -> SQL_Engine:
@@ -58,25 +141,135 @@ class Engine:
             The SQLAlchemy engine associated with the specified database.
 
         Raises:
-            AttributeError: If no engine is found with the given name.
+            ValueError: If no engine is found with the given name, or an
+            immutable database has an unmerged WAL.
+        """
+        try:
+            return self._databases[name]
+        except KeyError:
+            if name not in self._locks:
+                raise ValueError(
+                    f'{ErrorMessage.GET_ENGINE.value} {name}'
+                ) from None
+            with self._locks[name]:
+                if name not in self._databases:
+                    self._databases[name] = self._open(name)
+            return self._databases[name]
+
+
+    def _open(self, name: StrictStr):
+        """Creates the engines of a database, or of its empty stand-in."""
+        data = self.topology.directory(name, self._data)
+        if self.readonly and not self._cache:
+            path = database_path(data, name)
+            if not path.exists():
+                logger.info('%s %s: %s', name, ReadOnlyConf.empty(), path)
+                self._empty.add(name)
+                return setup_engine(name, True, data, self._settings)
+            wal = Path(CheckpointConf.wal(str(path)))
+            if self.immutable and wal.exists() and wal.stat().st_size:
+                logger.error('%s: %s', ReadOnlyConf.wal_error(), wal)
+                raise ValueError(f'{ReadOnlyConf.wal_error()}: {name}')
+        return setup_engine(name,
+                            self._cache,
+                            data,
+                            self._settings,
+                            self.readonly,
+                            self.immutable)
+
+
+    def writable(self, name: StrictStr) -> StrictBool:
+        """Whether the tables of an open database may be created: always
+        unless readonly, and only in the empty stand-in otherwise."""
+        return not self.readonly or name in self._empty
+
+
+    def opened(self) -> tuple:
+        """Returns the names of the databases with an engine."""
+        return tuple(db for db in self.topology.databases
+                     if db in self._databases)
+
+
+    def with_topology(self, topology: Topology) -> 'Engine':
+        """Returns an Engine that routes by another topology.
+
+        Both engines share the engines of their databases, so a database
+        named by both topologies keeps a single writer.
+        """
+        engine = copy(self)
+        engine.topology = topology
+        for db in topology.databases:
+            self._locks.setdefault(db, Lock())
+        return engine
+
+
+    def dispose(self, names: Optional[Iterable[StrictStr]] = None) -> None:
+        """Closes the pooled connections of the named databases, or of
+        every open database. A disposed database opens again on next use.
+        """
+        for name in tuple(self._databases) if names is None else names:
+            engine_stash = self._databases.pop(name, None)
+            self._empty.discard(name)
+            if engine_stash is not None:
+                engine_stash.engine.dispose()
+                engine_stash.reader.dispose()
+
+
+    def after_fork(self) -> None:
+        """Drops the pooled connections inherited from the parent process.
+
+        SQLite connections must not cross a fork, so the pools forget them
+        without closing them, which would disturb the parent, and the child
+        connects anew on next use. The engines are kept, so an in-memory
+        database keeps its data; the single shared connection of SQLite
+        before 3.36 is the database itself and is kept too.
+        """
+        for name in self._locks:
+            self._locks[name] = Lock()
+        for engine_stash in tuple(self._databases.values()):
+            sql_engines = (engine_stash.engine,)
+            if engine_stash.reader is not engine_stash.engine:
+                sql_engines += (engine_stash.reader,)
+            for sql_engine in sql_engines:
+                if not isinstance(sql_engine.pool, StaticPool):
+                    sql_engine.dispose(close=False)
+
+
+    def wal_stat(self, name: StrictStr) -> Optional[Tuple[int, int]]:
+        """Returns the bytes and st_mtime_ns of the WAL file of a database,
+        or None when it is not open, in memory or has no WAL yet.
+        """
+        engine_stash = self._databases.get(name)
+        if engine_stash is None:
+            return None
+        return wal_stat(engine_stash)
+
+
+    def checkpoint(self,
+                   name: StrictStr,
+                   mode: StrictStr) -> Optional[Tuple[int, int, int]]:
+        """Runs a WAL checkpoint of mode on a database without opening it.
+
+        Returns:
+            tuple: The busy flag, WAL frames and frames checkpointed, or None
+            when the database is not open.
         """
-        if name not in self.__slots__:
-            raise ValueError(f'{ErrorMessage.GET_ENGINE.value} {name}')
-        attribute = getattr(self, name)
-        return attribute
+        engine_stash = self._databases.get(name)
+        if engine_stash is None:
+            return None
+        return checkpoint_wal(engine_stash, mode)
 
 
     def __iter__(self):
         """Yields all engine attributes (name, engine tuples)."""
-        yield from (getattr(self, slot) for slot in self.__slots__)
+        yield from (self.get(db) for db in self.topology.databases)
 
 
     def __repr__(self):
-        """Return the details for each engine stored in the Engine object."""
+        """Return the details of each database engine opened so far."""
         rstr = "Engine(\n"
-        for table in Tables:
-            engine_attr = getattr(self, table.value)
-            name = table.value
+        for name in self.opened():
+            engine_attr = self._databases[name]
             db = engine_attr.db_name
             url = engine_attr.engine
             rstr += f"{name}: {db}.db, {url}\n"
@@ -86,6 +279,6 @@ class Engine:
 
     def __str__(self):
         """Concise string representation of the LiteStash Engine"""
-        data = self.__slots__
+        data = self.topology.databases
         s = f'Engine(databases={data},length={len(data)})'
         return s
@@ -0,0 +1,120 @@
+"""LiteStash Fast Path Manager
+
+Creates and provides access to one long-lived sqlite3 connection for each
+database in LiteStash, bypassing the ORM session for single key operations.
+Connections are checked out on first use.
+"""
+from threading import Lock
+from typing import Optional
+from litestash.core.engine import Engine
+from litestash.core.schema import Metadata
+from litestash.core.config.root import ErrorMessage
+from litestash.core.util.core_util import setup_fast_path
+
+
+class FastPath:
+    """LiteStash Fast Path
+
+    This class manages a raw sqlite3 connection and the prepared SQL of each
+    table for each SQLite database file used in the LiteStash key-value
+    store. Each connection is checked out of the matching engine pool the
+    first time it is requested and held until `close` returns it.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        __init__(): Initializes the FastPath object with the engines to use.
+
+        get(name): Retrieves the fast path attributes of a database by name,
+        checking out its connection on first use.
+
+        opened(): Returns the names of the databases with a connection.
+
+        close(): Returns every held connection to its engine pool.
+
+        __iter__(): Returns an iterator that yields all the fast path
+        attributes.
+    """
+    __slots__ = ('topology', '_databases', '_engine', '_metadata', '_locks')
+
+    def __init__(self, engine: Engine, metadata: Optional[Metadata] = None):
+        """Keep the engines of the connections checked out on first use.
+
+        Args:
+            engine (Engine): The LiteStash Engine containing the database
+            engines.
+            metadata (Metadata): Set up the tables of a database before its
+            connection is checked out.
+        """
+        self.topology = engine.topology
+        self._databases = {}
+        self._engine = engine
+        self._metadata = metadata
+        self._locks = {db: Lock() for db in self.topology.databases}
+
+
+    def get(self, db_name):
+        """Gets the fast path attributes for the specified database.
+
+        Args:
+            db_name (str): The name of the database (e.g., "tables_03").
+
+        Returns:
+            FastAttributes: The connection, lock and statements of the
+            database.
+
+        Raises:
+            ValueError: If no such database exists.
+        """
+        try:
+            return self._databases[db_name]
+        except KeyError:
+            if db_name not in self._locks:
+                raise ValueError(
+                    f'{ErrorMessage.GET_ENGINE.value} {db_name}'
+                ) from None
+            with self._locks[db_name]:
+                if db_name not in self._databases:
+                    if self._metadata is not None:
+                        self._metadata.get(db_name)
+                    self._databases[db_name] = setup_fast_path(
+                        self._engine.get(db_name),
+                        self.topology.table_names(db_name)
+                    )
+            return self._databases[db_name]
+
+
+    def opened(self) -> tuple:
+        """Returns the names of the databases with a connection."""
+        return tuple(db for db in self.topology.databases
+                     if db in self._databases)
+
+
+    def close(self):
+        """Returns each held connection to the pool of its engine."""
+        for db in self.opened():
+            fast_attr = self._databases[db]
+            with fast_attr.lock:
+                fast_attr.connection.close()
+
+
+    def __iter__(self):
+        """Yields all fast path attributes."""
+        yield from (self.get(db) for db in self.topology.databases)
+
+
+    def __repr__(self):
+        """Return the database of each fast path connection."""
+        rstr = 'FastPath(\n'
+        for fast_attr in (self._databases[db] for db in self.opened()):
+            rstr += f'{fast_attr.db_name}: {list(fast_attr.statements)}\n'
+        rstr += ')'
+        return rstr
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash FastPath"""
+        return f'FastPath(databases={len(self.topology.databases)})'
@@ -0,0 +1,247 @@
+"""LiteStash Read Cache
+
+Provides a bounded in-process LRU cache of decoded LiteStashData keyed by the
+primary key hash, kept in front of the databases for repeated reads.
+"""
+import orjson
+
+from collections import OrderedDict
+from collections import namedtuple
+from threading import Lock
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from pydantic import StrictInt
+from pydantic import StrictStr
+
+from litestash.core.config.litestash_conf import CacheStatsAttr
+from litestash.core.config.litestash_conf import ReadCacheConf
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.util.litestash_util import is_expired
+from litestash.logging import root_logger as logger
+from litestash.models import LiteStashData
+
+
+CacheStats = namedtuple(
+    CacheStatsAttr.TYPE_NAME.value,
+    [
+        CacheStatsAttr.HITS.value,
+        CacheStatsAttr.MISSES.value,
+        CacheStatsAttr.EVICTIONS.value,
+        CacheStatsAttr.ENTRIES.value,
+        CacheStatsAttr.NBYTES.value
+    ]
+)
+CacheStats.__doc__ = CacheStatsAttr.DOC.value
+
+
+class ReadCache:
+    """LiteStash Read Cache
+
+    A least recently used cache of LiteStashData bounded by both the number
+    of entries and the estimated bytes of the stored values. The cached data
+    is shared with every caller and must be treated as read-only. An entry
+    cached with an expires_at is dropped as a miss once it has expired.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        get(key_hash): Returns the cached data for a key hash or None.
+
+        get_many(key_hashes): Returns the cached data of many key hashes.
+
+        version(): Returns the write count to take before a database read.
+
+        fill(key_hash, data, version, expires_at): Caches the data read for a
+        key hash unless a write happened since `version`.
+
+        discard(key_hash): Drops the cached data of a key hash.
+
+        clear(): Drops every cached entry.
+
+        stats(): Returns the CacheStats counters.
+
+        after_fork(): Replaces the lock a child process inherited.
+    """
+    __slots__ = (
+        'max_entries',
+        'max_bytes',
+        'entries',
+        'nbytes',
+        'hits',
+        'misses',
+        'evictions',
+        'writes',
+        'lock'
+    )
+
+    def __init__(self,
+                 max_entries: Optional[StrictInt] = None,
+                 max_bytes: Optional[StrictInt] = None):
+        """Initializes an empty read cache.
+
+        Args:
+            max_entries (int): The most entries held at once.
+            max_bytes (int): The most estimated value bytes held at once.
+
+        Raises:
+            ValueError: If a bound is not a positive integer.
+        """
+        if max_entries is None:
+            max_entries = ReadCacheConf.max_entries()
+        if max_bytes is None:
+            max_bytes = ReadCacheConf.max_bytes()
+        for bound in (max_entries, max_bytes):
+            if isinstance(bound, bool) or not isinstance(bound, int) \
+                    or bound < 1:
+                logger.error('%s: %s', ReadCacheConf.value_error(), bound)
+                raise ValueError(ReadCacheConf.value_error())
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.lock = Lock()
+
+
+    def get(self, key_hash: StrictStr) -> Optional[LiteStashData]:
+        """Returns the cached data for a key hash, or None on a miss."""
+        return self.get_many([key_hash]).get(key_hash)
+
+
+    def get_many(
+        self,
+        key_hashes: List[StrictStr]
+    ) -> Dict[StrictStr, LiteStashData]:
+        """Returns the cached data found for each of the key hashes."""
+        found = {}
+        deadline = None
+        with self.lock:
+            for key_hash in key_hashes:
+                entry = self.entries.get(key_hash)
+                if entry is not None and entry[2] is not None:
+                    if deadline is None:
+                        deadline = get_deadline()
+                    if is_expired(entry[2], deadline):
+                        self._pop(key_hash)
+                        entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self.entries.move_to_end(key_hash)
+                self.hits += 1
+                found[key_hash] = entry[0]
+        return found
+
+
+    def version(self) -> StrictInt:
+        """Returns the write count to pass to `fill` before a database read."""
+        with self.lock:
+            return self.writes
+
+
+    def fill(self,
+             key_hash: StrictStr,
+             data: LiteStashData,
+             version: StrictInt,
+             expires_at: Optional[StrictInt] = None) -> None:
+        """Caches the data read for a key hash until expires_at.
+
+        The data is dropped if any write reached the cache since `version`
+        was taken, so a slow read never overwrites a newer set or delete.
+        Data larger than the byte bound is not cached.
+        """
+        size = self._size(key_hash, data)
+        with self.lock:
+            if version == self.writes:
+                self._store(key_hash, data, size, expires_at)
+
+
+    def discard(self, key_hash: StrictStr) -> None:
+        """Drops the cached data of a key hash if any."""
+        with self.lock:
+            self.writes += 1
+            self._pop(key_hash)
+
+
+    def clear(self) -> None:
+        """Drops every cached entry and keeps the counters."""
+        with self.lock:
+            self.writes += 1
+            self.entries.clear()
+            self.nbytes = 0
+
+
+    def after_fork(self) -> None:
+        """Replaces the lock a child process inherited; the cached entries
+        are the data of the parent at the fork and stay."""
+        self.lock = Lock()
+
+
+    def stats(self) -> CacheStats:
+        """Returns a snapshot of the cache counters."""
+        with self.lock:
+            return CacheStats(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self.entries),
+                self.nbytes
+            )
+
+
+    @staticmethod
+    def _size(key_hash: StrictStr, data: LiteStashData) -> StrictInt:
+        """Estimates the bytes held for an entry."""
+        return len(key_hash) + len(data.key) + len(orjson.dumps(data.value))
+
+
+    def _store(self,
+               key_hash: StrictStr,
+               data: LiteStashData,
+               size: StrictInt,
+               expires_at: Optional[StrictInt]) -> None:
+        """Stores an entry and evicts the least recently used entries to
+        stay within the bounds; the caller holds the lock."""
+        self._pop(key_hash)
+        if size > self.max_bytes:
+            return
+        self.entries[key_hash] = (data, size, expires_at)
+        self.nbytes += size
+        while len(self.entries) > self.max_entries \
+                or self.nbytes > self.max_bytes:
+            _, (_, evicted, _) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+
+    def _pop(self, key_hash: StrictStr) -> None:
+        """Removes an entry; the caller holds the lock."""
+        entry = self.entries.pop(key_hash, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self.entries)
+
+
+    def __repr__(self):
+        """Return the bounds and counters of the cache."""
+        return (
+            f'ReadCache(max_entries={self.max_entries}, '
+            f'max_bytes={self.max_bytes}, {self.stats()})'
+        )
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash ReadCache"""
+        return f'ReadCache(entries={len(self)})'
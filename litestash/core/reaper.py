@@ -0,0 +1,212 @@
+"""LiteStash Reaper
+
+Provides a background thread that deletes the expired rows that reads came
+across, in batches per database, so the reads themselves only skip them.
+"""
+from threading import Condition
+from threading import Thread
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from pydantic import StrictFloat
+from pydantic import StrictInt
+from pydantic import StrictStr
+from sqlalchemy.exc import SQLAlchemyError
+
+from litestash.core.config.litestash_conf import ReaperConf
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
+from litestash.logging import root_logger as logger
+
+
+class Reaper:
+    """LiteStash Reaper
+
+    Collects the hash keys of expired rows handed over by reads and deletes
+    them from a background thread, grouped into one transaction per database.
+    Each delete checks `expires_at` again, so a key set anew after the read
+    is kept. The thread starts with the first hash key. When `max_pending`
+    hash keys are waiting, later ones are left for the sweeper or `expire`.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        reap(key_hash): Queues the hash key of an expired row.
+
+        drain(): Deletes every queued hash key now.
+
+        use_topology(topology): Routes later hash keys by another topology.
+
+        after_fork(): Leaves the queue of the parent to the parent.
+
+        close(): Drains the queue and stops the background thread.
+    """
+    __slots__ = (
+        'delete',
+        'max_pending',
+        'delay',
+        'pending',
+        'reaped',
+        'dropped',
+        'condition',
+        'closed',
+        'thread',
+        'topology'
+    )
+
+    def __init__(self,
+                 delete: Callable[[str, List[str], int], int],
+                 max_pending: Optional[StrictInt] = None,
+                 delay: Optional[Union[StrictFloat, StrictInt]] = None,
+                 topology: Optional[Topology] = None):
+        """Initializes an empty reaper.
+
+        Args:
+            delete (Callable): Called as delete(db_name, key_hashes,
+                deadline) to delete the rows of one database expired before
+                the deadline. Returns the rows deleted.
+            max_pending (int): Most hash keys waiting at once.
+            delay (float): Seconds to gather hash keys into one batch.
+            topology (Topology): Routes each key hash to its database;
+                defaults to the prefix topology.
+
+        Raises:
+            ValueError: If max_pending or the delay is not positive.
+        """
+        if max_pending is None:
+            max_pending = ReaperConf.max_pending()
+        if delay is None:
+            delay = ReaperConf.delay()
+        if isinstance(max_pending, bool) or not isinstance(
+            max_pending, int
+        ) or any(
+            isinstance(value, bool) or not isinstance(value, (int, float))
+            or value <= 0
+            for value in (max_pending, delay)
+        ):
+            logger.error('%s: %s %s',
+                         ReaperConf.value_error(), max_pending, delay)
+            raise ValueError(ReaperConf.value_error())
+
+        self.delete = delete
+        self.max_pending = max_pending
+        self.delay = delay
+        self.pending = {}
+        self.reaped = 0
+        self.dropped = 0
+        self.condition = Condition()
+        self.closed = False
+        self.thread = None
+        self.topology = PREFIX_TOPOLOGY if topology is None else topology
+
+
+    def reap(self, key_hash: StrictStr) -> None:
+        """Queues the hash key of an expired row without waiting."""
+        with self.condition:
+            if self.closed:
+                return
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            waiting = bool(self.pending)
+            self.pending[key_hash] = None
+            if self.thread is None:
+                self.thread = Thread(
+                    target=self.run,
+                    name=ReaperConf.thread_name(),
+                    daemon=True
+                )
+                self.thread.start()
+            # Only the first hash key wakes the thread; later ones join the
+            # batch it gathers for `delay` seconds.
+            if not waiting:
+                self.condition.notify()
+
+
+    def drain(self) -> StrictInt:
+        """Deletes every queued hash key that is still expired.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        with self.condition:
+            key_hashes = list(self.pending)
+            self.pending.clear()
+        if not key_hashes:
+            return 0
+        databases = {}
+        for key_hash in key_hashes:
+            databases.setdefault(self.topology.db_name(key_hash), []).append(
+                key_hash
+            )
+        deadline = get_deadline()
+        reaped = 0
+        for db_name, db_hashes in databases.items():
+            try:
+                reaped += self.delete(db_name, db_hashes, deadline)
+            except SQLAlchemyError as error:
+                logger.error('reap failed for %s: %s', db_name, error)
+        with self.condition:
+            self.reaped += reaped
+        logger.debug('reaped %s expired rows', reaped)
+        return reaped
+
+
+    def use_topology(self, topology: Topology) -> None:
+        """Routes the hash keys of the next drain by another topology."""
+        with self.condition:
+            self.topology = topology
+
+
+    def after_fork(self) -> None:
+        """Empties the queue and replaces the lock a child process
+        inherited; the thread starts again with the next hash key."""
+        self.condition = Condition()
+        self.pending = {}
+        self.thread = None
+
+
+    def run(self) -> None:
+        """Background loop that drains the queue in batches."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                if self.closed:
+                    return
+                self.condition.wait(self.delay)
+            self.drain()
+
+
+    def close(self) -> None:
+        """Drains the queue and stops the background thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+        self.drain()
+
+
+    def __len__(self):
+        """Return the number of queued hash keys."""
+        with self.condition:
+            return len(self.pending)
+
+
+    def __repr__(self):
+        """Return the counters of the reaper."""
+        return (
+            f'Reaper(pending={len(self)}, reaped={self.reaped}, '
+            f'dropped={self.dropped})'
+        )
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash Reaper"""
+        return f'Reaper(reaped={self.reaped})'
@@ -1,10 +1,10 @@
 """LiteStash Metadata Manager
 
 Creates and provides access to metadata objects for each database in
-LiteStash.
+LiteStash. The tables of a database are set up on first use.
 """
+from threading import Lock
 from litestash.core.engine import Engine
-from litestash.core.config.root import Tables
 from litestash.core.config.root import ErrorMessage
 from litestash.core.config.litestash_conf import StashSlots
 from litestash.core.util.core_util import setup_metadata
@@ -14,7 +14,9 @@ class Metadata:
 
     This class manages the creation and access of SQLAlchemy Metadata for each
     SQLite database file used in the LiteStash key-value store. Each database
-    file is associated with a specific Metadata object.
+    file is associated with a specific Metadata object, created and checked
+    against the schema version of the database the first time it is
+    requested. The tables of a readonly engine are never created.
 
     Attributes:
 
@@ -22,27 +24,30 @@ class Metadata:
 
     Methods:
 
-        __init__(): Initializes the Engine object, creating engine instances
-        for each database file.
+        __init__(): Initializes the Metadata object with the engines to bind.
 
-        get(name): Retrieves a specific SQLAlchemy engine session by its name.
+        get(name): Retrieves the metadata of a database by its name, setting
+        up its tables on first use.
+
+        opened(): Returns the names of the databases with metadata.
 
         __iter__(): Returns an iterator that yields all the sesssion
         attributes.
     """
-    __slots__ = Tables.slots()
+    __slots__ = ('topology', '_databases', '_engine', '_locks')
 
 
     def __init__(self, engine: Engine):
-        """Create and bind each metadata object for each database to a
-        matching engine.
+        """Keep the engines each metadata object is bound to on first use.
 
         Args:
             engine (EngineStash): The EngineStash object containing the
             database engines.
         """
-        for table in self.__slots__:
-            setattr(self, table, setup_metadata(engine.get(table)))
+        self.topology = engine.topology
+        self._databases = {}
+        self._engine = engine
+        self._locks = {db: Lock() for db in self.topology.databases}
 
 
     def get(self, db_name):
@@ -55,17 +60,35 @@ class Metadata:
             The SQLAlchemy MetaData object associated with the database.
 
         Raises:
-            AttributeError: If no metadata is found for the given database
-            name.
+            ValueError: If no metadata is found for the given database
+            name, or a readonly database is not at the current schema
+            version.
         """
-        if db_name not in self.__slots__:
-            raise ValueError(f'{ErrorMessage.GET_ENGINE.value} {db_name}')
-        attribute = getattr(self, db_name)
-        return attribute
+        try:
+            return self._databases[db_name]
+        except KeyError:
+            if db_name not in self._locks:
+                raise ValueError(
+                    f'{ErrorMessage.GET_ENGINE.value} {db_name}'
+                ) from None
+            with self._locks[db_name]:
+                if db_name not in self._databases:
+                    engine_stash = self._engine.get(db_name)
+                    self._databases[db_name] = setup_metadata(
+                        engine_stash,
+                        self.topology.table_names(db_name),
+                        not self._engine.writable(db_name)
+                    )
+            return self._databases[db_name]
+
+    def opened(self) -> tuple:
+        """Returns the names of the databases with metadata."""
+        return tuple(db for db in self.topology.databases
+                     if db in self._databases)
 
     def __iter__(self):
         """Iterates over all database metadata objects."""
-        yield from (getattr(self, slot) for slot in self.__slots__)
+        yield from (self.get(db) for db in self.topology.databases)
 
     def __repr__(self):
         """Returns a detailed string representation of the metadata objects."""
@@ -1,10 +1,12 @@
 """LiteStash Session Manager
 
 Creates and provides access to session factories for each database in
-LiteStash.
+LiteStash. Session factories are created on first use.
 """
+from threading import Lock
+from typing import Optional
 from litestash.core.engine import Engine
-from litestash.core.config.root import Tables
+from litestash.core.schema import Metadata
 from litestash.core.config.root import ErrorMessage
 from litestash.core.util.core_util import setup_sessions
 
@@ -14,7 +16,8 @@ class Session:
 
     This class manages the creation and access of SQLAlchemy sessions for each
     SQLite database file used in the LiteStash key-value store. Each database
-    file is associated with a specific session.
+    file is associated with a specific session, created the first time it
+    is requested.
 
     Attributes:
 
@@ -22,25 +25,32 @@ class Session:
 
     Methods:
 
-        __init__(): Initializes the Engine object, creating engine instances
-        for each database file.
+        __init__(): Initializes the Session object with the engines to use.
 
-        get(name): Retrieves a specific SQLAlchemy engine session by its name.
+        get(name): Retrieves a specific SQLAlchemy engine session by its name,
+        creating it on first use.
+
+        opened(): Returns the names of the databases with a session factory.
 
         __iter__(): Returns an iterator that yields all the sesssion
         attributes.
     """
-    __slots__ = Tables.slots()
+    __slots__ = ('topology', '_databases', '_engine', '_metadata', '_locks')
 
-    def __init__(self, engine: Engine):
-        """Initializes session factories for each database.
+    def __init__(self, engine: Engine, metadata: Optional[Metadata] = None):
+        """Keep the engines of the session factories created on first use.
 
         Args:
             engine (EngineStash): An instance of the `EngineStash` class
             containing the database engines.
+            metadata (Metadata): Set up the tables of a database before its
+            first session factory. Without it the tables must already exist.
         """
-        for table in self.__slots__:
-            setattr(self, table, setup_sessions(engine.get(table)))
+        self.topology = engine.topology
+        self._databases = {}
+        self._engine = engine
+        self._metadata = metadata
+        self._locks = {db: Lock() for db in self.topology.databases}
 
 
     def get(self, db_name):
@@ -54,13 +64,30 @@ class Session:
             database.
 
         Raises:
-            AttributeError: If no session factory exists for the given
+            ValueError: If no session factory exists for the given
             database name.
         """
-        if db_name not in self.__slots__:
-            raise ValueError(f'{ErrorMessage.GET_ENGINE.value} {db_name}')
-        attribute = getattr(self, db_name)
-        return attribute
+        try:
+            return self._databases[db_name]
+        except KeyError:
+            if db_name not in self._locks:
+                raise ValueError(
+                    f'{ErrorMessage.GET_ENGINE.value} {db_name}'
+                ) from None
+            with self._locks[db_name]:
+                if db_name not in self._databases:
+                    if self._metadata is not None:
+                        self._metadata.get(db_name)
+                    self._databases[db_name] = setup_sessions(
+                        self._engine.get(db_name)
+                    )
+            return self._databases[db_name]
+
+
+    def opened(self) -> tuple:
+        """Returns the names of the databases with a session factory."""
+        return tuple(db for db in self.topology.databases
+                     if db in self._databases)
 
 
     def __iter__(self):
@@ -68,7 +95,7 @@ class Session:
         Yields all session attributes (database name, session factory tuples).
         """
 
-        yield from (getattr(self, slot) for slot in self.__slots__)
+        yield from (self.get(db) for db in self.topology.databases)
 
 
     def __repr__(self):
@@ -0,0 +1,263 @@
+"""LiteStash Sweeper
+
+Provides a background thread that incrementally deletes expired rows, one
+bounded statement at a time, walking the tables of every database in turn.
+"""
+from collections import namedtuple
+from threading import Event
+from threading import Lock
+from threading import Thread
+from time import perf_counter
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+from pydantic import StrictFloat
+from pydantic import StrictInt
+
+from litestash.core.config.litestash_conf import SweeperConf
+from litestash.core.config.litestash_conf import SweepStatsAttr
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
+from litestash.logging import root_logger as logger
+
+
+SweepStats = namedtuple(
+    SweepStatsAttr.TYPE_NAME.value,
+    [
+        SweepStatsAttr.SWEEPS.value,
+        SweepStatsAttr.RECLAIMED.value,
+        SweepStatsAttr.LAST_RECLAIMED.value,
+        SweepStatsAttr.LAST_DURATION.value,
+        SweepStatsAttr.TOTAL_DURATION.value,
+        SweepStatsAttr.INTERVAL.value
+    ]
+)
+SweepStats.__doc__ = SweepStatsAttr.DOC.value
+
+
+class Sweeper:
+    """LiteStash Sweeper
+
+    Every `interval` seconds a sweep resumes at the table where the last one
+    stopped. Each statement deletes at most `limit` expired rows in its own
+    transaction, so no database write lock is held for long. A full batch
+    means the table may hold more expired rows and it is swept again, until
+    the `budget` seconds of the sweep are spent.
+
+    The interval adapts to what the sweeps find: it drops to the minimum
+    while sweeps run out of budget with expired rows left, doubles while
+    sweeps find nothing, and returns to the configured interval otherwise.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        sweep(): Runs one budgeted sweep and returns the rows deleted.
+
+        stats(): Returns the SweepStats counters.
+
+        use_topology(topology, switch): Sweeps the tables of another
+        topology.
+
+        after_fork(): Restarts the background thread in a child process.
+
+        close(): Stops the background thread.
+    """
+    __slots__ = (
+        'delete',
+        'tables',
+        'position',
+        'limit',
+        'base_interval',
+        'interval',
+        'budget',
+        'sweeps',
+        'reclaimed',
+        'last_reclaimed',
+        'last_duration',
+        'total_duration',
+        'lock',
+        'stopped',
+        'thread'
+    )
+
+    def __init__(self,
+                 delete: Callable[[str, str, int, int], int],
+                 limit: Optional[StrictInt] = None,
+                 interval: Optional[Union[StrictFloat, StrictInt]] = None,
+                 budget: Optional[Union[StrictFloat, StrictInt]] = None,
+                 start: bool = True,
+                 topology: Optional[Topology] = None):
+        """Initializes the sweeper and starts its thread.
+
+        Args:
+            delete (Callable): Called as delete(db_name, table_name,
+                deadline, limit) to delete up to limit rows of a table that
+                expired before the deadline. Returns the rows deleted.
+            limit (int): Most rows deleted by one statement.
+            interval (float): Seconds between sweeps.
+            budget (float): Seconds one sweep may spend.
+            start (bool): Start the background thread.
+            topology (Topology): The tables to sweep; defaults to the prefix
+                topology.
+
+        Raises:
+            ValueError: If the limit, interval or budget is not positive.
+        """
+        if limit is None:
+            limit = SweeperConf.limit()
+        if interval is None:
+            interval = SweeperConf.interval()
+        if budget is None:
+            budget = SweeperConf.budget()
+        if isinstance(limit, bool) or not isinstance(limit, int) or any(
+            isinstance(value, bool) or not isinstance(value, (int, float))
+            or value <= 0
+            for value in (limit, interval, budget)
+        ):
+            logger.error('%s: %s %s %s',
+                         SweeperConf.value_error(), limit, interval, budget)
+            raise ValueError(SweeperConf.value_error())
+
+        self.delete = delete
+        self.tables = (
+            PREFIX_TOPOLOGY if topology is None else topology
+        ).scan_order()
+        self.position = 0
+        self.limit = limit
+        self.base_interval = interval
+        self.interval = interval
+        self.budget = budget
+        self.sweeps = 0
+        self.reclaimed = 0
+        self.last_reclaimed = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread = None
+        if start:
+            self.start_thread()
+
+
+    def start_thread(self) -> None:
+        """Starts the background thread."""
+        self.thread = Thread(
+            target=self.run,
+            name=SweeperConf.thread_name(),
+            daemon=True
+        )
+        self.thread.start()
+
+
+    def sweep(self) -> StrictInt:
+        """Runs one budgeted sweep.
+
+        Returns:
+            int: The number of expired rows deleted.
+        """
+        with self.lock:
+            began = perf_counter()
+            deadline = get_deadline()
+            reclaimed = 0
+            finished = 0
+            while finished < len(self.tables) and not self.stopped.is_set():
+                db_name, table_name = self.tables[self.position]
+                deleted = self.delete(db_name, table_name, deadline, self.limit)
+                reclaimed += deleted
+                if deleted < self.limit:
+                    self.position = (self.position + 1) % len(self.tables)
+                    finished += 1
+                if perf_counter() - began >= self.budget:
+                    break
+            duration = perf_counter() - began
+
+            if finished < len(self.tables) and reclaimed:
+                self.interval = SweeperConf.min_interval()
+            elif not reclaimed:
+                self.interval = min(SweeperConf.max_interval(),
+                                    max(self.interval, self.base_interval) * 2)
+            else:
+                self.interval = self.base_interval
+
+            self.sweeps += 1
+            self.reclaimed += reclaimed
+            self.last_reclaimed = reclaimed
+            self.last_duration = duration
+            self.total_duration += duration
+        if reclaimed:
+            logger.debug('swept %s expired rows in %.6fs', reclaimed, duration)
+        return reclaimed
+
+
+    def use_topology(self,
+                     topology: Topology,
+                     switch: Optional[Callable[[], None]] = None) -> None:
+        """Sweeps the tables of another topology from the first one on.
+
+        Waits for any sweep in progress; switch, which points delete at the
+        tables of the topology, runs before the next sweep starts.
+        """
+        with self.lock:
+            self.tables = topology.scan_order()
+            self.position = 0
+            if switch is not None:
+                switch()
+
+
+    def stats(self) -> SweepStats:
+        """Returns a snapshot of the sweeper counters."""
+        return SweepStats(
+            self.sweeps,
+            self.reclaimed,
+            self.last_reclaimed,
+            self.last_duration,
+            self.total_duration,
+            self.interval
+        )
+
+
+    def run(self) -> None:
+        """Background loop that sweeps every interval until closed."""
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sweep()
+            # Expired rows stay unreadable either way, so a failed pass is
+            # logged and the next interval sweeps again.
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logger.error('expiry sweep failed: %s', error)
+
+
+    def after_fork(self) -> None:
+        """Replaces the locks and the thread a child process inherited."""
+        self.lock = Lock()
+        stopped = Event()
+        if self.stopped.is_set():
+            stopped.set()
+        self.stopped = stopped
+        if self.thread is not None and not stopped.is_set():
+            self.start_thread()
+
+
+    def close(self) -> None:
+        """Stops the background thread."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+    def __repr__(self):
+        """Return the limits and counters of the sweeper."""
+        return (
+            f'Sweeper(limit={self.limit}, budget={self.budget}, '
+            f'{self.stats()})'
+        )
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash Sweeper"""
+        return f'Sweeper(reclaimed={self.reclaimed})'
@@ -0,0 +1,434 @@
+"""LiteStash Topology
+
+Describes the databases of a LiteStash, the tables of each database, and the
+route of a key hash to its database and table.
+"""
+from bisect import bisect
+from pathlib import Path
+from binascii import a2b_base64
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from pydantic import StrictInt
+from pydantic import StrictStr
+from litestash.core.config.litestash_conf import PlacementConf
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.root import ErrorMessage
+from litestash.core.config.root import Tables
+from litestash.core.util.schema_util import Route
+from litestash.core.util.schema_util import get_route
+from litestash.core.util.schema_util import mk_table_names
+from litestash.core.util.topology_util import check_directories
+from litestash.core.util.topology_util import check_policy
+from litestash.core.util.topology_util import check_shards
+from litestash.core.util.topology_util import check_tables
+from litestash.core.util.topology_util import check_vnodes
+from litestash.core.util.topology_util import has_prefix_layout
+from litestash.core.util.topology_util import manifest_path
+from litestash.core.util.topology_util import mk_ring
+from litestash.core.util.topology_util import mk_shard_names
+from litestash.core.util.topology_util import mk_shard_tables
+from litestash.core.util.topology_util import place_databases
+from litestash.core.util.topology_util import read_manifest
+from litestash.core.util.topology_util import write_manifest
+from litestash.logging import root_logger as logger
+
+RING_BYTES = TopologyConf.ring_bytes()
+"""Digest bytes that place a key on the ring, and again to pick its table."""
+
+DIGEST_CHARS = 4 * -(-2 * RING_BYTES // 3)
+"""Leading key hash characters that decode to the routing digest bytes."""
+
+RING_BITS = 8 * RING_BYTES
+RING_MASK = (1 << RING_BITS) - 1
+DIGEST_SHIFT = 6 * DIGEST_CHARS - 2 * RING_BITS
+"""Bits decoded past the routing digest bytes."""
+
+URLSAFE = bytes.maketrans(b'-_', b'+/')
+"""Maps the URL-safe base64 alphabet of a key hash to the standard one."""
+
+
+class Topology:
+    """LiteStash Topology
+
+    The prefix topology is the original layout of 16 databases with 4 tables
+    each, where the first character of a key hash picks the table. A ring
+    topology has any number of databases and tables: the leading digest
+    bytes of a key hash place it on a consistent-hash ring of virtual nodes,
+    which picks its database, and the next bytes pick the table. Growing a
+    ring only moves the keys of the arcs taken by the new databases.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+        router (str): 'prefix' or 'blake2b-ring'.
+
+        databases (tuple): The database names in scan order.
+
+        path (Path): The manifest that records the topology, if any.
+
+        previous (Topology): The topology a running reshard moves keys from.
+
+        directories (tuple): The directories the databases are placed in, or
+        None for the data directory.
+
+        policy (str): 'round-robin' or 'free-space'.
+
+        placement (dict): The directory of each database.
+
+    Methods:
+
+        route(key_hash): Returns the Route of a key hash.
+
+        table_names(db_name): Returns the table names of a database.
+
+        place(directories, policy, placed): Assigns each database a
+        directory.
+
+        directory(db_name, default): Returns the directory of a database.
+
+        scan_order(): Returns the (db_name, table_name) of every table.
+
+        manifest(): Returns the manifest that records the topology.
+
+        save(): Writes the manifest of the topology to its path.
+
+        copy(): Returns a topology of the same layout.
+
+        same_layout(other): Return True if both route keys the same way.
+
+        from_manifest(manifest): Builds the topology of a manifest.
+
+        load(data, shards, tables_per_shard, directories, policy): Opens the
+        topology of a data directory, writing its manifest the first time.
+    """
+    __slots__ = ('router',
+                 'shards',
+                 'tables_per_shard',
+                 'vnodes',
+                 'databases',
+                 'path',
+                 'previous',
+                 'directories',
+                 'policy',
+                 'placement',
+                 '_tables',
+                 '_routes',
+                 '_points',
+                 '_owners')
+
+
+    def __init__(self,
+                 shards: Optional[StrictInt] = None,
+                 tables_per_shard: Optional[StrictInt] = None,
+                 vnodes: Optional[StrictInt] = None):
+        """Initializes the prefix topology, or a ring topology when shards
+        or tables_per_shard is given.
+
+        Args:
+            shards: The number of databases of a ring topology.
+            tables_per_shard: The number of tables of each database.
+            vnodes: The ring points of each database.
+
+        Raises:
+            ValueError: If a count is out of range.
+        """
+        self.path = None
+        self.previous = None
+        self.directories = None
+        self.policy = None
+        self.placement = None
+        if shards is None and tables_per_shard is None:
+            self.router = TopologyConf.prefix()
+            self.databases = Tables.slots()
+            self._tables = {
+                db_name: tuple(mk_table_names(db_name))
+                for db_name in self.databases
+            }
+            self.shards = len(self.databases)
+            self.tables_per_shard = len(self._tables[self.databases[0]])
+            self.vnodes = None
+            self._routes = ()
+            self._points = ()
+            self._owners = ()
+            return
+
+        self.router = TopologyConf.ring()
+        self.shards = check_shards(
+            TopologyConf.shards() if shards is None else shards
+        )
+        self.tables_per_shard = check_tables(
+            TopologyConf.tables_per_shard()
+            if tables_per_shard is None else tables_per_shard
+        )
+        self.vnodes = check_vnodes(
+            TopologyConf.vnodes() if vnodes is None else vnodes
+        )
+        self.databases = mk_shard_names(self.shards)
+        self._tables = {
+            db_name: mk_shard_tables(db_name, self.tables_per_shard)
+            for db_name in self.databases
+        }
+        self._routes = tuple(
+            tuple(Route(db_name, table_name, None)
+                  for table_name in self._tables[db_name])
+            for db_name in self.databases
+        )
+        self._points, self._owners = mk_ring(self.databases, self.vnodes)
+
+
+    def is_prefix(self) -> bool:
+        """Return True for the prefix routed layout."""
+        return not self._points
+
+
+    def route(self, key_hash: StrictStr) -> Route:
+        """Returns the database and table of a key hash."""
+        if not self._points:
+            return get_route(key_hash[0])
+        digest = int.from_bytes(
+            a2b_base64(key_hash[:DIGEST_CHARS].encode().translate(URLSAFE))
+        ) >> DIGEST_SHIFT
+        point = digest >> RING_BITS
+        owner = self._owners[bisect(self._points, point) % len(self._points)]
+        routes = self._routes[owner]
+        return routes[(digest & RING_MASK) % len(routes)]
+
+
+    def db_name(self, key_hash: StrictStr) -> str:
+        """Returns the database name of a key hash."""
+        return self.route(key_hash).db_name
+
+
+    def table_names(self, db_name: StrictStr) -> Tuple[str, ...]:
+        """Returns the table names of a database.
+
+        Raises:
+            ValueError: If the database is not part of the topology.
+        """
+        try:
+            return self._tables[db_name]
+        except KeyError as error:
+            raise ValueError(
+                f'{ErrorMessage.GET_ENGINE.value} {db_name}'
+            ) from error
+
+
+    def place(self,
+              directories: List[StrictStr],
+              policy: Optional[StrictStr] = None,
+              placed: Optional[Dict[str, str]] = None) -> None:
+        """Assigns each database one of the directories.
+
+        Args:
+            directories: The directories to spread the databases over.
+            policy: 'round-robin' (the default) or 'free-space'.
+            placed: Databases that keep the directory they already have.
+
+        Raises:
+            ValueError: If the directories or the policy are invalid.
+        """
+        self.directories = check_directories(directories)
+        self.policy = check_policy(policy)
+        self.placement = place_databases(self.databases,
+                                         self.directories,
+                                         self.policy,
+                                         placed)
+
+
+    def directory(self,
+                  db_name: StrictStr,
+                  default: Optional[StrictStr] = None) -> Optional[str]:
+        """Returns the directory of a database, or default if unplaced."""
+        if self.placement is None:
+            return default
+        return self.placement.get(db_name, default)
+
+
+    def placed_in(self,
+                  directories: Optional[List[StrictStr]] = None,
+                  policy: Optional[StrictStr] = None) -> bool:
+        """Return True if the requested placement fits this topology.
+
+        No directories fit any topology; otherwise the same directories, in
+        any order, must be requested.
+        """
+        if directories is None:
+            return policy is None or policy == self.policy
+        return (set(self.directories) == set(check_directories(directories))
+                and policy in (None, self.policy))
+
+
+    def scan_order(self) -> List[tuple]:
+        """Returns the (db_name, table_name) of every table in scan order."""
+        return [
+            (db_name, table_name)
+            for db_name in self.databases
+            for table_name in self._tables[db_name]
+        ]
+
+
+    def manifest(self) -> Dict:
+        """Returns the manifest that records this topology."""
+        manifest = {
+            TopologyConf.KEY_VERSION.value: TopologyConf.version(),
+            TopologyConf.KEY_ROUTER.value: self.router,
+            TopologyConf.KEY_SHARDS.value: self.shards,
+            TopologyConf.KEY_TABLES.value: self.tables_per_shard,
+            TopologyConf.KEY_VNODES.value: self.vnodes
+        }
+        if self.placement is not None:
+            manifest[PlacementConf.KEY_PLACEMENT.value] = {
+                PlacementConf.KEY_POLICY.value: self.policy,
+                PlacementConf.KEY_DIRECTORIES.value: list(self.directories),
+                PlacementConf.KEY_DATABASES.value: dict(self.placement)
+            }
+        if self.previous is not None:
+            manifest[TopologyConf.KEY_PREVIOUS.value] = (
+                self.previous.manifest()
+            )
+        return manifest
+
+
+    def save(self) -> None:
+        """Writes the manifest to the path of the topology, if it has one."""
+        if self.path is not None:
+            write_manifest(self.path, self.manifest())
+
+
+    def copy(self) -> 'Topology':
+        """Returns a topology of the same layout, without a path or a
+        previous topology."""
+        if self.is_prefix():
+            return Topology()
+        return Topology(self.shards, self.tables_per_shard, self.vnodes)
+
+
+    def same_layout(self, other: 'Topology') -> bool:
+        """Return True if both topologies route every key the same way."""
+        return (self.router == other.router
+                and self.shards == other.shards
+                and self.tables_per_shard == other.tables_per_shard
+                and self.vnodes == other.vnodes)
+
+
+    def matches(self,
+                shards: Optional[StrictInt] = None,
+                tables_per_shard: Optional[StrictInt] = None) -> bool:
+        """Return True if the requested counts fit this topology.
+
+        No counts fit any topology. Any count asks for a ring topology.
+        """
+        if shards is None and tables_per_shard is None:
+            return True
+        return (self.router == TopologyConf.ring()
+                and shards in (None, self.shards)
+                and tables_per_shard in (None, self.tables_per_shard))
+
+
+    @classmethod
+    def from_manifest(cls, manifest: Dict) -> 'Topology':
+        """Builds the topology recorded in a manifest.
+
+        The previous topology of an unfinished reshard is rebuilt as well.
+
+        Raises:
+            ValueError: If the manifest is not a valid topology.
+        """
+        try:
+            version = manifest[TopologyConf.KEY_VERSION.value]
+            router = manifest[TopologyConf.KEY_ROUTER.value]
+            if version != TopologyConf.version():
+                raise ValueError(version)
+            if router == TopologyConf.prefix():
+                topology = cls()
+            elif router == TopologyConf.ring():
+                topology = cls(manifest[TopologyConf.KEY_SHARDS.value],
+                               manifest[TopologyConf.KEY_TABLES.value],
+                               manifest[TopologyConf.KEY_VNODES.value])
+            else:
+                raise ValueError(router)
+            placement = manifest.get(PlacementConf.KEY_PLACEMENT.value)
+            if placement is not None:
+                topology.place(
+                    placement[PlacementConf.KEY_DIRECTORIES.value],
+                    placement[PlacementConf.KEY_POLICY.value],
+                    placement[PlacementConf.KEY_DATABASES.value]
+                )
+                if topology.placement != placement[
+                    PlacementConf.KEY_DATABASES.value
+                ]:
+                    raise ValueError(PlacementConf.KEY_PLACEMENT.value)
+            previous = manifest.get(TopologyConf.KEY_PREVIOUS.value)
+            if previous is not None:
+                topology.previous = cls.from_manifest(previous)
+            return topology
+        except (KeyError, TypeError, ValueError) as error:
+            logger.error('%s: %s', TopologyConf.manifest_error(), error)
+            raise ValueError(TopologyConf.manifest_error()) from error
+
+
+    @classmethod
+    def load(cls,
+             data: StrictStr,
+             shards: Optional[StrictInt] = None,
+             tables_per_shard: Optional[StrictInt] = None,
+             directories: Optional[List[StrictStr]] = None,
+             policy: Optional[StrictStr] = None,
+             readonly: bool = False) -> 'Topology':
+        """Opens the topology of a data directory.
+
+        The manifest of the directory is the topology. Without one the
+        requested topology is created, with its databases placed in the
+        directories if any, and recorded, unless shards are requested for a
+        directory that already holds prefix routed databases. A readonly
+        open never writes the manifest.
+
+        Args:
+            data: The directory of the manifest, and of the databases
+                without directories.
+            shards: The number of databases of a ring topology.
+            tables_per_shard: The number of tables of each database.
+            directories: The directories to spread the databases over.
+            policy: 'round-robin' (the default) or 'free-space'.
+            readonly: Use the requested topology without recording it.
+
+        Raises:
+            ValueError: If the request differs from the manifest, or would
+            hide existing prefix routed databases.
+        """
+        path = manifest_path(data)
+        manifest = read_manifest(path)
+        if manifest is not None:
+            topology = cls.from_manifest(manifest)
+            if not topology.matches(shards, tables_per_shard):
+                logger.error('%s: %s', TopologyConf.mismatch_error(), path)
+                raise ValueError(TopologyConf.mismatch_error())
+            if not topology.placed_in(directories, policy):
+                logger.error('%s: %s', PlacementConf.mismatch_error(), path)
+                raise ValueError(PlacementConf.mismatch_error())
+            topology.path = path
+            return topology
+
+        topology = cls(shards, tables_per_shard)
+        if not topology.is_prefix() and has_prefix_layout(Path(data)):
+            logger.error('%s: %s', TopologyConf.layout_error(), data)
+            raise ValueError(TopologyConf.layout_error())
+        if directories is not None or policy is not None:
+            topology.place(directories or [data], policy)
+        topology.path = path
+        if not readonly:
+            topology.save()
+        return topology
+
+
+    def __repr__(self):
+        """Return the layout of the topology."""
+        return (f'Topology(router={self.router}, shards={self.shards}, '
+                f'tables_per_shard={self.tables_per_shard})')
+
+
+PREFIX_TOPOLOGY = Topology()
+"""The prefix topology, shared by every caller that routes without one."""
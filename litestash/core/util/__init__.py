@@ -9,6 +9,9 @@ This subpackage contains modules for:
 - `schema_util`: Utilities related to database schema creation and management.
 - `table_util`: Functions for creating and handling tables.
 - `model_util`: Utilities for working with data models and validation.
+- `fast_path_util`: Single key operations on raw sqlite3 connections.
+- `topology_util`: Shard names, the hash ring and the topology manifest.
+- `reshard_util`: Moves the rows of a LiteStash to a new topology.
 """
 from litestash.core.config.root import Util
 from litestash.core.util import litestash_util
@@ -16,11 +19,17 @@ from litestash.core.util import prefix_util
 from litestash.core.util import schema_util
 from litestash.core.util import table_util
 from litestash.core.util import model_util
+from litestash.core.util import fast_path_util
+from litestash.core.util import topology_util
+from litestash.core.util import reshard_util
 
 __all__ = [
     Util.LITESTASH.value,
     Util.PREFIX.value,
     Util.SCHEMA.value,
     Util.TABLE.value,
-    Util.MODEL.value
+    Util.MODEL.value,
+    Util.FAST_PATH.value,
+    Util.TOPOLOGY.value,
+    Util.RESHARD.value
 ]
@@ -10,6 +10,7 @@ from collections import namedtuple
 from sqlalchemy.orm import Session
 
 from typing import List
+from typing import Optional
 from typing import Union
 from typing import Set
 
@@ -18,8 +19,11 @@ from pydantic import StrictStr
 from litestash.core.config.connection_conf import GetConnectionAttr
 from litestash.core.config.connection_conf import SetConnectionAttr
 from litestash.core.config.connection_conf import TimeAttr
-from litestash.core.config.root import Tables
+from litestash.core.config.litestash_conf import BatchAttr
+from litestash.core.config.litestash_conf import KeyHashAttr
 from litestash.core.session import Session as Manager
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
 from litestash.models import LiteStashData
 from litestash.models import LiteStashStore
 
@@ -35,6 +39,30 @@ GetTime = namedtuple(
 GetTime.__doc__ = TimeAttr.DOC.value
 
 
+# Hashed key for batched lookups
+KeyHash = namedtuple(
+    KeyHashAttr.TYPE_NAME.value,
+    [
+        KeyHashAttr.KEY_HASH.value,
+        KeyHashAttr.KEY.value
+    ]
+)
+KeyHash.__doc__ = KeyHashAttr.DOC.value
+
+
+# Outcome of one bulk upsert batch
+BatchResult = namedtuple(
+    BatchAttr.TYPE_NAME.value,
+    [
+        BatchAttr.DB_NAME.value,
+        BatchAttr.TABLE_NAME.value,
+        BatchAttr.COUNT.value,
+        BatchAttr.ERROR.value
+    ]
+)
+BatchResult.__doc__ = BatchAttr.DOC.value
+
+
 class Connection(ABC):
     """Connection
 
@@ -74,7 +102,7 @@ class DatabaseConnections:
     The Base class to manage connections for each database of a LiteStash.
 
     Attributes:
-        __slots__ (tuple): Tuple of database names.
+        databases (tuple): The database names of the topology.
 
     Methods:
         __contains__(self, db_name: StrictStr) -> bool:
@@ -96,6 +124,8 @@ class DatabaseConnections:
             Return True if the item is LiteStashData.
         is_store(self, item) -> bool:
             Return True if the item is LiteStashStore.
+        is_key_hash(self, item) -> bool:
+            Return True if the item is a KeyHash.
         items(self) -> List[Union[str, List[Union[LiteStashData,
             LiteStashStore]]]]:
             Return a list of all database and connection lists.
@@ -106,55 +136,65 @@ class DatabaseConnections:
         values(self) -> List[Union[List[LiteStashData], List[LiteStashStore]]]:
             Return a list of all the connections for each database.
     """
-    __slots__ = Tables.slots()
 
-    def __init__(self):
-        """Constructor to initialize database references."""
-        for database in self.__slots__:
-            setattr(self, database, None)
+    def __init__(self, topology: Optional[Topology] = None):
+        """Constructor to initialize database references.
+
+        Args:
+            topology (Topology): The databases to hold; defaults to the
+            prefix topology.
+        """
+        topology = PREFIX_TOPOLOGY if topology is None else topology
+        self.databases = topology.databases
+        self._connections = dict.fromkeys(self.databases)
 
 
     def __contains__(self, db_name: StrictStr) -> bool:
         """Return boolean if database name is found."""
-        return bool(db_name in self.__slots__)
+        return bool(db_name in self._connections)
 
 
     def __getitem__(self, db_name: StrictStr) -> List[Union[
             LiteStashData, LiteStashStore]]:
         """Return the self[database] connection list."""
-        return getattr(self, db_name)
+        return self._connections[db_name]
 
 
     def __setitem__(self, db_name: StrictStr,
                     value: Union[LiteStashData,
                                  LiteStashStore,
+                                 KeyHash,
                                  List[LiteStashData],
-                                 List[LiteStashStore]]
+                                 List[LiteStashStore],
+                                 List[KeyHash]]
                     ) -> None:
         """Update the self[database] connection list."""
-        if getattr(self, db_name) is None:
-            setattr(self, db_name, [])
+        if self._connections[db_name] is None:
+            self._connections[db_name] = []
 
-        conn = getattr(self, db_name)
+        conn = self._connections[db_name]
         if isinstance(value, LiteStashData):
             conn.append(value)
         elif isinstance(value, LiteStashStore):
             conn.append(value)
+        elif isinstance(value, KeyHash):
+            conn.append(value)
         elif all(isinstance(item, LiteStashData) for item in value):
             conn.extend(value)
         elif all(isinstance(item, LiteStashStore) for item in value):
             conn.extend(value)
+        elif all(isinstance(item, KeyHash) for item in value):
+            conn.extend(value)
 
 
     def clear(self) -> None:
         """Remove all connections from all databases."""
-        for database in self.__slots__:
-            setattr(self, database, None)
+        self._connections = dict.fromkeys(self.databases)
 
     def get(self, db_name: StrictStr) -> List[Union[
             LiteStashData, LiteStashStore]]:
         """Return the coonnection list for the given database."""
-        return getattr(self, db_name)
+        return self._connections[db_name]
 
 
     def is_data(self, item) -> bool:
@@ -167,15 +207,20 @@ class DatabaseConnections:
         return True if isinstance(item, LiteStashStore) else False
 
 
+    def is_key_hash(self, item) -> bool:
+        """Return True if the item is a KeyHash"""
+        return True if isinstance(item, KeyHash) else False
+
+
     def items(self) -> List[Union[str, List[Union[LiteStashData,
                                                   LiteStashStore]]]]:
         """Return a list of all database and connection lists."""
-        return [[slot, getattr(self, slot)] for slot in self.__slots__]
+        return [[db_name, conn] for db_name, conn in self._connections.items()]
 
 
     def keys(self) -> Set[str]:
         """Return a set of all the databases available."""
-        return set(slot for slot in self.__slots__)
+        return set(self._connections)
 
 
     def session(self, database: StrictStr, manager: Manager) -> Session:
@@ -186,13 +231,14 @@ class DatabaseConnections:
     def values(self) -> List[Union[List[LiteStashData],
                                    List[LiteStashStore]]]:
         """Return a list of all the connections for each database."""
-        return [getattr(self, slot) for slot in self.__slots__]
+        return list(self._connections.values())
 
 
 class GetDataConnections(DatabaseConnections):
     """Get Database Connections
 
     The database connections for getting database values.
+    Each database holds the KeyHash lookups routed to it.
     """
     pass
 
@@ -206,5 +252,50 @@ class SetDataConnections(DatabaseConnections):
 
 
 class DataResults(DatabaseConnections):
-    """Container for mget results."""
-    pass
+    """Data Results
+
+    Container for mget and mset results of each database.
+
+    Attributes:
+        errors (Dict[str, List[str]]): The error messages of each database.
+        batches (List[BatchResult]): The outcome of each mset batch.
+        expires_at (Dict[str, int]): The expires_at of each mget key with one.
+
+    Methods:
+        add_errors(self, db_name: StrictStr, errors: List[str]) -> None:
+            Record the error messages for a database.
+        add_batches(self, batches: List[BatchResult]) -> None:
+            Record the outcome of mset batches.
+        failed_batches(self) -> List[BatchResult]:
+            Return the batches that were not stored.
+        has_errors(self) -> bool:
+            Return True if any database reported an error.
+    """
+
+    def __init__(self, topology: Optional[Topology] = None):
+        """Constructor to initialize database results and errors."""
+        super().__init__(topology)
+        self.errors = {}
+        self.batches = []
+        self.expires_at = {}
+
+
+    def add_errors(self, db_name: StrictStr, errors: List[str]) -> None:
+        """Record the error messages for a database."""
+        if errors:
+            self.errors.setdefault(db_name, []).extend(errors)
+
+
+    def add_batches(self, batches: List[BatchResult]) -> None:
+        """Record the outcome of mset batches."""
+        self.batches.extend(batches)
+
+
+    def failed_batches(self) -> List[BatchResult]:
+        """Return the batches that were not stored."""
+        return [batch for batch in self.batches if batch.error is not None]
+
+
+    def has_errors(self) -> bool:
+        """Return True if any database reported an error."""
+        return bool(self.errors)
@@ -5,36 +5,67 @@ Core setup functions and classes to build a LiteStash database instance.
 Functions:
 
 - `setup_metadata`: Sets up database metadata and tables.
+- `get_schema_version`: Reads the schema version of a database.
+- `upgrade_schema`: Brings a database up to the current schema version.
+- `setup_counters`: Creates the row counter table and triggers of a database.
 - `setup_sessions`: Creates a session factory for a database.
+- `setup_fast_path`: Checks out a long-lived sqlite3 connection for a database.
+- `mk_statements`: Formats the fast path SQL for each table of a database.
 
 Classes:
 
 - `MetaAttributes`: Namedtuple encapsulation of database name and a sqlalchemy
     metadata database object configured for use.
-- `SessionAttributes`: Namedtuple encapsulation of database name and a
-    sqlalchemy session object configured for use.
+- `SessionAttributes`: Namedtuple encapsulation of database name and the
+    sqlalchemy writer and reader session objects configured for use.
+- `FastAttributes`: Namedtuple encapsulation of database name, a raw sqlite3
+    reader, its lock, the prepared SQL of each table, and the writer engine.
+- `FastStatements`: Namedtuple of the fast path SQL for one table.
 """
-from sqlalchemy import inspect
+from threading import Lock
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from sqlalchemy import DDL
+from sqlalchemy import Connection
+from sqlalchemy import event
 from sqlalchemy import MetaData
 from collections import namedtuple
 from sqlalchemy.orm.session import sessionmaker
 from litestash.logging import root_logger as logger
+from litestash.core.config.litestash_conf import FastAttr
+from litestash.core.config.litestash_conf import FastStatementAttr
 from litestash.core.config.litestash_conf import MetaAttr
+from litestash.core.config.litestash_conf import ReadOnlyConf
 from litestash.core.config.litestash_conf import SessionAttr
+from litestash.core.config.schema_conf import ColumnFields
+from litestash.core.config.schema_conf import CountSql
+from litestash.core.config.schema_conf import FastSql
+from litestash.core.config.schema_conf import VersionSql
+from litestash.core.util.schema_util import mk_table_names
 from litestash.core.util.schema_util import mk_tables
 from litestash.core.util.engine_util import EngineAttributes
 
 
-def setup_metadata(engine_stash: EngineAttributes):
+def setup_metadata(engine_stash: EngineAttributes,
+                   table_names: Optional[Iterable[str]] = None,
+                   readonly: bool = False):
     """Sets up and returns SQLAlchemy metadata for the given database engine.
 
     Args:
         engine_stash: A namedtuple containing the database name
         (`db_name`) and SQLAlchemy `Engine` object.
+        table_names: The tables of the database; defaults to the prefix
+        tables of its name.
+        readonly: Describe the tables without creating or upgrading them.
 
     Returns:
         MetaAttributes: A namedtuple containing the database name and the
         initialized `MetaData` object.
+
+    Raises:
+        ValueError: If a readonly database is not at the current schema
+        version.
     """
     if engine_stash is None:
         logger.error('Database engine attributes are missing')
@@ -46,17 +77,97 @@ def setup_metadata(engine_stash: EngineAttributes):
 
     metadata = MetaData()
     logger.debug('%s init %s', engine_stash.db_name, metadata)
-    metadata = mk_tables(engine_stash.db_name, metadata)
+    metadata = mk_tables(engine_stash.db_name, metadata, table_names)
     logger.debug('added tables to %s', metadata)
-    metadata.create_all(bind=engine_stash.engine, checkfirst=True)
-    logger.debug(
-        'create and bind metadata to %s', engine_stash.engine
-    )
+    for table_name, table in metadata.tables.items():
+        event.listen(table, 'after_drop', DDL(CountSql.reset(table_name)))
+    event.listen(metadata, 'after_drop', DDL(VersionSql.reset()))
+    version = get_schema_version(engine_stash)
+    if readonly and version < VersionSql.version():
+        logger.error('%s: %s',
+                     ReadOnlyConf.schema_error(),
+                     engine_stash.db_name)
+        raise ValueError(
+            f'{ReadOnlyConf.schema_error()}: {engine_stash.db_name}'
+        )
+    if version < VersionSql.version():
+        metadata.create_all(bind=engine_stash.engine, checkfirst=True)
+        logger.debug(
+            'create and bind metadata to %s', engine_stash.engine
+        )
+        upgrade_schema(engine_stash, metadata)
     logger.debug('tables: %s', metadata.sorted_tables)
     quality_metadata = MetaAttributes(engine_stash.db_name, metadata)
     return quality_metadata
 
 
+def get_schema_version(engine_stash: EngineAttributes) -> int:
+    """Reads the schema version from PRAGMA user_version of a database.
+
+    Args:
+        engine_stash: A namedtuple containing the database name
+        (`db_name`) and SQLAlchemy `Engine` object.
+
+    Returns:
+        int: The schema version, 0 for a new or dropped database.
+    """
+    with engine_stash.reader.connect() as connection:
+        return connection.exec_driver_sql(VersionSql.get()).scalar()
+
+
+def upgrade_schema(engine_stash: EngineAttributes, metadata: MetaData):
+    """Brings the tables of a database up to the current schema version.
+
+    Tables from before the expires_at column gain the column and its index,
+    the row counters are created, and the version is stamped last in the
+    same transaction, so an interrupted upgrade runs again on the next open.
+
+    Args:
+        engine_stash: A namedtuple containing the database name
+        (`db_name`) and SQLAlchemy `Engine` object.
+        metadata: The MetaData holding the tables of the database.
+    """
+    with engine_stash.engine.begin() as connection:
+        for table_name in metadata.tables:
+            columns = connection.exec_driver_sql(
+                VersionSql.columns(table_name)
+            ).fetchall()
+            if ColumnFields.EXPIRES_AT.value not in (
+                column[1] for column in columns
+            ):
+                logger.info('add expires_at to %s', table_name)
+                connection.exec_driver_sql(
+                    VersionSql.add_expires_at(table_name)
+                )
+                connection.exec_driver_sql(
+                    VersionSql.index_expires_at(table_name)
+                )
+        setup_counters(connection, metadata)
+        connection.exec_driver_sql(VersionSql.set(VersionSql.version()))
+    logger.debug(
+        '%s at schema version %s',
+        engine_stash.db_name,
+        VersionSql.version()
+    )
+
+
+def setup_counters(connection: Connection, metadata: MetaData):
+    """Creates the row counter table and the triggers that maintain it.
+
+    Every statement is idempotent. A table without a counter row, new or
+    from a database created before the counters, is counted once.
+
+    Args:
+        connection: An open connection inside a transaction.
+        metadata: The MetaData holding the tables of the database.
+    """
+    connection.exec_driver_sql(CountSql.create())
+    for table_name in metadata.tables:
+        connection.exec_driver_sql(CountSql.insert_trigger(table_name))
+        connection.exec_driver_sql(CountSql.delete_trigger(table_name))
+        connection.exec_driver_sql(CountSql.init(table_name))
+
+
 MetaAttributes = namedtuple(
     MetaAttr.TYPE_NAME.value,
     [
@@ -70,20 +181,20 @@ MetaAttributes.__doc__ = MetaAttr.DOC.value
 def setup_sessions(engine_stash: EngineAttributes):
     """Creates and returns a session factory for the given database engine.
 
-    This function checks if the database has tables before creating the session
-    factory.
-    If no tables are found, it raises a `ValueError`.
+    This function checks the schema version of the database before creating
+    the session factory.
+    If the tables have not been set up, it raises a `ValueError`.
 
     Args:
         engine_stash: A namedtuple containing the database name
         (`db_name`) and SQLAlchemy `Engine` object.
 
     Returns:
-        SessionAttributes: A namedtuple containing the database name and the
-        session factory.
+        SessionAttributes: A namedtuple containing the database name, the
+        writer session factory and the reader session factory.
 
     Raises:
-        ValueError: If no tables are found in the database.
+        ValueError: If the database is not at the current schema version.
     """
     if engine_stash is None:
         logger.error('Session engine attributes missing')
@@ -93,16 +204,17 @@ def setup_sessions(engine_stash: EngineAttributes):
         logger.error('%s: invalid type', type(engine_stash))
         raise TypeError(f'EngineAttributes not found: {engine_stash}')
 
-    if inspect(engine_stash.engine).get_table_names():
+    if get_schema_version(engine_stash) >= VersionSql.version():
         logger.debug('sessionmaker called for %s', engine_stash.engine)
         session = sessionmaker(engine_stash.engine)
-        logger.debug('sessionmaker created %s', session)
+        reader = sessionmaker(engine_stash.reader)
+        logger.debug('sessionmaker created %s, %s', session, reader)
     else:
         raise ValueError(f'{SessionAttr.VALUE_ERROR.value}')
     logger.debug(
         'Call SessionAttributes with %s, %s', engine_stash.db_name, session
     )
-    quality_session = SessionAttributes(engine_stash.db_name, session)
+    quality_session = SessionAttributes(engine_stash.db_name, session, reader)
     logger.debug('return quality_session %s', quality_session)
     return quality_session
 
@@ -111,7 +223,100 @@ SessionAttributes = namedtuple(
     SessionAttr.TYPE_NAME.value,
     [
         SessionAttr.DB_NAME.value,
-        SessionAttr.SESSION.value
+        SessionAttr.SESSION.value,
+        SessionAttr.READER.value
     ]
 )
 SessionAttributes.__doc__ = SessionAttr.DOC.value
+
+
+def mk_statements(
+    db_name: str,
+    table_names: Optional[Iterable[str]] = None
+) -> Dict[str, 'FastStatements']:
+    """Formats the fast path SQL once for each table of a database.
+
+    Args:
+        db_name: The name of the database (e.g., "tables_03").
+        table_names: The tables of the database; defaults to the prefix
+        tables of db_name.
+
+    Returns:
+        Dict[str, FastStatements]: The statements keyed by table name.
+    """
+    return {
+        table_name: FastStatements(
+            FastSql.get(table_name),
+            FastSql.set(table_name),
+            FastSql.delete(table_name),
+            FastSql.exists(table_name)
+        )
+        for table_name in (
+            mk_table_names(db_name) if table_names is None else table_names
+        )
+    }
+
+
+def setup_fast_path(engine_stash: EngineAttributes,
+                    table_names: Optional[Iterable[str]] = None):
+    """Checks out a long-lived sqlite3 reader for the given engine.
+
+    The connection comes from the reader pool so it carries the same PRAGMA
+    setup as the ORM readers, and it stays checked out until released.
+    Writes go through the single writer connection of the engine.
+
+    Args:
+        engine_stash: A namedtuple containing the database name
+        (`db_name`) and SQLAlchemy `Engine` object.
+        table_names: The tables of the database; defaults to the prefix
+        tables of its name.
+
+    Returns:
+        FastAttributes: A namedtuple containing the database name, the pooled
+        reader, a lock for the reader, the table statements and the writer
+        engine.
+    """
+    if engine_stash is None:
+        logger.error('Fast path engine attributes missing')
+        raise ValueError('EngineAttributes cannot be None')
+
+    if not isinstance(engine_stash, EngineAttributes):
+        logger.error('%s: invalid type', type(engine_stash))
+        raise TypeError(f'EngineAttributes not found: {engine_stash}')
+
+    connection = engine_stash.reader.raw_connection()
+    logger.debug('fast path connection for %s', engine_stash.db_name)
+    statements = mk_statements(engine_stash.db_name, table_names)
+    quality_fast_path = FastAttributes(
+        engine_stash.db_name,
+        connection,
+        Lock(),
+        statements,
+        engine_stash.engine
+    )
+    return quality_fast_path
+
+
+FastAttributes = namedtuple(
+    FastAttr.TYPE_NAME.value,
+    [
+        FastAttr.DB_NAME.value,
+        FastAttr.CONNECTION.value,
+        FastAttr.LOCK.value,
+        FastAttr.STATEMENTS.value,
+        FastAttr.WRITER.value
+    ]
+)
+FastAttributes.__doc__ = FastAttr.DOC.value
+
+
+FastStatements = namedtuple(
+    FastStatementAttr.TYPE_NAME.value,
+    [
+        FastStatementAttr.GET.value,
+        FastStatementAttr.SET.value,
+        FastStatementAttr.DELETE.value,
+        FastStatementAttr.EXISTS.value
+    ]
+)
+FastStatements.__doc__ = FastStatementAttr.DOC.value
@@ -4,55 +4,128 @@ The engine_util module provides functions to assemble the LiteStash engine
 module.
 
 Functions:
+- `mk_pragmas`: Resolves a PRAGMA profile and its overrides.
 - `set_pragma`: Configures SQLite PRAGMAs for the engine.
 - `set_begin`: SqlAlchemy workaround for pysqlite driver
-- `setup_engine`: Creates a SQLAlchemy engine for a given database.*
+- `set_begin_immediate`: Takes the write lock when a writer transaction starts.
+- `mk_memory_creator`: Connects to one named in-memory database.
+- `setup_engine`: Creates the writer and reader engines for a given database.*
+- `database_path`: Returns the path of the database file of a database.
+- `wal_stat`: Returns the size and modification time of a WAL file.
+- `checkpoint_wal`: Runs a WAL checkpoint on the writer connection.
 
 Classes:
-* `EnginAttributes`: Namedtuple encapsulation of database name and a sqlalchemy
-engine configured for use.
+* `EnginAttributes`: Namedtuple encapsulation of database name and the
+sqlalchemy writer and reader engines configured for use.
 """
+import sqlite3
+
 from collections import namedtuple
 
 from pathlib import Path
 
+from secrets import token_hex
+
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
 from sqlalchemy import create_engine
 from sqlalchemy import Engine
 from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.pool import StaticPool
 
 from pydantic import StrictBool
+from pydantic import StrictInt
 from pydantic import StrictStr
 from pydantic import ValidationError
 
 from litestash.logging import root_logger as logger
 from litestash.core.config.schema_conf import Sql
 from litestash.core.config.schema_conf import Pragma
+from litestash.core.config.schema_conf import PragmaProfile
+from litestash.core.config.litestash_conf import CheckpointConf
 from litestash.core.config.litestash_conf import EngineAttr
 from litestash.core.config.litestash_conf import EngineConf
+from litestash.core.config.litestash_conf import ReadOnlyConf
+from litestash.core.config.litestash_conf import WriterConf
 from litestash.core.util.misc_util import spaces_match
 
 
-def set_pragma(db_connection, connect):
+def mk_pragmas(
+    profile: Optional[StrictStr] = None,
+    pragmas: Optional[Dict[StrictStr, Union[StrictInt, StrictStr]]] = None
+) -> tuple:
+    """Resolves the PRAGMA settings of a profile with any overrides.
+
+    Args:
+        profile: One of PragmaProfile.names(); defaults to 'throughput'.
+        pragmas: Settings of the profile to replace, e.g.
+            {'synchronous': 'FULL', 'cache_size': -2048}.
+
+    Returns:
+        tuple: The (name, value) pairs to apply in order.
+
+    Raises:
+        ValueError: If the profile is unknown, an override names a PRAGMA
+        outside the profile, or a value is not an integer or a keyword.
+    """
+    if profile is None:
+        profile = PragmaProfile.default()
+    if not isinstance(profile, str) or profile not in PragmaProfile.names():
+        logger.error('%s: %s', EngineConf.profile_error(), profile)
+        raise ValueError(f'{EngineConf.profile_error()}: {profile}')
+    settings = dict(PragmaProfile.settings(profile))
+    for name, value in (pragmas or {}).items():
+        if name not in settings or isinstance(value, bool) or not (
+            isinstance(value, int)
+            or (isinstance(value, str) and value.isalpha())
+        ):
+            logger.error('%s: %s=%s', EngineConf.pragma_error(), name, value)
+            raise ValueError(EngineConf.pragma_error())
+        settings[name] = value
+    return tuple(settings.items())
+
+
+def set_pragma(db_connection,
+               connect,
+               pragmas: Optional[tuple] = None,
+               query_only: StrictBool = False):
     """Sets SQLite PRAGMA settings on a new connection.
     This function is intended to be used as an event listener with SQLAlchemy
-    engines to configure essential PRAGMA settings like journaling mode,
-    synchronous mode, foreign key enforcement, and JSON handling.
+    engines to configure the journaling mode and the tunable settings of a
+    PRAGMA profile.
 
     Args:
         db_connection: The raw DBAPI connection object
         (e.g., sqlite3.Connection).
 
         connect:  The SQLAlchemy internal connection record object
+
+        pragmas: The (name, value) pairs from `mk_pragmas`; the default
+        profile if None.
+
+        query_only: Refuse writes on this connection.
     """
     logger.debug('Set PRAGMA on %s', db_connection)
+    if pragmas is None:
+        pragmas = mk_pragmas()
+    settings = dict(pragmas)
     cursor = db_connection.cursor()
+    if Pragma.PAGE_SIZE.value in settings:
+        cursor.execute(Pragma.setting(
+            Pragma.PAGE_SIZE.value, settings.pop(Pragma.PAGE_SIZE.value)
+        ))
     cursor.execute(Pragma.journal_mode())
     logger.debug('journal_mode: %s', connect.last_connect_time)
-    cursor.execute(Pragma.synchronous())
-    logger.debug('synchronous: %s', connect.last_connect_time)
-    cursor.execute(Pragma.valid_json())
-    logger.debug('valid_json: %s', connect.last_connect_time)
+    for name, value in settings.items():
+        cursor.execute(Pragma.setting(name, value))
+        logger.debug('%s=%s: %s', name, value, connect.last_connect_time)
+    if query_only:
+        cursor.execute(Pragma.query_only())
+        logger.debug('query_only: %s', connect.last_connect_time)
     cursor.close()
     logger.debug('all pragmas set, close cursor %s', cursor)
     db_connection.isolation_level = None
@@ -77,18 +150,77 @@ def set_begin(db_connection):
     db_connection.exec_driver_sql(Sql.BEGIN.value)
 
 
+def set_begin_immediate(db_connection):
+    """Begins a writer transaction with BEGIN IMMEDIATE.
+
+    The write lock is taken up front, while busy_timeout still applies,
+    instead of on the first write of a deferred transaction, where an
+    upgrade from a read lock can fail at once with SQLITE_BUSY.
+
+    Args:
+        dbapi_connection: The raw DBAPI connection object.
+    """
+    db_connection.exec_driver_sql(Sql.begin_immediate())
+
+
+def mk_memory_creator(db_name: StrictStr):
+    """Makes a connection factory for a named in-memory database.
+
+    Every connection opens the same database through the memdb VFS, so each
+    pooled connection, and each thread holding one, reads in parallel with
+    the others while writers wait on busy_timeout as they would on a file.
+    The name carries a random token so no two engines share a database. The
+    factory holds its first connection as `anchor`: the database lives as
+    long as the engine rather than as long as any pooled connection.
+
+    Args:
+        db_name: The name of the database (e.g., "tables_03").
+
+    Returns:
+        Callable: A function returning a new sqlite3 connection.
+    """
+    uri = EngineConf.memdb(
+        db_name, token_hex(EngineConf.memdb_token_bytes())
+    )
+
+    def creator():
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    creator.anchor = creator()
+    logger.debug('memdb %s held by %s', uri, creator.anchor)
+    return creator
+
+
 def setup_engine(db_name: StrictStr,
                  cache: StrictBool = False,
-                 data_path: StrictStr = f'{EngineConf.dirname()}') -> Engine:
-    """Sets up a SQLAlchemy engine for the given database.
+                 data_path: StrictStr = f'{EngineConf.dirname()}',
+                 pragmas: Optional[tuple] = None,
+                 readonly: StrictBool = False,
+                 immutable: StrictBool = False) -> Engine:
+    """Sets up the SQLAlchemy writer and reader engines for the given database.
     #!@@!# Add Permission check for default or given data dir
     #!@@!# The default is /mnt/ram
+    The writer engine pools a single connection whose transactions begin
+    with BEGIN IMMEDIATE. The reader engine pools query_only connections,
+    so the many readers WAL allows never take the write lock.
+    In memory each database is a named memdb database with a pool of
+    connections; SQLite before 3.36 falls back to one shared :memory:
+    connection for both engines.
+    A readonly database file is opened with mode=ro and both engines are
+    query_only; immutable also skips file locking and the WAL.
+
     Args:
         db_name: The name of the database file.
+        cache: Keep the database in memory.
+        data_path: The directory for the database file.
+        pragmas: The (name, value) pairs from `mk_pragmas` to set on each
+            connection; the default profile if None.
+        readonly: Open the existing database file without writing to it.
+        immutable: Open it as a snapshot that nothing writes to.
 
     Returns:
-        EngineAttributes: A namedtuple containing the database name and the
-        engine.
+        EngineAttributes: A namedtuple containing the database name, the
+        writer engine and the reader engine.
     """
     if db_name is None:
         logger.error('Valid database name required')
@@ -133,7 +265,32 @@ def setup_engine(db_name: StrictStr,
             logger.error('%s: %s', EngineConf.dir_path_error(), path_error)
             raise
 
-    if cache:
+    if cache and sqlite3.sqlite_version_info >= EngineConf.memdb_version():
+        creator = mk_memory_creator(db_name)
+        engine = create_engine(
+            EngineConf.memory(),
+            creator=creator,
+            poolclass=QueuePool,
+            logging_name=f'{db_name}_engine',
+            pool_logging_name=f'{db_name}_pool',
+            echo=EngineConf.no_echo(),
+            echo_pool=EngineConf.no_echo(),
+            pool_size=WriterConf.pool_size(),
+            max_overflow=WriterConf.max_overflow(),
+            pool_timeout=WriterConf.pool_timeout(),
+        )
+        reader = create_engine(
+            EngineConf.memory(),
+            creator=creator,
+            poolclass=QueuePool,
+            logging_name=f'{db_name}_reader',
+            pool_logging_name=f'{db_name}_reader_pool',
+            echo=EngineConf.no_echo(),
+            echo_pool=EngineConf.no_echo(),
+            pool_size=EngineConf.pool_size(),
+            max_overflow=EngineConf.max_overflow(),
+        )
+    elif cache:
         database = f'{EngineConf.sqlite()}{data_path}'
         logger.debug('cache uri: %s', database)
 
@@ -146,11 +303,16 @@ def setup_engine(db_name: StrictStr,
             echo=EngineConf.no_echo(),
             echo_pool=EngineConf.no_echo(),
         )
+        reader = engine
     else:
-        data_path.mkdir(parents=True, exist_ok=True)
-        logger.debug('data_path mkdir if needed')
-
-        database = f'{EngineConf.sqlite()}{data_path}/{db_name}.db'
+        if readonly:
+            database = f'{EngineConf.sqlite()}' + ReadOnlyConf.uri(
+                f'{data_path}/{db_name}.db', immutable
+            )
+        else:
+            data_path.mkdir(parents=True, exist_ok=True)
+            logger.debug('data_path mkdir if needed')
+            database = f'{EngineConf.sqlite()}{data_path}/{db_name}.db'
         logger.debug('database url: %s', database)
 
         engine = create_engine(
@@ -159,32 +321,120 @@ def setup_engine(db_name: StrictStr,
             pool_logging_name=f'{db_name}_pool',
             echo=EngineConf.no_echo(),
             echo_pool=EngineConf.no_echo(),
+            pool_size=WriterConf.pool_size(),
+            max_overflow=WriterConf.max_overflow(),
+            pool_timeout=WriterConf.pool_timeout(),
+        )
+        reader = create_engine(
+            database,
+            logging_name=f'{db_name}_reader',
+            pool_logging_name=f'{db_name}_reader_pool',
+            echo=EngineConf.no_echo(),
+            echo_pool=EngineConf.no_echo(),
             pool_size=EngineConf.pool_size(),
             max_overflow=EngineConf.max_overflow(),
         )
-    logger.debug('db engine: %s', engine)
+    logger.debug('db engine: %s, reader: %s', engine, reader)
 
+    if pragmas is None:
+        pragmas = mk_pragmas()
     event.listen(
         engine,
         Pragma.CONNECT.value,
-        set_pragma
+        lambda db_connection, connect: set_pragma(
+            db_connection, connect, pragmas, query_only=readonly
+        )
     )
     logger.debug('default pragma event listener added')
     event.listen(
         engine,
         Sql.BEGIN.value.lower(),
-        set_begin
+        set_begin_immediate
     )
-    logger.debug('applied explicit BEGIN event listener for sql begin')
-    quality_engine = EngineAttributes(db_name, engine)
+    logger.debug('applied BEGIN IMMEDIATE event listener for the writer')
+    if reader is not engine:
+        event.listen(
+            reader,
+            Pragma.CONNECT.value,
+            lambda db_connection, connect: set_pragma(
+                db_connection, connect, pragmas, query_only=True
+            )
+        )
+        logger.debug('query_only pragma event listener added')
+        event.listen(
+            reader,
+            Sql.BEGIN.value.lower(),
+            set_begin
+        )
+        logger.debug('applied explicit BEGIN event listener for readers')
+    quality_engine = EngineAttributes(db_name, engine, reader)
     return quality_engine
 
 
+def database_path(data_path: Optional[StrictStr],
+                  db_name: StrictStr) -> Path:
+    """Returns the path of the database file of db_name in data_path."""
+    return Path(data_path or EngineConf.dirname()) / db_name / f'{db_name}.db'
+
+
+def wal_stat(engine_stash) -> Optional[Tuple[int, int]]:
+    """Returns the size and modification time of the WAL file of a database.
+
+    Args:
+        engine_stash (EngineAttributes): The engines of the database.
+
+    Returns:
+        tuple: The bytes and st_mtime_ns of the WAL file, or None for an
+        in-memory database or a WAL not yet created.
+    """
+    database = engine_stash.engine.url.database
+    if not database or database == EngineConf.cache():
+        return None
+    try:
+        stat = Path(CheckpointConf.wal(database)).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def checkpoint_wal(engine_stash,
+                   mode: StrictStr = CheckpointConf.passive()
+                   ) -> Tuple[int, int, int]:
+    """Runs PRAGMA wal_checkpoint on the writer connection of a database.
+
+    The writer pool holds a single connection, so the checkpoint waits for
+    the write in progress and writes wait for the checkpoint. A PASSIVE
+    checkpoint leaves the WAL file at its size, so the writer first gets
+    the journal_size_limit that shrinks the WAL when it next starts over;
+    the size of the WAL then tracks the frames written since.
+
+    Args:
+        engine_stash (EngineAttributes): The engines of the database.
+        mode (str): PASSIVE, RESTART or TRUNCATE.
+
+    Returns:
+        tuple: 1 if the checkpoint was blocked, else 0, the frames in the
+        WAL and the frames copied to the database.
+    """
+    connection = engine_stash.engine.raw_connection()
+    try:
+        connection.execute(
+            Pragma.journal_size_limit(CheckpointConf.size_limit())
+        )
+        busy, log, checkpointed = connection.execute(
+            Pragma.checkpoint(mode)
+        ).fetchone()
+    finally:
+        connection.close()
+    return busy, log, checkpointed
+
+
 EngineAttributes = namedtuple(
     EngineAttr.TYPE_NAME.value,
     [
         EngineAttr.DB_NAME.value,
-        EngineAttr.ENGINE.value
+        EngineAttr.ENGINE.value,
+        EngineAttr.READER.value
     ]
 )
 EngineAttributes.__doc__ = EngineAttr.DOC.value
@@ -0,0 +1,171 @@
+"""Fast Path Utilities
+
+Single key operations that run the prepared SQL of a table directly on the
+long-lived sqlite3 reader of its database, or on its single writer for a
+write, without building a SQLAlchemy statement or a Session.
+
+Functions:
+
+- `fast_route`: Returns the fast path attributes and statements for a key.
+- `load_value`: Decodes a stored JSON value.
+- `fast_get_stored`: Retrieves the LiteStashData and expires_at for a key.
+- `fast_get`: Retrieves the LiteStashData for a key.
+- `fast_set`: Upserts a LiteStashStore.
+- `fast_delete`: Deletes the data for a key.
+- `fast_exists`: Checks if a key is stored.
+"""
+import orjson
+
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from pydantic import StrictBool
+from pydantic import StrictStr
+
+from litestash.models import LiteStashData
+from litestash.models import LiteStashStore
+from litestash.core.fast_path import FastPath
+from litestash.core.util.core_util import FastAttributes
+from litestash.core.util.core_util import FastStatements
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.util.litestash_util import is_expired
+from litestash.logging import root_logger as logger
+
+
+def fast_route(
+    fast_path: FastPath,
+    key_hash: StrictStr
+) -> tuple[FastAttributes, FastStatements]:
+    """Return the fast path attributes and table statements for a key hash."""
+    route = fast_path.topology.route(key_hash)
+    fast_attr = fast_path.get(route.db_name)
+    return fast_attr, fast_attr.statements[route.table_name]
+
+
+def load_value(stored: Any) -> Any:
+    """Decodes a stored JSON value.
+
+    The value column has NUMERIC affinity, so SQLite stores JSON numbers as
+    INTEGER or REAL and returns them already decoded.
+    """
+    if isinstance(stored, (str, bytes)):
+        return orjson.loads(stored)
+    return stored
+
+
+def fast_get_stored(
+    fast_path: FastPath,
+    key_hash: StrictStr,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> Optional[tuple]:
+    """Retrieves the LiteStashData and expires_at for a key hash.
+
+    A row past its expires_at is treated as missing and its hash key is
+    handed to reap.
+
+    Args:
+        fast_path (FastPath): The LiteStash fast path connections.
+        key_hash (str): The primary key of the data.
+        reap (Optional[Callable]): Called with the hash key of an expired row.
+
+    Returns:
+        tuple: The LiteStashData and its expires_at, or None if not found.
+    """
+    fast_attr, statements = fast_route(fast_path, key_hash)
+    with fast_attr.lock:
+        row = fast_attr.connection.driver_connection.execute(
+            statements.get, (key_hash,)
+        ).fetchone()
+    if row is None:
+        return None
+    if is_expired(row[2], get_deadline()):
+        if reap is not None:
+            reap(key_hash)
+        return None
+    logger.debug('fast get: %s', row[0])
+    return LiteStashData(key=row[0], value=load_value(row[1])), row[2]
+
+
+def fast_get(
+    fast_path: FastPath,
+    key_hash: StrictStr,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> Optional[LiteStashData]:
+    """Retrieves the LiteStashData for a key hash.
+
+    Args:
+        fast_path (FastPath): The LiteStash fast path connections.
+        key_hash (str): The primary key of the data.
+        reap (Optional[Callable]): Called with the hash key of an expired row.
+
+    Returns:
+        LiteStashData: The key and value, or None if not found or expired.
+    """
+    stored = fast_get_stored(fast_path, key_hash, reap)
+    return stored[0] if stored else None
+
+
+def fast_set(fast_path: FastPath, data: LiteStashStore) -> None:
+    """Upserts a LiteStashStore as one autocommit statement on the writer.
+
+    Args:
+        fast_path (FastPath): The LiteStash fast path connections.
+        data (LiteStashStore): The row to store.
+    """
+    fast_attr, statements = fast_route(fast_path, data.key_hash)
+    parameters = (
+        data.key_hash,
+        data.key,
+        orjson.dumps(data.value).decode(),
+        data.timestamp,
+        data.microsecond,
+        data.expires_at
+    )
+    writer = fast_attr.writer.raw_connection()
+    try:
+        writer.driver_connection.execute(statements.set, parameters)
+    finally:
+        writer.close()
+    logger.debug('fast set: %s', data.key)
+
+
+def fast_delete(fast_path: FastPath, key_hash: StrictStr) -> None:
+    """Deletes the data for a key hash with the writer.
+
+    Args:
+        fast_path (FastPath): The LiteStash fast path connections.
+        key_hash (str): The primary key of the data.
+    """
+    fast_attr, statements = fast_route(fast_path, key_hash)
+    writer = fast_attr.writer.raw_connection()
+    try:
+        writer.driver_connection.execute(statements.delete, (key_hash,))
+    finally:
+        writer.close()
+
+
+def fast_exists(
+    fast_path: FastPath,
+    key_hash: StrictStr,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> StrictBool:
+    """Return True if unexpired data is stored for the key hash.
+
+    Args:
+        fast_path (FastPath): The LiteStash fast path connections.
+        key_hash (str): The primary key of the data.
+        reap (Optional[Callable]): Called with the hash key of an expired row.
+    """
+    fast_attr, statements = fast_route(fast_path, key_hash)
+    with fast_attr.lock:
+        row = fast_attr.connection.driver_connection.execute(
+            statements.exists, (key_hash,)
+        ).fetchone()
+    if row is None:
+        return False
+    if is_expired(row[0], get_deadline()):
+        if reap is not None:
+            reap(key_hash)
+        return False
+    return True
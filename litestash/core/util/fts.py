@@ -24,9 +24,9 @@ from litestash.core.config.fts_conf import SearchSetup as Search
 from litestash.core.config.fts_conf import Trigger
 from litestash.core.config.schema_conf import ColumnFields as C
 from litestash.core.config.schema_conf import ColumnConfig as Conf
-from litestash.core.util.litestash_util import EngineAttributes
-from litestash.core.util.litestash_util import MetaAttributes
-from litestash.core.util.litestash_util import SessionAttributes
+from litestash.core.util.engine_util import EngineAttributes
+from litestash.core.util.core_util import MetaAttributes
+from litestash.core.util.core_util import SessionAttributes
 from litestash.core.util.schema_util import mk_table_names
 
 def db_key_search(
@@ -13,14 +13,43 @@ Functions:
 - `get_datastore`: Creates a LiteStashStore object from LiteStashData.
 - `get_keys`: Retrieves all keys from a table.
 - `get_values`: Retrieves all values from a table.
+- `get_chunk_size`: Validates the rows fetched per chunk of a stream.
+- `page_table`: Reads one page of unexpired rows of a table by key_hash.
+- `stream_table`: Streams the unexpired rows of a table in chunks.
+- `mk_scan_cursor`/`read_scan_cursor`: Encode and decode a scan position.
+- `scan_tables`: Reads the next keys of a resumable scan over every table.
+- `key_range`: Returns the key index range of a prefix or glob pattern.
+- `match_table`: Streams the keys of a table within a prefix or pattern.
+- `match_keys`: Yields the matching keys of every database.
+- `sorted_table`: Streams the rows of a table in key order.
+- `merge_sorted`: Merges the sorted rows of every table in key order.
+- `count_database`: Reads the row counters of one database.
+- `count_data`: Reads the row counters of every database.
+- `fan_out`: Runs a batch for each database, optionally in parallel.
+- `mget_data`: Retrieves many values with one query per table.
+- `mset_data`: Stores many values with one transaction per database.
+- `order_results`: Orders mget results by the requested keys.
+- `get_expires_at`: Returns the expiry time of data set with a ttl.
+- `expire_data`: Deletes expired data with one statement per table.
+- `sweep_table`: Deletes a bounded number of expired rows of one table.
+- `reap_database`: Deletes expired rows found by reads.
 
 """
 from datetime import datetime
 
+from heapq import merge
+
 from hashlib import blake2b
 
 import orjson
 
+from concurrent.futures import Executor
+
+from itertools import islice
+
+from typing import Callable
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import overload
@@ -30,9 +59,11 @@ from secrets import base64
 from secrets import randbelow
 
 from sqlalchemy import delete
+from sqlalchemy import or_
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy import select
 from sqlalchemy import Table
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.exc import SQLAlchemyError
@@ -40,6 +71,7 @@ from sqlalchemy.orm import Session
 
 from pydantic import StrictBool
 from pydantic import StrictBytes
+from pydantic import StrictFloat
 from pydantic import StrictInt
 from pydantic import StrictStr
 from pydantic import ValidationError
@@ -48,21 +80,26 @@ from litestash.models import LiteStashData
 from litestash.models import LiteStashStore
 from litestash.core.config.connection_conf import ConnectionType
 from litestash.core.util.connection_util import Connection
+from litestash.core.util.connection_util import BatchResult
 from litestash.core.util.connection_util import DatabaseConnections
 from litestash.core.util.connection_util import DataResults
 from litestash.core.util.connection_util import GetConnection
 from litestash.core.util.connection_util import GetDataConnections
 from litestash.core.util.connection_util import GetTime
+from litestash.core.util.connection_util import KeyHash
 from litestash.core.util.connection_util import SetConnection
 from litestash.core.util.connection_util import SetDataConnections
 from litestash.core.config.litestash_conf import Key
+from litestash.core.config.litestash_conf import ScanConf
+from litestash.core.config.litestash_conf import StashError
 from litestash.core.config.litestash_conf import Utils
 from litestash.core.config.schema_conf import ColumnFields as C
+from litestash.core.config.schema_conf import CountSql
 from litestash.core.util.misc_util import spaces_match
-from litestash.core.util.schema_util import get_db_name
-from litestash.core.util.schema_util import get_table_name
 from litestash.core.schema import Metadata
 from litestash.core.session import Session as Manager
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
 from litestash.logging import root_logger as logger
 
 
@@ -186,11 +223,66 @@ def time_to_live(seconds: StrictInt):
     return ttl
 
 
-def mk_datastore(data: LiteStashData) -> LiteStashStore:
+def to_microseconds(time: GetTime) -> StrictInt:
+    """Return a GetTime as Unix time in microseconds."""
+    return time.timestamp * Utils.microseconds() + time.microsecond
+
+
+def get_expires_at(
+    ttl: Union[StrictInt, StrictFloat],
+    now: Optional[GetTime] = None
+) -> StrictInt:
+    """Return the Unix time in microseconds when data set now expires.
+
+    Args:
+        ttl (int | float): The number of seconds the data lives.
+        now (GetTime): The time the data is set; defaults to now.
+
+    Raises:
+        ValueError: If ttl is not a positive number.
+    """
+    if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0:
+        logger.error('%s: %s', StashError.TTL_VALUE.value, ttl)
+        raise ValueError(StashError.TTL_VALUE.value)
+    if now is None:
+        now = get_time()
+    return to_microseconds(now) + int(ttl * Utils.microseconds())
+
+
+def get_deadline(
+    time: Union[StrictInt, StrictFloat, datetime, GetTime, None] = None
+) -> StrictInt:
+    """Return the Unix time in microseconds that expired data is before.
+
+    Args:
+        time: A Unix timestamp, datetime or GetTime; defaults to now.
+
+    Raises:
+        TypeError: If time is not one of the accepted types.
+    """
+    if time is None:
+        return to_microseconds(get_time())
+    if isinstance(time, GetTime):
+        return to_microseconds(time)
+    if isinstance(time, datetime):
+        return to_microseconds(
+            GetTime(int(time.timestamp()), time.microsecond)
+        )
+    if isinstance(time, (int, float)) and not isinstance(time, bool):
+        return int(time * Utils.microseconds())
+    logger.error('%s: %s', StashError.DEADLINE_TYPE.value, type(time))
+    raise TypeError(StashError.DEADLINE_TYPE.value)
+
+
+def mk_datastore(
+    data: LiteStashData,
+    ttl: Optional[Union[StrictInt, StrictFloat]] = None
+) -> LiteStashStore:
     """Creates a `LiteStashStore` object from `LiteStashData`.
 
     Args:
         data: A `LiteStashData` object.
+        ttl: The number of seconds until the data expires; None to keep it.
 
     Returns:
         A `LiteStashStore` object ready for database storage.
@@ -206,9 +298,10 @@ def mk_datastore(data: LiteStashData) -> LiteStashStore:
     stash_data = LiteStashStore(
         key_hash = primary_key,
         key = data.key,
-        value = data.value,
+        value = orjson.dumps(data.value),
         timestamp = now.timestamp,
-        microsecond = now.microsecond
+        microsecond = now.microsecond,
+        expires_at = None if ttl is None else get_expires_at(ttl, now)
             )
     logger.debug('stash_data key_hash: %s', stash_data.key_hash)
     logger.debug('stash_data key: %s', stash_data.key)
@@ -230,9 +323,12 @@ def connect(data: LiteStashStore) -> Connection:
 
 def connect(data: Union[LiteStashData | LiteStashStore],
               metadata: Metadata,
-              db_session: Session) -> Connection:
+              db_session: Session,
+              write: StrictBool = False) -> Connection:
     """connect
 
+    A LiteStashStore, or a LiteStashData with write, is routed to the writer
+    session of its database; any other LiteStashData to a reader session.
 
     Returns:
         Connection
@@ -245,11 +341,13 @@ def connect(data: Union[LiteStashData | LiteStashStore],
     elif isinstance(data, LiteStashStore):
         key_hash = data.key_hash
         connection_type = ConnectionType.SET.value
-    db_name = get_db_name(key_hash[0])
-    table_name = get_table_name(key_hash[0])
-    metadata = metadata.get(db_name).metadata
-    session = db_session.get(db_name).session
-    table = metadata.tables[table_name]
+    route = metadata.topology.route(key_hash)
+    metadata = metadata.get(route.db_name).metadata
+    if write or connection_type is ConnectionType.SET.value:
+        session = db_session.get(route.db_name).session
+    else:
+        session = db_session.get(route.db_name).reader
+    table = metadata.tables[route.table_name]
 
     connection = None
     if connection_type is ConnectionType.GET.value:
@@ -271,7 +369,8 @@ def connections(items: List[LiteStashStore]):
 
 
 def connections(
-    items: List[Union[LiteStashData, LiteStashStore]]
+    items: List[Union[LiteStashData, LiteStashStore]],
+    topology: Optional[Topology] = None
 ) -> DatabaseConnections:
     """connections
 
@@ -282,22 +381,27 @@ def connections(
         items (List[Union[LiteStashData, LiteStashStore]]):
             Given LiteStashData list build a GetDataConnections object, or
             given LiteStashStore list, build a SetDataConnections object.
+            Each LiteStashData key is hashed once into a KeyHash lookup.
+        topology (Topology): Routes each key hash to its database; defaults
+            to the prefix topology.
 
     Returns:
         connections (GetDataConnections | SetDataConnections):
             A connections object with all requested connections sorted by each
             database the connections will operate upon.
     """
-    database_connections = DatabaseConnections()
-    if all(connections.is_data(item) for item in items):
-        database_connections = GetDataConnections()
+    topology = PREFIX_TOPOLOGY if topology is None else topology
+    database_connections = DatabaseConnections(topology)
+    if all(database_connections.is_data(item) for item in items):
+        database_connections = GetDataConnections(topology)
         for data in items:
-            database_connections[get_db_name(data.key_hash[0])] = data
+            key_hash = KeyHash(get_primary_key(data.key), data.key)
+            database_connections[topology.db_name(key_hash.key_hash)] = key_hash
         return database_connections
     elif all(database_connections.is_store(item) for item in items):
-        database_connections = SetDataConnections()
+        database_connections = SetDataConnections(topology)
         for data in items:
-            database_connections[get_db_name(data.key_hash[0])] = data
+            database_connections[topology.db_name(data.key_hash)] = data
         return database_connections
 
 
@@ -308,16 +412,48 @@ def db_data(db_connections: DatabaseConnections):
             yield(db_name, db_connections[db_name])
 
 
+def fan_out(process: Callable,
+            db_connections: DatabaseConnections,
+            executor: Optional[Executor] = None):
+    """Yields the result of process for each database and its data.
+
+    Without an executor each database is processed in turn. With an
+    executor each database batch runs on its own worker, and so on its own
+    session and connection, since every database is a separate file.
+
+    Args:
+        process (Callable): Called as process(db_name, data) per database.
+        db_connections (DatabaseConnections): The data sorted by database.
+        executor (Optional[Executor]): The worker pool for a parallel run.
+    """
+    yield from fan_out_batches(process, list(db_data(db_connections)), executor)
+
+
+def fan_out_batches(process: Callable,
+                    batches: List[tuple],
+                    executor: Optional[Executor] = None):
+    """Yields the result of process for each (db_name, data) batch."""
+    if executor is None or len(batches) < 2:
+        for db_name, data in batches:
+            yield process(db_name, data)
+    else:
+        yield from executor.map(lambda batch: process(*batch), batches)
+
+
 def get_session(db_name: StrictStr, manager: Manager):
-    """Return a session for the named database."""
+    """Return a writer session for the named database."""
     return manager.get(db_name).session
 
 
+def get_reader(db_name: StrictStr, manager: Manager):
+    """Return a reader session for the named database."""
+    return manager.get(db_name).reader
+
+
 def get_table(primary_key: StrictStr, db_name: StrictStr, metadata: Metadata):
     """Return the table for the given key and metadata."""
-    table_name = get_table_name(primary_key[0])
-    metadata = metadata.get(db_name).metadata
-    return metadata.tables[table_name]
+    table_name = metadata.topology.route(primary_key).table_name
+    return metadata.get(db_name).metadata.tables[table_name]
 
 
 def get_query(primary_key: StrictStr, table: Table):
@@ -325,49 +461,160 @@ def get_query(primary_key: StrictStr, table: Table):
     return select(table).where(table.c.key_hash == primary_key)
 
 
+def mget_query(primary_keys: List[StrictStr], table: Table):
+    """Return the sql query for getting many values by hash key."""
+    return (
+        select(table.c.key_hash,
+               table.c.key,
+               table.c.value,
+               table.c.expires_at)
+        .where(table.c.key_hash.in_(primary_keys))
+    )
+
+
+def table_keys(
+    data: List[KeyHash],
+    topology: Optional[Topology] = None
+) -> Dict[StrictStr, List[StrictStr]]:
+    """Group the hash keys of one database by table name.
+
+    Duplicate hash keys are dropped and the first seen order is kept.
+    """
+    topology = PREFIX_TOPOLOGY if topology is None else topology
+    tables = {}
+    for key_hash, _ in data:
+        table_name = topology.route(key_hash).table_name
+        tables.setdefault(table_name, {})[key_hash] = None
+    return {table_name: list(hashes) for table_name, hashes in tables.items()}
+
+
+def chunks(items: List, size: StrictInt = Utils.max_variables()):
+    """Yields successive slices of items no longer than size."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def mget_database(db_name: StrictStr,
+                  data: List[KeyHash],
+                  metadata: Metadata,
+                  manager: Manager,
+                  reap: Optional[Callable[[StrictStr], None]] = None) -> tuple:
+    """Run the batched selects for the KeyHash lookups of one database.
+
+    Rows past their expires_at are left out and handed to reap.
+
+    Returns:
+        tuple: The database name, the LiteStashData found, any errors and
+        the expires_at of each found key that has one.
+    """
+    found = []
+    errors = []
+    expires = {}
+    deadline = get_deadline()
+    def process_data(data, session):
+        tables = metadata.get(db_name).metadata.tables
+        for table_name, primary_keys in table_keys(data,
+                                                   metadata.topology).items():
+            table = tables[table_name]
+            for chunk in chunks(primary_keys):
+                query = mget_query(chunk, table)
+                try:
+                    for row in session.execute(query):
+                        if is_expired(row.expires_at, deadline):
+                            if reap is not None:
+                                reap(row.key_hash)
+                            continue
+                        if row.expires_at is not None:
+                            expires[row.key] = row.expires_at
+                        yield LiteStashData(key=row.key, value=row.value)
+
+                except OperationalError as oe:
+                    logger.error('OperationalError: %s', oe)
+                    yield None, str(oe)
+                except IntegrityError as ie:
+                    logger.error('IntegrityError: %s', ie)
+                    yield None, str(ie)
+                except SQLAlchemyError as se:
+                    logger.error('SQlAlchmeyError: %s', se)
+                    yield None, str(se)
+                except Exception as error:
+                    logger.error('Unknown error: %s', error)
+                    raise
+
+    session = get_reader(db_name, manager)
+    with session() as mget_session:
+        for result in process_data(data, mget_session):
+            if isinstance(result, tuple):
+                _, error = result
+                logger.error('error on get: %s', error)
+                errors.append(error)
+            else:
+                found.append(result)
+                logger.debug('stored result: %s', result.key)
+        mget_session.commit()
+    return db_name, found, errors, expires
+
+
 def mget_data(mget_connections: GetDataConnections,
              metadata: Metadata,
-             manager: Manager) -> DataResults:
-    """multi-getter"""
-    results = DataResults()
-    def process_data(db_name, data, metadata, session):
-        for entry in data:
-            pk = get_primary_key(entry.key)
-            table = get_table(pk, db_name, metadata)
-            query = get_query(pk, table)
-            try:
-                result = session.execute(query).first()
-                if result:
-                    yield LiteStashData(key=result[1], value=result[2])
-
-            except OperationalError as oe:
-                logger.error('OperationalError: %s', oe)
-                yield None, str(oe)
-            except IntegrityError as ie:
-                logger.error('IntegrityError: %s', ie)
-                yield None, str(ie)
-            except SQLAlchemyError as se:
-                logger.error('SQlAlchmeyError: %s', se)
-                yield None, str(se)
-            except Exception as error:
-                logger.error('Unknown error: %s', error)
-                raise
-
-
-    for db_name, data in db_data(mget_connections):
-        session = get_session(db_name, manager)
-        with session() as mget_session:
-            for result in process_data(db_name, data, metadata, session):
-                if isinstance(result, tuple):
-                    _, error = result
-                    logger.error('error on get: %s', error)
-                else:
-                    results[db_name] = result
-                    logger.info('stored result: %s', result)
-            mget_session.commit()
+             manager: Manager,
+             executor: Optional[Executor] = None,
+             reap: Optional[Callable[[StrictStr], None]] = None
+             ) -> DataResults:
+    """multi-getter
+
+    Run one `key_hash IN (...)` select per table of each database, chunked
+    under the SQLite variable limit, instead of one select per key.
+
+    Args:
+        mget_connections (GetDataConnections): KeyHash lookups by database.
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        executor (Optional[Executor]): Read the databases in parallel.
+        reap (Optional[Callable]): Called with the hash key of each row
+            found past its expires_at, which is left out of the results.
+
+    Returns:
+        results (DataResults):
+            The LiteStashData found and the errors for each database. Missing
+            keys are absent; use `order_results` for the caller's key order.
+            The expires_at of found keys with a ttl is kept by key.
+    """
+    results = DataResults(metadata.topology)
+    def process(db_name, data):
+        return mget_database(db_name, data, metadata, manager, reap)
+
+    for db_name, found, errors, expires in fan_out(process,
+                                                   mget_connections,
+                                                   executor):
+        results[db_name] = found
+        results.add_errors(db_name, errors)
+        results.expires_at.update(expires)
     return results
 
 
+def order_results(
+    keys: List[LiteStashData],
+    results: DataResults
+) -> List[Optional[LiteStashData]]:
+    """Return the results in the order of the given keys.
+
+    Args:
+        keys (List[LiteStashData]): The keys as requested by the caller.
+        results (DataResults): The found data for each database.
+
+    Returns:
+        List[Optional[LiteStashData]]:
+            The data for each key, or None for each key not found.
+    """
+    found = {
+        data.key: data
+        for db_results in results.values() if db_results is not None
+        for data in db_results
+    }
+    return [found.get(data.key) for data in keys]
+
+
 def set_query(data: LiteStashStore, table: Table):
     """Return a SQL insert statement."""
     statement = (insert(table)
@@ -376,7 +623,8 @@ def set_query(data: LiteStashStore, table: Table):
             key=data.key,
             value=data.value,
             timestamp=data.timestamp,
-            microsecond=data.microsecond
+            microsecond=data.microsecond,
+            expires_at=data.expires_at
         )
     )
     return statement.on_conflict_do_update(
@@ -385,65 +633,320 @@ def set_query(data: LiteStashStore, table: Table):
     )
 
 
+def mset_query(table: Table):
+    """Return the upsert statement to run with a list of rows."""
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[C.HASH.value],
+        set_=statement.excluded,
+    )
+
+
+def store_row(data: LiteStashStore) -> Dict:
+    """Return the column values of a LiteStashStore."""
+    return {
+        C.HASH.value: data.key_hash,
+        C.KEY.value: data.key,
+        C.VALUE.value: data.value,
+        C.TIMESTAMP.value: data.timestamp,
+        C.MICROSECOND.value: data.microsecond,
+        C.EXPIRES_AT.value: data.expires_at
+    }
+
+
+def table_entries(
+    data: List[LiteStashStore],
+    topology: Optional[Topology] = None
+) -> Dict[StrictStr, List[LiteStashStore]]:
+    """Group the entries of one database by table name.
+
+    A later entry for the same hash key replaces the earlier one.
+    """
+    topology = PREFIX_TOPOLOGY if topology is None else topology
+    tables = {}
+    for entry in data:
+        route = topology.route(entry.key_hash)
+        tables.setdefault(route.table_name, {})[entry.key_hash] = entry
+    return {table_name: list(entries.values())
+            for table_name, entries in tables.items()}
+
+
+def mset_database(db_name: StrictStr,
+                  data: List[LiteStashStore],
+                  metadata: Metadata,
+                  manager: Manager) -> tuple:
+    """Upsert the LiteStashStore entries of one database in one transaction.
+
+    Each table is written with one executemany upsert per batch of entries.
+    Every batch runs in its own savepoint, so a failed batch is rolled back
+    and reported while the other batches of the database still commit.
+
+    Returns:
+        tuple: The database name, the entries stored, any errors and the
+        BatchResult of each batch.
+    """
+    stored = []
+    errors = []
+    batches = []
+    tables = metadata.get(db_name).metadata.tables
+    session = get_session(db_name, manager)
+    with session() as set_session:
+        for table_name, entries in table_entries(data,
+                                                 metadata.topology).items():
+            query = mset_query(tables[table_name])
+            for batch in chunks(entries, Utils.batch_size()):
+                error = None
+                try:
+                    with set_session.begin_nested():
+                        set_session.execute(
+                            query, [store_row(entry) for entry in batch]
+                        )
+                except OperationalError as oe:
+                    logger.error('OperationalError: %s', oe)
+                    error = str(oe)
+                except IntegrityError as ie:
+                    logger.error('IntegrityError: %s', ie)
+                    error = str(ie)
+                except SQLAlchemyError as se:
+                    logger.error('SQlAlchmeyError: %s', se)
+                    error = str(se)
+
+                batches.append(
+                    BatchResult(db_name, table_name, len(batch), error)
+                )
+                if error is None:
+                    stored.extend(batch)
+                    logger.debug('inserted %s into %s', len(batch), table_name)
+                else:
+                    errors.append(error)
+        set_session.commit()
+    return db_name, stored, errors, batches
+
+
 def mset_data(mset_connections: SetDataConnections,
              metadata: Metadata,
-             manager: Manager) -> None:
-    """mulit-setter"""
-    def process_data(db_name, data, metadata, session):
-        for entry in data:
-            table = get_table(entry.key_hash, db_name, metadata)
-            query = set_query(entry, table)
-            try:
-                session.execute(query)
-                yield entry.key
-            except OperationalError as oe:
-                logger.error('OperationalError: %s', oe)
-                yield None, str(oe)
-            except IntegrityError as ie:
-                logger.error('IntegrityError: %s', ie)
-                yield None, str(ie)
-            except SQLAlchemyError as se:
-                logger.error('SQlAlchmeyError: %s', se)
-                yield None, str(se)
-            except Exception as error:
-                logger.error('Unknown error: %s', error)
-                raise
-
-    for db_name, data in db_data(mset_connections):
-        session = get_session(db_name, manager)
-        with session() as set_session:
-            for result in process_data(db_name, data, metadata, manager):
-                if isinstance(result, tuple):
-                    _, message = result
-                    logger.error('insert failed: %s', message)
-                else:
-                    logger.info('inserted %s', result)
-            set_session.commit()
+             manager: Manager,
+             executor: Optional[Executor] = None) -> DataResults:
+    """mulit-setter
 
+    Run one executemany upsert per table and batch, with one transaction per
+    database, instead of one statement per entry.
 
-def get_data(connection: Connection) -> Optional[LiteStashData]:
-    """get_data
+    Args:
+        mset_connections (SetDataConnections): The entries by database.
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        executor (Optional[Executor]): Write the databases in parallel.
 
-    Get the LiteStashData for a given key.
+    Returns:
+        results (DataResults):
+            The LiteStashStore entries stored, the errors for each database
+            and the BatchResult of every batch.
+    """
+    results = DataResults(metadata.topology)
+    def process(db_name, data):
+        return mset_database(db_name, data, metadata, manager)
+
+    for db_name, stored, errors, batches in fan_out(process,
+                                                    mset_connections,
+                                                    executor):
+        results[db_name] = stored
+        results.add_errors(db_name, errors)
+        results.add_batches(batches)
+    return results
+
+
+def expire_query(table: Table,
+                 deadline: StrictInt,
+                 primary_keys: Optional[List[StrictStr]] = None):
+    """Return the set-based delete of the rows expired before the deadline."""
+    query = delete(table).where(table.c.expires_at <= deadline)
+    if primary_keys is not None:
+        query = query.where(table.c.key_hash.in_(primary_keys))
+    return query
+
+
+def expire_database(db_name: StrictStr,
+                    data: Optional[List[KeyHash]],
+                    metadata: Metadata,
+                    manager: Manager,
+                    deadline: StrictInt) -> tuple:
+    """Delete the expired rows of one database in one transaction.
+
+    Without data every table runs one `DELETE ... WHERE expires_at <= ?` on
+    the expires_at index. With KeyHash data only those keys are checked.
+
+    Returns:
+        tuple: The database name and the number of rows deleted.
+    """
+    tables = metadata.get(db_name).metadata.tables
+    if data is None:
+        batches = [
+            (table_name, None)
+            for table_name in metadata.topology.table_names(db_name)
+        ]
+    else:
+        batches = [
+            (table_name, chunk)
+            for table_name, primary_keys in table_keys(
+                data, metadata.topology
+            ).items()
+            for chunk in chunks(primary_keys)
+        ]
+    expired = 0
+    session = get_session(db_name, manager)
+    with session() as expire_session:
+        for table_name, primary_keys in batches:
+            result = expire_session.execute(
+                expire_query(tables[table_name], deadline, primary_keys)
+            )
+            expired += result.rowcount
+        expire_session.commit()
+    logger.debug('expired %s rows from %s', expired, db_name)
+    return db_name, expired
+
+
+def sweep_query(table: Table, deadline: StrictInt, limit: StrictInt):
+    """Return a delete of at most limit rows expired before the deadline."""
+    expired = (
+        select(table.c.key_hash)
+        .where(table.c.expires_at <= deadline)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    return delete(table).where(table.c.key_hash.in_(expired))
+
+
+def sweep_table(db_name: StrictStr,
+                table_name: StrictStr,
+                metadata: Metadata,
+                manager: Manager,
+                deadline: StrictInt,
+                limit: StrictInt) -> StrictInt:
+    """Delete up to limit expired rows of one table in a short transaction.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    table = metadata.get(db_name).metadata.tables[table_name]
+    session = get_session(db_name, manager)
+    with session() as sweep_session:
+        result = sweep_session.execute(sweep_query(table, deadline, limit))
+        sweep_session.commit()
+    return result.rowcount
+
+
+def reap_database(db_name: StrictStr,
+                  key_hashes: List[StrictStr],
+                  metadata: Metadata,
+                  manager: Manager,
+                  deadline: StrictInt) -> StrictInt:
+    """Delete the given hash keys of one database that are still expired.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    tables = {}
+    for key_hash in key_hashes:
+        tables.setdefault(
+            metadata.topology.route(key_hash).table_name, []
+        ).append(key_hash)
+    reaped = 0
+    db_tables = metadata.get(db_name).metadata.tables
+    session = get_session(db_name, manager)
+    with session() as reap_session:
+        for table_name, primary_keys in tables.items():
+            for chunk in chunks(primary_keys):
+                result = reap_session.execute(
+                    expire_query(db_tables[table_name], deadline, chunk)
+                )
+                reaped += result.rowcount
+        reap_session.commit()
+    return reaped
+
+
+def expire_data(metadata: Metadata,
+                manager: Manager,
+                deadline: StrictInt,
+                expire_connections: Optional[GetDataConnections] = None,
+                executor: Optional[Executor] = None) -> StrictInt:
+    """Delete the data expired before the deadline from every database.
 
     Args:
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        deadline (int): Unix time in microseconds.
+        expire_connections (GetDataConnections): Limit to these KeyHash
+            lookups; None checks every row.
+        executor (Optional[Executor]): Expire the databases in parallel.
 
     Returns:
+        int: The number of rows deleted.
+    """
+    if expire_connections is None:
+        batches = [(db_name, None) for db_name in metadata.topology.databases]
+    else:
+        batches = list(db_data(expire_connections))
 
-    Raises:
+    def process(db_name, data):
+        return expire_database(db_name, data, metadata, manager, deadline)
+
+    return sum(
+        expired for _, expired in fan_out_batches(process, batches, executor)
+    )
+
+
+def is_expired(expires_at: Optional[StrictInt], deadline: StrictInt) -> bool:
+    """Return True if a row with this expires_at is expired at the deadline."""
+    return expires_at is not None and expires_at <= deadline
+
+
+def get_stored(
+    connection: Connection,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> Optional[tuple]:
+    """get_stored
+
+    Get the LiteStashData and expires_at for a given key. A row past its
+    expires_at is treated as missing and its hash key is handed to reap.
+
+    Returns:
+        tuple: The LiteStashData and its expires_at, or None if not found.
+    """
+    key_hash, table, session = connection
+    query = get_query(key_hash, table)
+    with session() as get_data_session:
+        result = get_data_session.execute(query).first()
+        get_data_session.commit()
+    if not result:
+        return None
+    if is_expired(result.expires_at, get_deadline()):
+        if reap is not None:
+            reap(key_hash)
+        return None
+    return LiteStashData(key=result.key, value=result.value), result.expires_at
+
+
+def get_data(
+    connection: Connection,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> Optional[LiteStashData]:
+    """get_data
 
+    Get the LiteStashData for a given key.
+
+    Args:
+        connection (Connection): The hash key, table and session.
+        reap (Optional[Callable]): Called with the hash key of an expired
+            row, which is returned as None.
+
+    Returns:
+        LiteStashData: The key and value, or None if not found or expired.
     """
     try:
-        key_hash, table, session = connection
-        query = get_query(key_hash, table)
-        with session() as get_data_session:
-            result = get_data_session.execute(query).first()
-            get_data_session.commit()
-        if result:
-            return LiteStashData(
-                key=result[1],
-                value=orjson.dumps(result[2])
-            )
+        stored = get_stored(connection, reap)
+        if stored:
+            return stored[0]
         else: return None
 
     except ValidationError as invalid:
@@ -453,6 +956,7 @@ def get_data(connection: Connection) -> Optional[LiteStashData]:
         logger.error('Unknown excetion: %s', error)
         raise
 
+
 def get_time_data(connection: Connection) -> GetTime:
     """get time
 
@@ -556,22 +1060,502 @@ def get_values(session: Session, table: Table) -> list[dict]:
     return values
 
 
-def does_exist(connection: Connection) -> StrictBool:
-    """does_exists
+def get_chunk_size(chunk_size: Optional[StrictInt] = None) -> StrictInt:
+    """Return the rows to fetch per chunk, the default if None.
 
+    Raises:
+        ValueError: If chunk_size is not a positive integer.
+    """
+    if chunk_size is None:
+        return Utils.chunk_size()
+    if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) \
+            or chunk_size < 1:
+        logger.error('%s: %s', StashError.CHUNK_SIZE.value, chunk_size)
+        raise ValueError(StashError.CHUNK_SIZE.value)
+    return chunk_size
+
+
+def page_table(session: Session,
+               table: Table,
+               columns: List[StrictStr],
+               after: StrictStr,
+               limit: StrictInt,
+               deadline: StrictInt,
+               match: Optional[StrictStr] = None) -> list:
+    """Reads the next page of unexpired rows of a table in key_hash order.
+
+    One short select seeks past `after` on the primary key, so no cursor or
+    read transaction is left open between pages.
+
+    Args:
+        session: The SQLAlchemy session factory of the table's database.
+        table: The SQLAlchemy Table object to query.
+        columns (List[str]): The names of the columns to select.
+        after (str): The last key_hash already read, '' for the first page.
+        limit (int): The most rows to read.
+        deadline (int): Leave out rows expired at this Unix time in
+            microseconds.
+        match (str): A GLOB pattern; each row then ends with whether its key
+            matches, so rows that do not match are still counted.
 
+    Returns:
+        list: Rows of the key_hash followed by the selected columns.
     """
-    query_data, table, session = connection
+    key_hash = table.c[C.HASH.value]
+    expires_at = table.c[C.EXPIRES_AT.value]
+    selected = [table.c[column] for column in columns]
+    if match is not None:
+        selected.append(table.c[C.KEY.value].op('GLOB')(match))
     query = (
-        select(table).where(table.c.key_hash == query_data.key_hash)
+        select(key_hash, *selected)
+        .where(key_hash > after)
+        .where(or_(expires_at.is_(None), expires_at > deadline))
+        .order_by(key_hash)
+        .limit(limit)
+    )
+    with session() as page_session:
+        return page_session.execute(query).all()
+
+
+def stream_table(session: Session,
+                 table: Table,
+                 columns: List[StrictStr],
+                 chunk_size: Optional[StrictInt] = None,
+                 deadline: Optional[StrictInt] = None) -> Iterator[tuple]:
+    """Streams the unexpired rows of a table in key_hash order.
+
+    Each chunk is one `page_table` select, so memory is bounded by
+    chunk_size and nothing is held open while the caller consumes the rows.
+
+    Args:
+        session: The SQLAlchemy session factory of the table's database.
+        table: The SQLAlchemy Table object to query.
+        columns (List[str]): The names of the columns to select.
+        chunk_size (int): The rows fetched per chunk.
+        deadline (int): Leave out rows expired at this Unix time in
+            microseconds; defaults to now.
+
+    Yields:
+        tuple: The selected columns of each unexpired row.
+    """
+    chunk_size = get_chunk_size(chunk_size)
+    if deadline is None:
+        deadline = get_deadline()
+    last = ''
+    while True:
+        rows = page_table(session, table, columns, last, chunk_size, deadline)
+        for row in rows:
+            yield tuple(row[1:])
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def scan_order(topology: Optional[Topology] = None) -> List[tuple]:
+    """Return the (db_name, table_name) of every table in scan order."""
+    return (PREFIX_TOPOLOGY if topology is None else topology).scan_order()
+
+
+def mk_scan_cursor(db_name: StrictStr,
+                   table_name: StrictStr,
+                   key_hash: StrictStr) -> StrictStr:
+    """Encode the position of a scan as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(
+        orjson.dumps([db_name, table_name, key_hash])
+    ).decode()
+
+
+def read_scan_cursor(cursor: Optional[StrictStr],
+                     topology: Optional[Topology] = None) -> tuple:
+    """Decode a scan cursor.
+
+    Returns:
+        tuple: The index of the table in `scan_order` and the last key_hash
+        read from it.
+
+    Raises:
+        ValueError: If the cursor was not made by `mk_scan_cursor`.
+    """
+    if cursor is None or cursor == ScanConf.start():
+        return 0, ''
+    try:
+        db_name, table_name, key_hash = orjson.loads(
+            base64.urlsafe_b64decode(cursor)
+        )
+        if not isinstance(key_hash, str):
+            raise TypeError(key_hash)
+        return scan_order(topology).index((db_name, table_name)), key_hash
+    except (TypeError, ValueError) as error:
+        logger.error('%s: %s %s', ScanConf.cursor_error(), cursor, error)
+        raise ValueError(ScanConf.cursor_error()) from error
+
+
+def scan_tables(metadata: Metadata,
+                manager: Manager,
+                cursor: Optional[StrictStr] = None,
+                match: Optional[StrictStr] = None,
+                count: Optional[StrictInt] = None) -> tuple:
+    """Reads the next keys of a scan over every table.
+
+    At most `count` unexpired rows are read, so one call is a bounded unit
+    of work; keys not matching the GLOB pattern `match` are read but left
+    out, and a call may return fewer keys than count or none at all. SQLite
+    matches the pattern, as it does for `match_keys`.
+
+    Args:
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        cursor (str): The cursor returned by the previous call, or
+            ScanConf.START to begin.
+        match (str): A GLOB pattern the keys must match.
+        count (int): The most rows to read.
+
+    Returns:
+        tuple: The cursor for the next call, ScanConf.START once every table
+        has been read, and the list of keys.
+
+    Raises:
+        ValueError: If the cursor or count is invalid.
+    """
+    if count is None:
+        count = ScanConf.count()
+    if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+        logger.error('%s: %s', ScanConf.count_error(), count)
+        raise ValueError(ScanConf.count_error())
+    position, last = read_scan_cursor(cursor, metadata.topology)
+    tables = scan_order(metadata.topology)
+    deadline = get_deadline()
+    keys = []
+    examined = 0
+    while position < len(tables) and examined < count:
+        db_name, table_name = tables[position]
+        limit = count - examined
+        rows = page_table(get_reader(db_name, manager),
+                          metadata.get(db_name).metadata.tables[table_name],
+                          [C.KEY.value],
+                          last,
+                          limit,
+                          deadline,
+                          match)
+        examined += len(rows)
+        keys.extend(row[1] for row in rows if match is None or row[2])
+        if len(rows) < limit:
+            position += 1
+            last = ''
+        else:
+            last = rows[-1][0]
+    if position == len(tables):
+        return ScanConf.start(), keys
+    return mk_scan_cursor(*tables[position], last), keys
+
+
+def key_range(prefix: Optional[StrictStr] = None,
+              pattern: Optional[StrictStr] = None) -> tuple:
+    """Return the bounds of the key index holding every match.
+
+    The literal start of a glob pattern, up to its first wildcard, is a
+    prefix too; when one prefix extends the other the longer one bounds the
+    range, and when they differ no key can match.
+
+    Returns:
+        tuple: The lowest key and the first key past the range, or None if
+        the range is open ended; equal bounds for an empty range.
+
+    Raises:
+        TypeError: If the prefix or pattern is not a string.
+    """
+    for value in (prefix, pattern):
+        if value is not None and not isinstance(value, str):
+            logger.error('%s: %s', StashError.MATCH_TYPE.value, type(value))
+            raise TypeError(StashError.MATCH_TYPE.value)
+    low = prefix or ''
+    if pattern:
+        literal = pattern
+        for wildcard in ScanConf.glob():
+            literal = literal.split(wildcard, 1)[0]
+        if literal.startswith(low):
+            low = literal
+        elif not low.startswith(literal):
+            return low, low
+    high = low
+    while high:
+        code = ord(high[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            code = 0xE000
+        if code <= 0x10FFFF:
+            high = high[:-1] + chr(code)
+            break
+        high = high[:-1]
+    return low, high or None
+
+
+def match_query(table: Table,
+                columns: List[StrictStr],
+                low: StrictStr,
+                high: Optional[StrictStr],
+                pattern: Optional[StrictStr],
+                after: Optional[StrictStr],
+                limit: StrictInt,
+                deadline: StrictInt):
+    """Return the select of the next page of rows in a key index range."""
+    key = table.c[C.KEY.value]
+    expires_at = table.c[C.EXPIRES_AT.value]
+    query = (
+        select(*(table.c[column] for column in columns))
+        .where(key > after if after is not None else key >= low)
+        .where(or_(expires_at.is_(None), expires_at > deadline))
+        .order_by(key)
+        .limit(limit)
+    )
+    if high is not None:
+        query = query.where(key < high)
+    if pattern is not None:
+        query = query.where(key.op('GLOB')(pattern))
+    return query
+
+
+def match_table(session: Session,
+                table: Table,
+                prefix: Optional[StrictStr] = None,
+                pattern: Optional[StrictStr] = None,
+                chunk_size: Optional[StrictInt] = None,
+                deadline: Optional[StrictInt] = None) -> Iterator[StrictStr]:
+    """Streams the unexpired keys of a table that match in key order.
+
+    Each chunk is one range scan on the unique key index, seeking past the
+    last key read, so only the matching part of the index is visited.
+
+    Args:
+        session: The SQLAlchemy session factory of the table's database.
+        table: The SQLAlchemy Table object to query.
+        prefix (str): The keys must start with this prefix.
+        pattern (str): The keys must match this glob pattern.
+        chunk_size (int): The keys fetched per chunk.
+        deadline (int): Leave out keys expired at this Unix time in
+            microseconds; defaults to now.
+
+    Yields:
+        str: Each matching key.
+    """
+    chunk_size = get_chunk_size(chunk_size)
+    if deadline is None:
+        deadline = get_deadline()
+    low, high = key_range(prefix, pattern)
+    if low == high:
+        return
+    last = None
+    while True:
+        query = match_query(table, [C.KEY.value], low, high, pattern, last,
+                            chunk_size, deadline)
+        with session() as match_session:
+            keys = match_session.execute(query).scalars().all()
+        yield from keys
+        if len(keys) < chunk_size:
+            return
+        last = keys[-1]
+
+
+def match_keys(metadata: Metadata,
+               manager: Manager,
+               prefix: Optional[StrictStr] = None,
+               pattern: Optional[StrictStr] = None,
+               executor: Optional[Executor] = None) -> Iterator[StrictStr]:
+    """Returns a generator of the unexpired keys matching a prefix or pattern.
+
+    Every table of a database is range scanned by `match_table` and the
+    keys are streamed one chunk at a time. With an executor every database
+    reads its next chunk in parallel while the chunks before it are
+    yielded, so at most two chunks of each database are held at once.
+
+    Args:
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        prefix (str): The keys must start with this prefix.
+        pattern (str): The keys must match this GLOB pattern.
+        executor (Optional[Executor]): Scan the databases in parallel.
+
+    Raises:
+        TypeError: If the prefix or pattern is not a string.
+    """
+    key_range(prefix, pattern)
+    deadline = get_deadline()
+    def scan(db_name, table_names):
+        session = get_reader(db_name, manager)
+        tables = metadata.get(db_name).metadata.tables
+        for table_name in table_names:
+            yield from match_table(session,
+                                   tables[table_name],
+                                   prefix,
+                                   pattern,
+                                   Utils.batch_size(),
+                                   deadline)
+    batches = [
+        (db_name, metadata.topology.table_names(db_name))
+        for db_name in metadata.topology.databases
+    ]
+    if executor is None or len(batches) < 2:
+        return (
+            key
+            for db_name, table_names in batches
+            for key in scan(db_name, table_names)
+        )
+    def read_chunk(keys):
+        return list(islice(keys, Utils.batch_size()))
+    def prefetch():
+        scans = [scan(db_name, table_names) for db_name, table_names in batches]
+        ahead = [executor.submit(read_chunk, keys) for keys in scans]
+        for index, keys in enumerate(scans):
+            while True:
+                chunk = ahead[index].result()
+                if len(chunk) == Utils.batch_size():
+                    ahead[index] = executor.submit(read_chunk, keys)
+                yield from chunk
+                if len(chunk) < Utils.batch_size():
+                    break
+    return prefetch()
+
+
+def sorted_table(session: Session,
+                 table: Table,
+                 start_key: Optional[StrictStr] = None,
+                 end_key: Optional[StrictStr] = None,
+                 chunk_size: Optional[StrictInt] = None,
+                 deadline: Optional[StrictInt] = None) -> Iterator[tuple]:
+    """Streams the unexpired (key, value) rows of a table in key order.
+
+    Each chunk is one range scan on the unique key index that seeks past
+    the last key read.
+
+    Args:
+        session: The SQLAlchemy session factory of the table's database.
+        table: The SQLAlchemy Table object to query.
+        start_key (str): The first key of the range, inclusive.
+        end_key (str): The end of the range, exclusive.
+        chunk_size (int): The rows fetched per chunk.
+        deadline (int): Leave out rows expired at this Unix time in
+            microseconds; defaults to now.
+
+    Yields:
+        tuple: The key and value of each row.
+    """
+    chunk_size = get_chunk_size(chunk_size)
+    if deadline is None:
+        deadline = get_deadline()
+    columns = [C.KEY.value, C.VALUE.value]
+    last = None
+    while True:
+        query = match_query(table, columns, start_key or '', end_key, None,
+                            last, chunk_size, deadline)
+        with session() as sorted_session:
+            rows = sorted_session.execute(query).all()
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def merge_sorted(metadata: Metadata,
+                 manager: Manager,
+                 start_key: Optional[StrictStr] = None,
+                 end_key: Optional[StrictStr] = None,
+                 chunk_size: Optional[StrictInt] = None
+                 ) -> Iterator[LiteStashData]:
+    """Returns a generator of the unexpired data of every table in key order.
+
+    Keys are spread over the tables by hash, so each table is read in key
+    order by `sorted_table` and the tables are merged lazily with a heap.
+    Only one chunk per table is held at a time.
+
+    Args:
+        metadata (Metadata): The LiteStash metadata for all databases.
+        manager (Manager): The LiteStash session factories.
+        start_key (str): The first key of the range, inclusive.
+        end_key (str): The end of the range, exclusive.
+        chunk_size (int): The rows fetched per table per chunk.
+
+    Raises:
+        TypeError: If start_key or end_key is not a string.
+        ValueError: If chunk_size is not a positive integer.
+    """
+    for key in (start_key, end_key):
+        if key is not None and not isinstance(key, str):
+            logger.error('%s: %s', StashError.KEY_TYPE.value, type(key))
+            raise TypeError(StashError.KEY_TYPE.value)
+    chunk_size = get_chunk_size(chunk_size)
+    deadline = get_deadline()
+    tables = [
+        sorted_table(get_reader(db_name, manager),
+                     metadata.get(db_name).metadata.tables[table_name],
+                     start_key,
+                     end_key,
+                     chunk_size,
+                     deadline)
+        for db_name, table_name in scan_order(metadata.topology)
+    ]
+    return (
+        LiteStashData(key=key, value=value)
+        for key, value in merge(*tables, key=lambda row: row[0])
+    )
+
+
+def count_database(db_name: StrictStr, manager: Manager) -> tuple:
+    """Read the trigger-maintained row count of each table of a database.
+
+    Returns:
+        tuple: The database name and the row count of each table name.
+    """
+    session = get_reader(db_name, manager)
+    with session() as count_session:
+        counts = dict(count_session.execute(text(CountSql.counts())).all())
+    return db_name, counts
+
+
+def count_data(manager: Manager,
+               executor: Optional[Executor] = None) -> Dict[str, Dict]:
+    """Read the row counters of every database.
+
+    Each database answers from its small counter table, so the cost does not
+    grow with the number of rows. Expired rows count until they are deleted.
+
+    Args:
+        manager (Manager): The LiteStash session factories.
+        executor (Optional[Executor]): Read the databases in parallel.
+
+    Returns:
+        Dict[str, Dict[str, int]]: The row count of each table of each
+        database.
+    """
+    def process(db_name, _):
+        return count_database(db_name, manager)
+    batches = [(db_name, None) for db_name in manager.topology.databases]
+    return dict(fan_out_batches(process, batches, executor))
+
+
+def does_exist(
+    connection: Connection,
+    reap: Optional[Callable[[StrictStr], None]] = None
+) -> StrictBool:
+    """does_exists
+
+    A row past its expires_at does not exist and its hash key is handed to
+    reap.
+    """
+    key_hash, table, session = connection
+    query = (
+        select(table.c.key_hash, table.c.expires_at)
+        .where(table.c.key_hash == key_hash)
     )
     with session() as exist_session:
         data = exist_session.execute(query).first()
         exist_session.commit()
-    if data:
-        return True
-    else:
+    if data is None:
+        return False
+    if is_expired(data.expires_at, get_deadline()):
+        if reap is not None:
+            reap(key_hash)
         return False
+    return True
 
 
 def delete_data(connection: Connection) -> None:
@@ -0,0 +1,278 @@
+"""LiteStash Reshard Utilities
+
+Provides functions that move the rows of a LiteStash from the layout of one
+topology to another while the store keeps serving: the tables of the new
+layout are prepared up front, the rows of each previous table move in
+chunked transactions, and the previous layout is dropped at the end.
+
+Functions:
+
+- `mk_migration`: Opens the previous layout of a running reshard.
+- `prepare_layout`: Creates the new tables in databases both layouts share.
+- `previous_connection`: Routes a hash key to its previous table.
+- `move_query`: Returns the insert that leaves newer rows in place.
+- `move_chunk`: Moves the next chunk of rows of one previous table.
+- `migrate_table`: Moves every unexpired row of one previous table.
+- `remove_database`: Deletes the files of a database.
+- `drop_previous`: Drops what only the previous layout used.
+
+Classes:
+
+- `Migration`: Namedtuple of the previous topology, its metadata and session
+    factories, and the lock shared by moves and deletes.
+"""
+from collections import namedtuple
+from pathlib import Path
+from threading import Lock
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from pydantic import StrictInt
+from pydantic import StrictStr
+
+from sqlalchemy import delete
+from sqlalchemy import Table
+from sqlalchemy.dialects.sqlite import insert
+
+from litestash.core.config.litestash_conf import MigrationAttr
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.litestash_conf import Utils
+from litestash.core.config.schema_conf import ColumnFields as C
+from litestash.core.engine import Engine
+from litestash.core.schema import Metadata
+from litestash.core.session import Session as Manager
+from litestash.core.topology import Topology
+from litestash.core.util.connection_util import GetConnection
+from litestash.core.util.core_util import upgrade_schema
+from litestash.core.util.litestash_util import chunks
+from litestash.core.util.litestash_util import get_chunk_size
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.util.litestash_util import page_table
+from litestash.logging import root_logger as logger
+
+
+Migration = namedtuple(
+    MigrationAttr.TYPE_NAME.value,
+    [
+        MigrationAttr.TOPOLOGY.value,
+        MigrationAttr.METADATA.value,
+        MigrationAttr.DB_SESSION.value,
+        MigrationAttr.LOCK.value
+    ]
+)
+Migration.__doc__ = MigrationAttr.DOC.value
+
+
+MOVE_COLUMNS = [
+    C.KEY.value,
+    C.VALUE.value,
+    C.TIMESTAMP.value,
+    C.MICROSECOND.value,
+    C.EXPIRES_AT.value
+]
+"""The columns copied after the key_hash of a moved row."""
+
+
+def mk_migration(engine: Engine, previous: Topology) -> Migration:
+    """Opens the previous layout of a reshard on the engines of the store."""
+    previous_engine = engine.with_topology(previous)
+    metadata = Metadata(previous_engine)
+    return Migration(previous,
+                     metadata,
+                     Manager(previous_engine, metadata),
+                     Lock())
+
+
+def prepare_layout(engine: Engine,
+                   metadata: Metadata,
+                   previous: Topology) -> None:
+    """Creates the new tables in the databases named by both topologies.
+
+    Those databases are already at the current schema version, so opening
+    them would not create the tables the new topology adds.
+    """
+    for db_name in metadata.topology.databases:
+        if db_name not in previous.databases:
+            continue
+        engine_stash = engine.get(db_name)
+        tables = metadata.get(db_name).metadata
+        tables.create_all(bind=engine_stash.engine, checkfirst=True)
+        upgrade_schema(engine_stash, tables)
+        logger.debug('prepared the new tables of %s', db_name)
+
+
+def previous_connection(key_hash: StrictStr,
+                        migration: Migration,
+                        write: bool = False) -> GetConnection:
+    """Returns the connection of a hash key to its table in the previous
+    layout, on the writer session with write or a reader session otherwise.
+    """
+    route = migration.topology.route(key_hash)
+    tables = migration.metadata.get(route.db_name).metadata.tables
+    sessions = migration.db_session.get(route.db_name)
+    return GetConnection(key_hash,
+                         tables[route.table_name],
+                         sessions.session if write else sessions.reader)
+
+
+def move_query(table: Table):
+    """Return the insert of moved rows that keeps a row already there.
+
+    A row in the new layout was written after the reshard started, so it is
+    newer than the row being moved.
+    """
+    return insert(table).on_conflict_do_nothing()
+
+
+def move_chunk(db_name: StrictStr,
+               table_name: StrictStr,
+               after: StrictStr,
+               limit: StrictInt,
+               metadata: Metadata,
+               manager: Manager,
+               migration: Migration) -> Tuple[str, int, bool]:
+    """Moves the next chunk of unexpired rows of a previous table.
+
+    The rows are inserted with one transaction per new database, then
+    deleted from the previous table in one more. Rows whose route did not
+    change stay where they are. The migration lock is held throughout, so a
+    delete cannot slip between the copy and the removal of a row.
+
+    Args:
+        db_name (str): The database of the previous table.
+        table_name (str): The previous table.
+        after (str): The last key_hash already moved, '' for the first chunk.
+        limit (int): The most rows read.
+        metadata (Metadata): The tables of the new topology.
+        manager (Manager): The session factories of the new topology.
+        migration (Migration): The previous layout.
+
+    Returns:
+        tuple: The last key_hash read, the rows moved and True once the
+        table has no rows left after it.
+    """
+    table = migration.metadata.get(db_name).metadata.tables[table_name]
+    sessions = migration.db_session.get(db_name)
+    keys = [C.HASH.value, *MOVE_COLUMNS]
+    with migration.lock:
+        rows = page_table(sessions.reader,
+                          table,
+                          MOVE_COLUMNS,
+                          after,
+                          limit,
+                          get_deadline())
+        moves: Dict[str, Dict[str, List[dict]]] = {}
+        for row in rows:
+            route = metadata.topology.route(row[0])
+            if route.db_name == db_name and route.table_name == table_name:
+                continue
+            moves.setdefault(route.db_name, {}).setdefault(
+                route.table_name, []
+            ).append(dict(zip(keys, row)))
+
+        moved = []
+        for new_db, tables in moves.items():
+            new_tables = metadata.get(new_db).metadata.tables
+            session = manager.get(new_db).session
+            with session() as move_session:
+                for new_table, entries in tables.items():
+                    query = move_query(new_tables[new_table])
+                    for batch in chunks(entries, Utils.batch_size()):
+                        move_session.execute(query, batch)
+                    moved.extend(entry[C.HASH.value] for entry in entries)
+                move_session.commit()
+
+        if moved:
+            with sessions.session() as delete_session:
+                for chunk in chunks(moved):
+                    delete_session.execute(
+                        delete(table).where(table.c.key_hash.in_(chunk))
+                    )
+                delete_session.commit()
+    last = rows[-1][0] if rows else after
+    return last, len(moved), len(rows) < limit
+
+
+def migrate_table(db_name: StrictStr,
+                  table_name: StrictStr,
+                  metadata: Metadata,
+                  manager: Manager,
+                  migration: Migration,
+                  chunk_size: Optional[StrictInt] = None) -> StrictInt:
+    """Moves every unexpired row of a previous table, a chunk at a time.
+
+    Returns:
+        int: The number of rows moved.
+
+    Raises:
+        ValueError: If chunk_size is not a positive integer.
+    """
+    chunk_size = get_chunk_size(chunk_size)
+    after = ''
+    total = 0
+    done = False
+    while not done:
+        after, moved, done = move_chunk(db_name,
+                                        table_name,
+                                        after,
+                                        chunk_size,
+                                        metadata,
+                                        manager,
+                                        migration)
+        total += moved
+    logger.debug('moved %s rows out of %s', total, table_name)
+    return total
+
+
+def remove_database(data: Path, db_name: StrictStr) -> None:
+    """Deletes the database files of db_name and its empty directory."""
+    directory = data / db_name
+    for file_name in TopologyConf.db_files(db_name):
+        (directory / file_name).unlink(missing_ok=True)
+    try:
+        directory.rmdir()
+    except OSError as error:
+        logger.warning('kept %s: %s', directory, error)
+    logger.debug('removed database %s', db_name)
+
+
+def drop_previous(engine: Engine,
+                  metadata: Metadata,
+                  migration: Migration,
+                  data: Optional[Path] = None) -> None:
+    """Drops the tables and databases that only the previous layout used.
+
+    A database of both topologies loses only the previous tables. Any other
+    previous database is closed, and its files are deleted from the data
+    directory, or its tables dropped when the store is in memory.
+
+    Args:
+        engine (Engine): The engines of the store.
+        metadata (Metadata): The tables of the new topology.
+        migration (Migration): The previous layout.
+        data (Path): The data directory of databases without a placement,
+            None in memory.
+    """
+    for db_name in migration.topology.databases:
+        if db_name in metadata.topology.databases:
+            keep = metadata.topology.table_names(db_name)
+            tables = migration.metadata.get(db_name).metadata.tables
+            bind = engine.get(db_name).engine
+            for table_name, table in tables.items():
+                if table_name not in keep:
+                    table.drop(bind=bind, checkfirst=True)
+            continue
+        if data is None:
+            if db_name in migration.metadata.opened():
+                migration.metadata.get(db_name).metadata.drop_all(
+                    bind=engine.get(db_name).engine
+                )
+            engine.dispose([db_name])
+        else:
+            engine.dispose([db_name])
+            remove_database(
+                Path(migration.topology.directory(db_name, data)), db_name
+            )
+    logger.info('dropped the previous layout %s', migration.topology)
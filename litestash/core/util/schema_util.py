@@ -1,14 +1,19 @@
 """LiteStash Schema Utilities
 
 Provides functions for generating table names and creating SQLAlchemy tables
-for the LiteStash key-value store.
+for the LiteStash key-value store, and the precomputed `ROUTES` table that
+maps each hash prefix character to its database and table.
 """
+from collections import namedtuple
 from sqlalchemy import Table
 from sqlalchemy import MetaData
+from typing import Dict
 from typing import Generator
-from litestash.core.util import prefix_util
+from typing import Iterable
+from typing import Optional
 from litestash.core.util import table_util
 from litestash.core.config.root import Tables
+from litestash.core.config.litestash_conf import RouteAttr
 from litestash.core.config.litestash_conf import Utils
 from litestash.core.util.table_util import mk_columns
 from litestash.core.config.tables.tables_03 import Tables03
@@ -94,18 +99,24 @@ def mk_table_names(db_name: str) -> Generator[str, None, None]:
         case _:
             raise ValueError(Utils.DB_NAME_ERROR.value)
 
-def mk_tables(db_name: str, metadata: MetaData) -> MetaData:
+def mk_tables(db_name: str,
+              metadata: MetaData,
+              table_names: Optional[Iterable[str]] = None) -> MetaData:
     """
     Creates SQLAlchemy Table objects for the specified database.
 
     Args:
         db_name: The name of the database.
         metadata: The SQLAlchemy MetaData object to associate the tables with.
+        table_names: The tables of the database; defaults to the prefix
+        tables of db_name.
 
     Returns:
         MetaData: The updated MetaData object containing the created tables.
     """
-    for table_name in mk_table_names(db_name):
+    if table_names is None:
+        table_names = mk_table_names(db_name)
+    for table_name in table_names:
         Table(
             table_name,
             metadata,
@@ -114,73 +125,90 @@ def mk_tables(db_name: str, metadata: MetaData) -> MetaData:
     return metadata
 
 
-def get_db_name(char: str) -> str:
+Route = namedtuple(
+    RouteAttr.TYPE_NAME.value,
+    [
+        RouteAttr.DB_NAME.value,
+        RouteAttr.TABLE_NAME.value,
+        RouteAttr.TABLE.value
+    ]
+)
+Route.__doc__ = RouteAttr.DOC.value
+
+
+def mk_routes() -> Dict[str, Route]:
+    """Maps every hash prefix character to its database and table.
+
+    Returns:
+        Dict[str, Route]: A Route for each of the 64 base64url characters.
     """
-    Determines the database name based on the given character.
+    routes = {}
+    for db_name, table_class in (
+        (Tables.TABLES_03.value, Tables03),
+        (Tables.TABLES_47.value, Tables47),
+        (Tables.TABLES_89HU.value, Tables89hu),
+        (Tables.TABLES_AB.value, TablesAB),
+        (Tables.TABLES_CD.value, TablesCD),
+        (Tables.TABLES_EF.value, TablesEF),
+        (Tables.TABLES_GH.value, TablesGH),
+        (Tables.TABLES_IJ.value, TablesIJ),
+        (Tables.TABLES_KL.value, TablesKL),
+        (Tables.TABLES_MN.value, TablesMN),
+        (Tables.TABLES_OP.value, TablesOP),
+        (Tables.TABLES_QR.value, TablesQR),
+        (Tables.TABLES_ST.value, TablesST),
+        (Tables.TABLES_UV.value, TablesUV),
+        (Tables.TABLES_WX.value, TablesWX),
+        (Tables.TABLES_YZ.value, TablesYZ),
+    ):
+        for table in table_class:
+            routes[table.value] = Route(
+                db_name,
+                table_class.get_table_name(table.value),
+                table
+            )
+    return routes
+
+
+ROUTES = mk_routes()
+"""The Route of each hash prefix character, built once at import."""
+
+
+def get_route(char: str) -> Route:
+    """
+    Gets the database and table for the given hash prefix character.
 
     Args:
-        char: The character to match against table prefixes.
+        char: The first character of a key hash.
 
     Returns:
-        The name of the database corresponding to the character.
+        Route: The database name, table name and Table of the character.
 
     Raises:
         ValueError: If the character doesn't match any valid table prefix.
     """
-    if len(char) != 1:
-        raise ValueError(Utils.INVALID_CHAR_LENGTH.value)
-
-    match char:
-        case char if char in prefix_util.tables_03():
-            return Tables.TABLES_03.value
-
-        case char if char in prefix_util.tables_47():
-            return Tables.TABLES_47.value
-
-        case char if char in prefix_util.tables_89hu():
-            return Tables.TABLES_89HU.value
-
-        case char if char in prefix_util.tables_ab():
-            return Tables.TABLES_AB.value
+    try:
+        return ROUTES[char]
+    except (KeyError, TypeError) as error:
+        if not isinstance(char, str) or len(char) != 1:
+            raise ValueError(Utils.INVALID_CHAR_LENGTH.value) from error
+        raise ValueError(Utils.DB_NAME_ERROR.value) from error
 
-        case char if char in prefix_util.tables_cd():
-            return Tables.TABLES_CD.value
 
-        case char if char in prefix_util.tables_ef():
-            return Tables.TABLES_EF.value
-
-        case char if char in prefix_util.tables_gh():
-            return Tables.TABLES_GH.value
-
-        case char if char in prefix_util.tables_ij():
-            return Tables.TABLES_IJ.value
-
-        case char if char in prefix_util.tables_kl():
-            return Tables.TABLES_KL.value
-
-        case char if char in prefix_util.tables_mn():
-            return Tables.TABLES_MN.value
-
-        case char if char in prefix_util.tables_op():
-            return Tables.TABLES_OP.value
-
-        case char if char in prefix_util.tables_qr():
-            return Tables.TABLES_QR.value
-
-        case char if char in prefix_util.tables_st():
-            return Tables.TABLES_ST.value
-
-        case char if char in prefix_util.tables_uv():
-            return Tables.TABLES_UV.value
+def get_db_name(char: str) -> str:
+    """
+    Determines the database name based on the given character.
 
-        case char if char in prefix_util.tables_wx():
-            return Tables.TABLES_WX.value
+    Args:
+        char: The character to match against table prefixes.
 
-        case char if char in prefix_util.tables_yz():
-            return Tables.TABLES_YZ.value
+    Returns:
+        The name of the database corresponding to the character.
 
-        case _:
-            raise ValueError(Utils.DB_NAME_ERROR.value)
+    Raises:
+        ValueError: If the character doesn't match any valid table prefix.
+    """
+    return get_route(char).db_name
 
 
 def get_table_name(char: str) -> str:
@@ -196,57 +224,4 @@ def get_table_name(char: str) -> str:
     Raises:
         ValueError: If the character doesn't match any valid table prefix.
     """
-    if len(char) != 1:
-        raise ValueError(Utils.INVALID_CHAR_LENGTH.value)
-
-    match char:
-        case char if char in Tables03:
-            return Tables03.get_table_name(char)
-
-        case char if char in Tables47:
-            return Tables47.get_table_name(char)
-
-        case char if char in Tables89hu:
-            return Tables89hu.get_table_name(char)
-
-        case char if char in TablesAB :
-            return TablesAB.get_table_name(char)
-
-        case char if char in TablesCD :
-            return TablesCD.get_table_name(char)
-
-        case char if char in TablesEF :
-            return TablesEF.get_table_name(char)
-
-        case char if char in TablesGH:
-            return TablesGH.get_table_name(char)
-
-        case char if char in TablesIJ:
-            return TablesIJ.get_table_name(char)
-
-        case char if char in TablesKL:
-            return TablesKL.get_table_name(char)
-
-        case char if char in TablesMN:
-            return TablesMN.get_table_name(char)
-
-        case char if char in TablesOP:
-            return TablesOP.get_table_name(char)
-
-        case char if char in TablesQR:
-            return TablesQR.get_table_name(char)
-
-        case char if char in TablesST:
-            return TablesST.get_table_name(char)
-
-        case char if char in TablesUV:
-            return TablesUV.get_table_name(char)
-
-        case char if char in TablesWX:
-            return TablesWX.get_table_name(char)
-
-        case char if char in TablesYZ:
-            return TablesYZ.get_table_name(char)
-
-        case _:
-            raise ValueError(Utils.DB_NAME_ERROR.value)
+    return get_route(char).table_name
@@ -203,6 +203,20 @@ def mk_microseconds_column() -> Column:
     return get_column(ms)
 
 
+def mk_expires_at_column() -> Column:
+    """Returns a SQLAlchemy Column for the indexed 'expires_at' column.
+
+    Holds the Unix time in microseconds after which the row is expired, or
+    NULL for data that never expires.
+    """
+    expires_at = StashColumn(
+        name=Col.EXPIRES_AT.value,
+        type_=Conf.INT.value,
+        index=True
+    )
+    return get_column(expires_at)
+
+
 def mk_columns() -> Generator[Column, None, None]:
     """Generates all SQLAlchemy Column objects for a standard LiteStash table.
     """
@@ -211,6 +225,7 @@ def mk_columns() -> Generator[Column, None, None]:
         mk_key_column(),
         mk_value_column(),
         mk_timestamp_column(),
-        mk_microseconds_column()
+        mk_microseconds_column(),
+        mk_expires_at_column()
     ):
         yield column
@@ -0,0 +1,291 @@
+"""LiteStash Topology Utilities
+
+Provides functions for naming the databases and tables of a ring topology,
+building its consistent-hash ring, placing its databases in directories, and
+reading and writing the manifest that records the topology of a data
+directory, and locking the data directory.
+"""
+import os
+import orjson
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from hashlib import blake2b
+from pathlib import Path
+from shutil import disk_usage
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from litestash.core.config.litestash_conf import PlacementConf
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.root import Tables
+from litestash.logging import root_logger as logger
+
+
+def check_shards(shards: int) -> int:
+    """Return shards if it is a valid number of databases."""
+    if (isinstance(shards, bool) or not isinstance(shards, int)
+            or not 1 <= shards <= TopologyConf.max_shards()):
+        logger.error('invalid shards: %s', shards)
+        raise ValueError(TopologyConf.shards_error())
+    return shards
+
+
+def check_tables(tables_per_shard: int) -> int:
+    """Return tables_per_shard if it is a valid number of tables."""
+    if (isinstance(tables_per_shard, bool)
+            or not isinstance(tables_per_shard, int)
+            or not 1 <= tables_per_shard <= TopologyConf.max_tables()):
+        logger.error('invalid tables_per_shard: %s', tables_per_shard)
+        raise ValueError(TopologyConf.tables_error())
+    return tables_per_shard
+
+
+def check_vnodes(vnodes: int) -> int:
+    """Return vnodes if it is a valid number of ring points per database."""
+    if isinstance(vnodes, bool) or not isinstance(vnodes, int) or vnodes < 1:
+        logger.error('invalid vnodes: %s', vnodes)
+        raise ValueError(TopologyConf.vnodes_error())
+    return vnodes
+
+
+def mk_shard_names(shards: int) -> Tuple[str, ...]:
+    """Return the database names of a ring topology with shards databases."""
+    return tuple(TopologyConf.db_name(index) for index in range(shards))
+
+
+def mk_shard_tables(db_name: str, tables_per_shard: int) -> Tuple[str, ...]:
+    """Return the table names of one database of a ring topology."""
+    return tuple(
+        TopologyConf.table_name(db_name, index)
+        for index in range(tables_per_shard)
+    )
+
+
+def ring_point(name: str) -> int:
+    """Return the position of a virtual node on the hash ring."""
+    return int.from_bytes(
+        blake2b(name.encode(), digest_size=TopologyConf.ring_bytes()).digest()
+    )
+
+
+def mk_ring(databases: Tuple[str, ...],
+            vnodes: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Build the consistent-hash ring of the given databases.
+
+    Each database owns vnodes points of the ring. A key belongs to the
+    database of the first point after its own position, so adding a
+    database only moves the keys of the arcs its points take over.
+
+    Returns:
+        tuple: The sorted ring points and the index of the database that
+        owns each point.
+    """
+    ring = sorted(
+        (ring_point(TopologyConf.vnode(db_name, vnode)), owner)
+        for owner, db_name in enumerate(databases)
+        for vnode in range(vnodes)
+    )
+    return (tuple(point for point, _ in ring),
+            tuple(owner for _, owner in ring))
+
+
+def check_directories(directories: Iterable[str]) -> Tuple[str, ...]:
+    """Return the absolute paths of distinct directories."""
+    if isinstance(directories, (str, bytes)) or directories is None:
+        logger.error('invalid directories: %s', directories)
+        raise ValueError(PlacementConf.directories_error())
+    paths = []
+    for directory in directories:
+        if not isinstance(directory, (str, os.PathLike)):
+            logger.error('invalid directory: %s', directory)
+            raise ValueError(PlacementConf.directories_error())
+        path = os.path.abspath(directory)
+        if path in paths:
+            logger.error('repeated directory: %s', directory)
+            raise ValueError(PlacementConf.directories_error())
+        paths.append(path)
+    if not paths:
+        logger.error('no directories given')
+        raise ValueError(PlacementConf.directories_error())
+    return tuple(paths)
+
+
+def check_policy(policy: Optional[str] = None) -> str:
+    """Return the placement policy, round-robin if None."""
+    if policy is None:
+        return PlacementConf.round_robin()
+    if policy not in PlacementConf.policies():
+        logger.error('invalid placement: %s', policy)
+        raise ValueError(PlacementConf.policy_error())
+    return policy
+
+
+def place_databases(databases: Tuple[str, ...],
+                    directories: Tuple[str, ...],
+                    policy: str,
+                    placed: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Assign each database to one of the directories.
+
+    A database in placed keeps its directory. The others go, in order, to
+    the directory with the lowest load: its databases over its weight. The
+    weights are equal for round-robin and the free bytes of each file
+    system for free-space, whose directories are created to measure them.
+
+    Returns:
+        dict: The directory of each database.
+    """
+    placed = placed or {}
+    counts = [0] * len(directories)
+    placement = {}
+    for db_name in databases:
+        if placed.get(db_name) in directories:
+            placement[db_name] = placed[db_name]
+            counts[directories.index(placed[db_name])] += 1
+    if len(placement) == len(databases):
+        return placement
+    weights = [1] * len(directories)
+    if policy == PlacementConf.free_space():
+        for path in directories:
+            Path(path).mkdir(parents=True, exist_ok=True)
+        weights = [max(disk_usage(path).free, 1) for path in directories]
+    for db_name in databases:
+        if db_name in placement:
+            continue
+        index = min(range(len(directories)),
+                    key=lambda i: ((counts[i] + 1) / weights[i], i))
+        placement[db_name] = directories[index]
+        counts[index] += 1
+    logger.debug('placed %s databases by %s', len(placement), policy)
+    return placement
+
+
+def manifest_path(data: str) -> Path:
+    """Return the path of the manifest of a data directory."""
+    return Path(data) / TopologyConf.manifest()
+
+
+def read_manifest(path: Path) -> Optional[Dict]:
+    """Return the manifest stored at path, or None if there is none.
+
+    Raises:
+        ValueError: If the manifest cannot be parsed.
+    """
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        manifest = orjson.loads(content)
+    except orjson.JSONDecodeError as error:
+        logger.error('unreadable manifest %s: %s', path, error)
+        raise ValueError(TopologyConf.manifest_error()) from error
+    if not isinstance(manifest, dict):
+        logger.error('manifest %s is not an object', path)
+        raise ValueError(TopologyConf.manifest_error())
+    return manifest
+
+
+def write_manifest(path: Path, manifest: Dict) -> None:
+    """Write the manifest next to its databases in one atomic rename.
+
+    The new file and then its directory are synced, so after a crash the
+    manifest is either the old one or the whole new one, and a reshard never
+    drops databases that a manifest on disk still names.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temporary, 'wb') as manifest_file:
+        manifest_file.write(
+            orjson.dumps(manifest, option=orjson.OPT_INDENT_2)
+        )
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(temporary, path)
+    sync_directory(path.parent)
+    logger.debug('wrote topology manifest %s', path)
+
+
+def sync_directory(directory: Path) -> None:
+    """Flush the entries of a directory, such as a rename, to disk."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError as error:
+        logger.debug('cannot open %s to sync it: %s', directory, error)
+        return
+    try:
+        os.fsync(fd)
+    except OSError as error:
+        logger.debug('cannot sync %s: %s', directory, error)
+    finally:
+        os.close(fd)
+
+
+def lock_path(data: str) -> Path:
+    """Return the path of the lock file of a data directory."""
+    return Path(data) / TopologyConf.lock()
+
+
+def open_lock(data: str, readonly: bool = False) -> Optional[int]:
+    """Open the lock file of a data directory and hold it shared.
+
+    Without flock, or when a read-only LiteStash finds no lock file it may
+    open, no lock is held.
+
+    Returns:
+        int: The file descriptor holding the lock, or None.
+
+    Raises:
+        ValueError: If a reshard holds the lock.
+    """
+    if fcntl is None:
+        return None
+    flags = os.O_RDONLY if readonly else os.O_RDWR | os.O_CREAT
+    try:
+        fd = os.open(lock_path(data), flags, 0o644)
+    except OSError as error:
+        logger.debug('no lock of %s: %s', data, error)
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        logger.error('%s: %s', TopologyConf.locked_error(), data)
+        raise ValueError(TopologyConf.locked_error()) from None
+    return fd
+
+
+def lock_alone(fd: Optional[int]) -> None:
+    """Turn the shared lock of fd exclusive without waiting.
+
+    Raises:
+        ValueError: If another LiteStash holds the lock too.
+    """
+    if fd is None:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        # A failed conversion may have dropped the shared lock.
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        logger.error('%s', TopologyConf.busy_error())
+        raise ValueError(TopologyConf.busy_error()) from None
+
+
+def lock_shared(fd: Optional[int]) -> None:
+    """Turn the lock of fd back to shared."""
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+
+
+def close_lock(fd: Optional[int]) -> None:
+    """Release the lock held by fd."""
+    if fd is not None:
+        os.close(fd)
+
+
+def has_prefix_layout(data: Path) -> bool:
+    """Return True if the directory already holds prefix routed databases."""
+    return any((data / db_name).exists() for db_name in Tables.slots())
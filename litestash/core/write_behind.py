@@ -0,0 +1,355 @@
+"""LiteStash Write Behind
+
+Provides a buffer of pending LiteStashStore entries for each database that a
+background thread writes as one transaction per database, so a burst of set
+calls costs one commit per database instead of one commit per key.
+"""
+from threading import Condition
+from threading import Lock
+from threading import Thread
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from pydantic import StrictFloat
+from pydantic import StrictInt
+from pydantic import StrictStr
+
+from litestash.core.config.litestash_conf import WriteBehindConf
+from litestash.core.util.connection_util import DataResults
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.util.litestash_util import is_expired
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
+from litestash.logging import root_logger as logger
+from litestash.models import LiteStashData
+from litestash.models import LiteStashStore
+
+
+class WriteBehind:
+    """LiteStash Write Behind
+
+    Holds the pending entries of each database until the database has
+    `flush_size` entries, `flush_interval` seconds pass, or `flush` is called.
+    A later entry for the same key replaces the pending one. Pending and
+    in-flight entries stay visible to `pending` until their transaction has
+    committed, so readers always see their own writes.
+
+    Attributes:
+
+        __slots__ (tuple): A tuple of attribute names for memory optimization.
+
+    Methods:
+
+        put(data): Buffers a LiteStashStore for its database.
+
+        pending(key_hash): Returns the unwritten data of a key hash or None.
+
+        pending_many(key_hashes): Returns the unwritten data of many keys,
+        with None for a pending entry that has expired.
+
+        discard(key_hash): Drops the unwritten data of a key hash.
+
+        flush(): Writes every buffer and returns the DataResults.
+
+        clear(): Drops every unwritten entry.
+
+        use_topology(topology, switch): Routes later entries by another
+        topology.
+
+        after_fork(): Leaves the pending entries of the parent to the parent
+        and restarts the background thread in a child process.
+
+        close(): Flushes and stops the background thread.
+    """
+    __slots__ = (
+        'writer',
+        'flush_size',
+        'flush_interval',
+        'buffers',
+        'inflight',
+        'condition',
+        'flush_lock',
+        'closed',
+        'thread',
+        'topology'
+    )
+
+    def __init__(self,
+                 writer: Callable[[StrictStr, List[LiteStashStore]], tuple],
+                 flush_size: Optional[StrictInt] = None,
+                 flush_interval: Optional[
+                     Union[StrictFloat, StrictInt]
+                 ] = None,
+                 topology: Optional[Topology] = None):
+        """Initializes the buffers and starts the background flusher.
+
+        Args:
+            writer (Callable): Called as writer(db_name, entries) to write the
+                entries of one database in one transaction. Returns the
+                database name, the entries stored, any errors and the
+                BatchResult of each batch.
+            flush_size (int): Pending entries of one database that start a
+                flush.
+            flush_interval (float): Seconds between background flushes.
+            topology (Topology): Routes each key hash to its database;
+                defaults to the prefix topology.
+
+        Raises:
+            ValueError: If the size or interval is not a positive number.
+        """
+        if flush_size is None:
+            flush_size = WriteBehindConf.flush_size()
+        if flush_interval is None:
+            flush_interval = WriteBehindConf.flush_interval()
+        if isinstance(flush_size, bool) or not isinstance(flush_size, int) \
+                or flush_size < 1 \
+                or isinstance(flush_interval, bool) \
+                or not isinstance(flush_interval, (int, float)) \
+                or flush_interval <= 0:
+            logger.error('%s: %s %s',
+                         WriteBehindConf.value_error(),
+                         flush_size,
+                         flush_interval)
+            raise ValueError(WriteBehindConf.value_error())
+
+        self.writer = writer
+        self.topology = PREFIX_TOPOLOGY if topology is None else topology
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffers = {}
+        self.inflight = {}
+        self.condition = Condition()
+        self.flush_lock = Lock()
+        self.closed = False
+        self.start_thread()
+
+
+    def start_thread(self) -> None:
+        """Starts the background flusher."""
+        self.thread = Thread(
+            target=self.run,
+            name=WriteBehindConf.thread_name(),
+            daemon=True
+        )
+        self.thread.start()
+
+
+    def put(self, data: LiteStashStore) -> None:
+        """Buffers a LiteStashStore for its database.
+
+        Raises:
+            ValueError: If the buffer is closed.
+        """
+        db_name = self.topology.db_name(data.key_hash)
+        with self.condition:
+            if self.closed:
+                logger.error('%s: %s', WriteBehindConf.closed_error(), data.key)
+                raise ValueError(WriteBehindConf.closed_error())
+            buffer = self.buffers.setdefault(db_name, {})
+            buffer[data.key_hash] = data
+            if len(buffer) >= self.flush_size:
+                self.condition.notify()
+
+
+    def pending(self, key_hash: StrictStr) -> Optional[LiteStashData]:
+        """Returns the unwritten data of a key hash, or None."""
+        return self.pending_many([key_hash]).get(key_hash)
+
+
+    def pending_many(
+        self,
+        key_hashes: Iterable[StrictStr]
+    ) -> Dict[StrictStr, Optional[LiteStashData]]:
+        """Returns the unwritten data found for each of the key hashes.
+
+        A pending entry past its expires_at maps to None: the key is gone
+        even if the database still holds an older row for it.
+        """
+        found = {}
+        with self.condition:
+            if not self.buffers and not self.inflight:
+                return found
+            for key_hash in key_hashes:
+                db_name = self.topology.db_name(key_hash)
+                for entries in (
+                    self.buffers.get(db_name),
+                    self.inflight.get(db_name)
+                ):
+                    if entries and key_hash in entries:
+                        found[key_hash] = entries[key_hash]
+                        break
+        if not found:
+            return {}
+        deadline = get_deadline()
+        return {
+            key_hash: None if is_expired(entry.expires_at, deadline)
+            else LiteStashData(key=entry.key, value=entry.value)
+            for key_hash, entry in found.items()
+        }
+
+
+    def discard(self, key_hash: StrictStr) -> None:
+        """Drops the unwritten data of a key hash.
+
+        Waits for any flush in progress, so once this returns no older write
+        of the key can still reach the database.
+        """
+        db_name = self.topology.db_name(key_hash)
+        with self.flush_lock, self.condition:
+            buffer = self.buffers.get(db_name)
+            if buffer:
+                buffer.pop(key_hash, None)
+
+
+    def flush(self) -> DataResults:
+        """Writes the buffer of each database as one transaction.
+
+        The entries of a batch that failed go back in the buffer, behind any
+        newer entry of the same key, and are written again by the next flush.
+
+        Returns:
+            DataResults: The entries stored and the errors of each database.
+        """
+        results = DataResults(self.topology)
+        with self.flush_lock:
+            with self.condition:
+                db_names = [name for name, buffer in self.buffers.items()
+                            if buffer]
+            for db_name in db_names:
+                with self.condition:
+                    entries = self.buffers.pop(db_name, None)
+                    if not entries:
+                        continue
+                    self.inflight[db_name] = entries
+                try:
+                    _, stored, errors, batches = self.writer(
+                        db_name, list(entries.values())
+                    )
+                    if errors:
+                        written = {entry.key_hash for entry in stored}
+                        failed = {
+                            key_hash: entry
+                            for key_hash, entry in entries.items()
+                            if key_hash not in written
+                        }
+                        logger.error('kept %s unwritten entries of %s: %s',
+                                     len(failed), db_name, errors)
+                        self.requeue(db_name, failed)
+                except Exception as error:
+                    logger.error('flush failed for %s: %s', db_name, error)
+                    self.requeue(db_name, entries)
+                    raise
+                finally:
+                    with self.condition:
+                        del self.inflight[db_name]
+                results[db_name] = stored
+                results.add_errors(db_name, errors)
+                results.add_batches(batches)
+        return results
+
+
+    def requeue(self,
+                db_name: StrictStr,
+                entries: Dict[StrictStr, LiteStashStore]) -> None:
+        """Puts unwritten entries back in front of the newer ones."""
+        if not entries:
+            return
+        with self.condition:
+            entries.update(self.buffers.get(db_name, {}))
+            self.buffers[db_name] = entries
+
+
+    def clear(self) -> None:
+        """Drops every unwritten entry."""
+        with self.flush_lock, self.condition:
+            self.buffers.clear()
+
+
+    def use_topology(self,
+                     topology: Topology,
+                     switch: Optional[Callable[[], None]] = None) -> None:
+        """Routes the buffered and later entries by another topology.
+
+        Waits for any flush in progress and regroups the buffers by the
+        databases of the topology. The writer must write to those databases
+        from the next flush on, so switch, which points the writer at them,
+        runs before any entry can be buffered or flushed again.
+        """
+        with self.flush_lock, self.condition:
+            buffers = {}
+            for buffer in self.buffers.values():
+                for key_hash, entry in buffer.items():
+                    db_name = topology.db_name(key_hash)
+                    buffers.setdefault(db_name, {})[key_hash] = entry
+            self.buffers = buffers
+            self.topology = topology
+            if switch is not None:
+                switch()
+
+
+    def after_fork(self) -> None:
+        """Drops the entries a child process inherited, which the parent
+        writes, and replaces its locks and background thread."""
+        self.condition = Condition()
+        self.flush_lock = Lock()
+        self.buffers = {}
+        self.inflight = {}
+        if not self.closed:
+            self.start_thread()
+
+
+    def close(self) -> None:
+        """Stops the background thread and writes what is still pending."""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        self.flush()
+
+
+    def run(self) -> None:
+        """Background loop that flushes on size or on interval."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.closed or any(
+                        len(buffer) >= self.flush_size
+                        for buffer in self.buffers.values()
+                    ),
+                    timeout=self.flush_interval
+                )
+                closed = self.closed
+            try:
+                self.flush()
+            # flush puts the entries of a failed write back in their buffer,
+            # so the next pass writes them again; an error here must not end
+            # the thread that would.
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logger.error('background flush failed: %s', error)
+            if closed:
+                return
+
+
+    def __len__(self):
+        """Return the number of unwritten entries."""
+        with self.condition:
+            return sum(len(buffer) for buffer in self.buffers.values())
+
+
+    def __repr__(self):
+        """Return the flush limits and the unwritten entries."""
+        return (
+            f'WriteBehind(flush_size={self.flush_size}, '
+            f'flush_interval={self.flush_interval}, pending={len(self)})'
+        )
+
+
+    def __str__(self):
+        """Concise string representation of the LiteStash WriteBehind"""
+        return f'WriteBehind(pending={len(self)})'
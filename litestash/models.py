@@ -105,12 +105,15 @@ class LiteStashStore:
         value (Json): The JSON data (optional).
         timestamp (int): POSIX timestamp.
         microsecond (int): Microseconds.
+        expires_at (int): Unix time in microseconds when the data expires,
+        or None to keep it.
     """
     key_hash: StrictStr = Field(...)
     key: StrictStr = Field(...)
     value: Json | None = Field(default=None)
     timestamp: StrictInt | None = Field(default=None)
     microsecond: StrictInt | None = Field(default=None)
+    expires_at: StrictInt | None = Field(default=None)
 
 
 @dataclass(slots=Parameter.SLOTS.value,
@@ -3,12 +3,27 @@
 This module provides the `LiteStash` class, which acts as the main interface for
 interacting with the distributed SQLite-based key-value store. It offers methods
 for setting, getting, deleting, and listing key-value pairs.
+
+A LiteStash created before a fork, e.g. in the master of a pre-fork server,
+is rebuilt in each child process so no SQLite connection crosses the fork.
 """
+import os
 import orjson
 
+from pathlib import Path
+
+from concurrent.futures import ThreadPoolExecutor
+
+from threading import Lock
+
 from datetime import datetime
 
+from itertools import islice
+
+from weakref import WeakSet
+
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import overload
@@ -21,35 +36,100 @@ from pydantic import StrictStr
 from pydantic import StrictBool
 from pydantic import ValidationError
 
+from sqlalchemy.exc import OperationalError
+
 from litestash.core.config.litestash_conf import EngineConf
+from litestash.core.config.litestash_conf import PlacementConf
+from litestash.core.config.litestash_conf import ReadOnlyConf
 from litestash.core.config.litestash_conf import StashError
 from litestash.core.config.litestash_conf import StashSlots
-from litestash.core.config.root import Tables as All_Tables
+from litestash.core.config.litestash_conf import StashWorkers
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.schema_conf import ColumnFields
+from litestash.core.checkpointer import Checkpointer
+from litestash.core.checkpointer import CheckpointStats
 from litestash.core.engine import Engine
+from litestash.core.fast_path import FastPath
+from litestash.core.read_cache import CacheStats
+from litestash.core.read_cache import ReadCache
+from litestash.core.reaper import Reaper
+from litestash.core.write_behind import WriteBehind
+from litestash.core.sweeper import Sweeper
+from litestash.core.sweeper import SweepStats
+from litestash.core.util.connection_util import DataResults
 from litestash.core.util import fts
 from litestash.core.util.connection_util import GetTime
 from litestash.core.util.litestash_util import connect
 from litestash.core.util.litestash_util import connections
+from litestash.core.util.litestash_util import count_data
 from litestash.core.util.litestash_util import does_exist
 from litestash.core.util.litestash_util import delete_data
-from litestash.core.util.litestash_util import get_data
+from litestash.core.util.fast_path_util import fast_delete
+from litestash.core.util.fast_path_util import fast_exists
+from litestash.core.util.fast_path_util import fast_get_stored
+from litestash.core.util.fast_path_util import fast_set
+from litestash.core.util.litestash_util import get_primary_key
+from litestash.core.util.litestash_util import match_keys
+from litestash.core.util.litestash_util import match_table
+from litestash.core.util.litestash_util import merge_sorted
+from litestash.core.util.litestash_util import get_stored
 #from litestash.core.util.litestash_util import get_datastore
-from litestash.core.util.litestash_util import get_keys
-from litestash.core.util.litestash_util import get_time
-from litestash.core.util.litestash_util import get_values
+from litestash.core.util.litestash_util import expire_data
+from litestash.core.util.litestash_util import get_chunk_size
+from litestash.core.util.litestash_util import get_deadline
+from litestash.core.util.litestash_util import key_range
 from litestash.core.util.litestash_util import mget_data
 from litestash.core.util.litestash_util import mset_data
+from litestash.core.util.litestash_util import mset_database
 from litestash.core.util.litestash_util import mk_datastore
+from litestash.core.util.litestash_util import order_results
+from litestash.core.util.litestash_util import reap_database
+from litestash.core.util.litestash_util import scan_tables
 from litestash.core.util.litestash_util import set_data
-from litestash.core.util.schema_util import mk_table_names
+from litestash.core.util.litestash_util import stream_table
+from litestash.core.util.litestash_util import sweep_table
+from litestash.core.util.reshard_util import drop_previous
+from litestash.core.util.reshard_util import migrate_table
+from litestash.core.util.reshard_util import mk_migration
+from litestash.core.util.reshard_util import prepare_layout
+from litestash.core.util.reshard_util import previous_connection
+from litestash.core.util.reshard_util import Migration
+from litestash.core.util.topology_util import close_lock
+from litestash.core.util.topology_util import lock_alone
+from litestash.core.util.topology_util import lock_shared
+from litestash.core.util.topology_util import open_lock
 from litestash.core.schema import Metadata
 from litestash.core.session import Session
+from litestash.core.topology import Topology
 from litestash.logging import root_logger as logger
 from litestash.models import LiteStashData
 
 
+OPEN_STASHES = WeakSet()
+"""Every LiteStash not yet closed, rebuilt in a child after a fork."""
+
+
+def stashes_after_fork() -> None:
+    """Rebuilds every open LiteStash in a child process."""
+    for stash in tuple(OPEN_STASHES):
+        try:
+            stash.after_fork()
+        # One stash failing to rebuild must not leave the stashes after it
+        # sharing the connections of the parent, so every error is logged.
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error('after fork failed for %s: %s', stash, error)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=stashes_after_fork)
+
+
 class LiteStash:
-    """A high-performance key-value store using SQLite."""
+    """A high-performance key-value store using SQLite.
+
+    Call close(), or use the LiteStash as a context manager, to release its
+    threads and database connections.
+    """
 
     __slots__ = StashSlots.slots()
 
@@ -57,14 +137,215 @@ class LiteStash:
     def __init__(self,
                  cache: StrictBool = False,
                  data: Optional[StrictStr] = None,
-                 search: StrictBool = False):
+                 search: StrictBool = False,
+                 workers: Optional[StrictInt] = None,
+                 fast_path: StrictBool = False,
+                 read_cache: StrictBool = False,
+                 read_cache_entries: Optional[StrictInt] = None,
+                 read_cache_bytes: Optional[StrictInt] = None,
+                 write_behind: StrictBool = False,
+                 flush_size: Optional[StrictInt] = None,
+                 flush_interval: Optional[
+                     Union[StrictFloat, StrictInt]
+                 ] = None,
+                 sweep: StrictBool = False,
+                 sweep_limit: Optional[StrictInt] = None,
+                 sweep_interval: Optional[
+                     Union[StrictFloat, StrictInt]
+                 ] = None,
+                 checkpoint: StrictBool = False,
+                 checkpoint_threshold: Optional[StrictInt] = None,
+                 checkpoint_interval: Optional[
+                     Union[StrictFloat, StrictInt]
+                 ] = None,
+                 profile: Optional[StrictStr] = None,
+                 pragmas: Optional[
+                     Dict[StrictStr, Union[StrictInt, StrictStr]]
+                 ] = None,
+                 shards: Optional[StrictInt] = None,
+                 tables_per_shard: Optional[StrictInt] = None,
+                 directories: Optional[List[StrictStr]] = None,
+                 placement: Optional[StrictStr] = None,
+                 readonly: StrictBool = False,
+                 immutable: StrictBool = False):
         """Initiate a new LiteStash
 
         Creates an empty cache by default.
+
+        Args:
+            cache (bool): Keep all databases in memory.
+            data (str): The directory for the database files.
+            search (bool): Create the full-text search tables.
+            workers (int): Run the mget and mset batch of each database on
+                a pool of this many threads (at most one per database).
+            fast_path (bool): Run get, set, delete and exists as prepared
+                SQL on one long-lived sqlite3 connection per database
+                instead of through a SQLAlchemy Session.
+            read_cache (bool): Keep recently read data in an in-process LRU
+                cache in front of get and mget.
+            read_cache_entries (int): The most entries the read cache holds.
+            read_cache_bytes (int): The most estimated value bytes the read
+                cache holds.
+            write_behind (bool): Buffer set calls and write the buffer of
+                each database as one transaction in the background. Pending
+                data is visible to reads; call flush() for durability.
+            flush_size (int): Pending entries of one database that start a
+                flush.
+            flush_interval (float): Seconds between background flushes.
+            sweep (bool): Delete expired data in the background, a bounded
+                batch per table at a time.
+            sweep_limit (int): Most expired rows deleted per statement.
+            sweep_interval (float): Seconds between sweeps when nothing is
+                piling up.
+            checkpoint (bool): Checkpoint the WAL of each open database in
+                the background: PASSIVE once it reaches checkpoint_threshold
+                bytes, TRUNCATE once no writes have reached it for a
+                checkpoint_interval. Does nothing in memory.
+            checkpoint_threshold (int): WAL bytes that start a checkpoint.
+            checkpoint_interval (float): Seconds between WAL checks.
+            profile (str): The PRAGMA profile of every connection:
+                'throughput' (the default), 'durable', 'memory-lean' or
+                'read-replica'.
+            pragmas (dict): Profile settings to override, e.g.
+                {'synchronous': 'FULL'}. Accepts cache_size, mmap_size,
+                temp_store, page_size, busy_timeout, wal_autocheckpoint and
+                synchronous.
+            shards (int): Spread the keys over this many databases with a
+                consistent-hash ring instead of the 16 prefix databases.
+            tables_per_shard (int): The tables of each ring database.
+            directories (list): Spread the database files over these
+                directories, e.g. one per drive; the manifest stays in data.
+            placement (str): How databases are assigned to directories:
+                'round-robin' (the default) or 'free-space', weighted by the
+                free bytes of each file system.
+            readonly (bool): Only read the data directory, e.g. from the
+                many reader processes of a live store: every database is
+                opened with mode=ro and query_only=ON, no table is created
+                and nothing is written, not even the manifest or the
+                deletes of expired rows. A database without a file when it
+                is first read stays empty until the LiteStash is reopened.
+            immutable (bool): Read a frozen snapshot of the data directory
+                without file locking; implies readonly. The WAL of every
+                database must be checkpointed first, since SQLite does not
+                read it.
+
+        The topology of a data directory, and the directory of each of its
+        databases, is recorded in its manifest the first time it is opened,
+        and reopening takes it from the manifest.
+        A reshard left unfinished keeps serving both layouts until
+        reshard() is called again.
+
+        Raises:
+            ValueError: If shards, tables_per_shard or directories differ
+                from the manifest, the data directory holds prefix databases
+                without one, directories are given with cache, or readonly
+                is combined with cache, write_behind, sweep, checkpoint or
+                search.
         """
-        self.engine = Engine(cache=cache, data=data)
+        if workers is not None and (
+            not isinstance(workers, int) or workers < 1
+        ):
+            raise ValueError(StashWorkers.VALUE_ERROR.value)
+
+        readonly = readonly or immutable
+        if readonly and cache:
+            logger.error('%s', ReadOnlyConf.cache_error())
+            raise ValueError(ReadOnlyConf.cache_error())
+        if readonly and (write_behind or sweep or checkpoint or search):
+            logger.error('%s', ReadOnlyConf.option_error())
+            raise ValueError(ReadOnlyConf.option_error())
+
+        if cache:
+            if directories is not None or placement is not None:
+                logger.error('%s: %s', PlacementConf.cache_error(), directories)
+                raise ValueError(PlacementConf.cache_error())
+            self.topology = Topology(shards, tables_per_shard)
+        else:
+            self.topology = Topology.load(data or EngineConf.dirname(),
+                                          shards,
+                                          tables_per_shard,
+                                          directories,
+                                          placement,
+                                          readonly)
+        if search and not self.topology.is_prefix():
+            logger.error('%s: %s', TopologyConf.search_error(), self.topology)
+            raise ValueError(TopologyConf.search_error())
+        self.closed = False
+        self.data_lock = None
+        if not cache:
+            self.data_lock = open_lock(data or EngineConf.dirname(), readonly)
+        self.engine = Engine(cache=cache,
+                             data=data,
+                             profile=profile,
+                             pragmas=pragmas,
+                             topology=self.topology,
+                             readonly=readonly,
+                             immutable=immutable)
         self.metadata = Metadata(self.engine)
-        self.db_session = Session(self.engine)
+        self.db_session = Session(self.engine, self.metadata)
+        self.fast_path = FastPath(
+            self.engine, self.metadata
+        ) if fast_path else None
+        self.read_cache = None
+        if read_cache:
+            self.read_cache = ReadCache(
+                max_entries=read_cache_entries,
+                max_bytes=read_cache_bytes
+            )
+        self.write_behind = None
+        if write_behind:
+            self.write_behind = WriteBehind(
+                lambda db_name, entries: mset_database(
+                    db_name, entries, self.metadata, self.db_session
+                ),
+                flush_size=flush_size,
+                flush_interval=flush_interval,
+                topology=self.topology
+            )
+        self.reaper = Reaper(
+            lambda db_name, key_hashes, deadline: reap_database(
+                db_name,
+                key_hashes,
+                self.metadata,
+                self.db_session,
+                deadline
+            ),
+            topology=self.topology
+        )
+        if readonly:
+            self.reaper.close()
+        self.sweeper = None
+        if sweep:
+            self.sweeper = Sweeper(
+                lambda db_name, table_name, deadline, limit: sweep_table(
+                    db_name,
+                    table_name,
+                    self.metadata,
+                    self.db_session,
+                    deadline,
+                    limit
+                ),
+                limit=sweep_limit,
+                interval=sweep_interval,
+                topology=self.topology
+            )
+        self.checkpointer = None
+        if checkpoint:
+            self.checkpointer = Checkpointer(
+                self._opened,
+                self._wal_stat,
+                self._checkpoint,
+                threshold=checkpoint_threshold,
+                interval=checkpoint_interval
+            )
+        self.executor = None
+        self.workers = None
+        if workers:
+            self.workers = min(workers, len(self.topology.databases))
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=StashWorkers.thread_name()
+            )
 
         if search:
             fts.create_all_search_tables(
@@ -73,6 +354,11 @@ class LiteStash:
                 self.db_session
             )
 
+        self.migration = None
+        if self.topology.previous is not None:
+            self.migration = mk_migration(self.engine, self.topology.previous)
+        OPEN_STASHES.add(self)
+
     @overload
     def get(self, key: LiteStashData) -> Optional[LiteStashData]:
         """Overload get using LiteStashData type"""
@@ -91,8 +377,10 @@ class LiteStash:
             `LiteStashData` object containing the key.
 
         Returns:
-            LiteStashData: The retrieved key-value pair, or None if not found.
+            LiteStashData: The retrieved key-value pair, or None if not found
+            or expired.
         """
+        self._open()
         try:
             data = None
             if isinstance(key, str):
@@ -100,11 +388,45 @@ class LiteStash:
             elif isinstance(key, LiteStashData):
                 data = key
 
-            return get_data(connect(
-                data=data,
-				metadata=self.metadata,
-                db_session=self.db_session
-            ))
+            key_hash = get_primary_key(data.key)
+            version = None
+            if self.read_cache is not None:
+                cached = self.read_cache.get(key_hash)
+                if cached is not None:
+                    return cached
+                version = self.read_cache.version()
+
+            if self.write_behind is not None:
+                pending = self.write_behind.pending_many([key_hash])
+                if key_hash in pending:
+                    return pending[key_hash]
+
+            def read():
+                if self.fast_path is not None:
+                    return fast_get_stored(self.fast_path,
+                                           key_hash,
+                                           self.reaper.reap)
+                return get_stored(connect(
+                    data=data,
+                    metadata=self.metadata,
+                    db_session=self.db_session
+                ), self.reaper.reap)
+
+            migration = self.migration
+            stored = read()
+            migration = migration or self.migration
+            if stored is None and migration is not None:
+                stored = self._read_previous(migration,
+                                             get_stored,
+                                             key_hash,
+                                             read)
+            if stored is None:
+                return None
+
+            result, expires_at = stored
+            if version is not None:
+                self.read_cache.fill(key_hash, result, version, expires_at)
+            return result
         except ValidationError as error:
             logger.error('invalid: %s', error)
             raise
@@ -114,18 +436,22 @@ class LiteStash:
 
 
     @overload
-    def mget(self, keys: List[StrictStr]) -> Optional[LiteStashData]:
+    def mget(self, keys: List[StrictStr]) -> List[Optional[LiteStashData]]:
         """"""
 
     @overload
-    def mget(self, keys: List[LiteStashData]) -> Optional[LiteStashData]:
+    def mget(self,
+        keys: List[LiteStashData]) -> List[Optional[LiteStashData]]:
         """"""
 
     def mget(self,
-        keys: List[StrictStr | LiteStashData]) -> Optional[LiteStashData]:
+        keys: List[StrictStr | LiteStashData]
+        ) -> List[Optional[LiteStashData]]:
         """mget
 
         Retrieves multiple values from the key-value store.
+        Keys are grouped by database and table so each table is read with
+        one select per chunk of keys. Expired data is returned as None.
 
         Args:
             keys (List[StrictStr | LiteStashData]): A list of keys to retrieve.
@@ -133,10 +459,10 @@ class LiteStash:
         Returns:
             List[LiteStashData | None]:
                 A list of retrieved LiteStashData objects or None for keys not
-                found.
+                found, in the order of the given keys.
 
         Raises:
-
+            TypeError: If the keys are not all strings or all LiteStashData.
         """
         def setup_keys(keys):
             to_connect = []
@@ -145,11 +471,67 @@ class LiteStash:
                 return to_connect
             elif all(isinstance(key, LiteStashData) for key in keys):
                 return keys
+            raise TypeError(StashError.KEY_TYPE.value)
 
+        self._open()
         try:
-            return mget_data(connections(setup_keys(keys)),
-                             self.metadata,
-                             self.db_session)
+            lookups = setup_keys(keys)
+            if not lookups:
+                return []
+            if self.read_cache is None and self.write_behind is None:
+                migration = self.migration
+                results = mget_data(connections(lookups, self.topology),
+                                    self.metadata,
+                                    self.db_session,
+                                    self.executor,
+                                    self.reaper.reap)
+                found = order_results(lookups, results)
+                migration = migration or self.migration
+                if migration is not None:
+                    found = self._mget_previous(migration, lookups, found)
+                return found
+
+            key_hashes = [get_primary_key(data.key) for data in lookups]
+            cached = {}
+            version = None
+            if self.read_cache is not None:
+                cached = self.read_cache.get_many(key_hashes)
+                version = self.read_cache.version()
+            if self.write_behind is not None:
+                cached.update(self.write_behind.pending_many(
+                    key_hash for key_hash in key_hashes
+                    if key_hash not in cached
+                ))
+            misses = [
+                data for data, key_hash in zip(lookups, key_hashes)
+                if key_hash not in cached
+            ]
+            if misses:
+                migration = self.migration
+                results = mget_data(connections(misses, self.topology),
+                                    self.metadata,
+                                    self.db_session,
+                                    self.executor,
+                                    self.reaper.reap)
+                found = order_results(misses, results)
+                for data, item in zip(misses, found):
+                    if item is None:
+                        continue
+                    key_hash = get_primary_key(data.key)
+                    if version is not None:
+                        self.read_cache.fill(key_hash,
+                                             item,
+                                             version,
+                                             results.expires_at.get(data.key))
+                    cached[key_hash] = item
+                migration = migration or self.migration
+                if migration is not None:
+                    for data, item in zip(
+                        misses, self._mget_previous(migration, misses, found)
+                    ):
+                        if item is not None:
+                            cached[get_primary_key(data.key)] = item
+            return [cached.get(key_hash) for key_hash in key_hashes]
 
         except TypeError as error:
             logger.error('%s is not a %s: %s',
@@ -165,31 +547,39 @@ class LiteStash:
     @overload
     def set(self,
         key: StrictStr,
-        value: Union[StrictStr, Json, None] = None) -> None:
+        value: Union[StrictStr, Json, None] = None,
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> None:
         """Overload set using key,value string"""
 
 
     @overload
-    def set(self, key: LiteStashData) -> None:
+    def set(self,
+        key: LiteStashData,
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> None:
         """Overload set using LiteStashData"""
 
 
     def set(self,
         key: StrictStr | LiteStashData,
-        value: Union[StrictStr, Json, None] = None) -> None:
+        value: Union[StrictStr, Json, None] = None,
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> None:
         """Inserts or updates a key-value pair.
 
         Args:
             key: Either a `LiteStashData` object or a string key.
             value: The JSON value to store
+            ttl: The number of seconds until the data expires; None keeps
+                the data until it is deleted.
 
         Returns:
             True: On successfully setting a key-value to the database.
 
         Raises:
             ValidationError: If the `LiteStashData` object fails validation.
+            ValueError: If the LiteStash is read-only.
             Exception: For unexpected errors
         """
+        self._writable()
         try:
             if isinstance(key, LiteStashData):
                 data = key
@@ -199,12 +589,22 @@ class LiteStash:
                 data = LiteStashData(key=key, value=value)
                 logger.debug('stashdata: %s', data)
 
-            data = mk_datastore(data)
+            data = mk_datastore(data, ttl)
             logger.debug('litestash datastore: %s', data)
 
-            set_data(connect(
-                data=data, metadata=self.metadata, db_session=self.db_session
-            ))
+            if self.write_behind is not None:
+                self.write_behind.put(data)
+            elif self.fast_path is not None:
+                fast_set(self.fast_path, data)
+            else:
+                set_data(connect(
+                    data=data,
+                    metadata=self.metadata,
+                    db_session=self.db_session
+                ))
+
+            if self.read_cache is not None:
+                self.read_cache.discard(data.key_hash)
 
         except ValueError as invalid:
             logger.error('ValueError: %s', invalid)
@@ -215,36 +615,56 @@ class LiteStash:
 
 
     @overload
-    def mset(self, data: List[LiteStashData]) -> None:
+    def mset(self,
+        data: List[LiteStashData],
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> DataResults:
         """"""
 
 
     @overload
-    def mset(self, data: List[Dict]) -> None:
+    def mset(self,
+        data: List[Dict],
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> DataResults:
         """"""
 
 
     @overload
-    def mset(self, data: List[StrictStr]) -> None:
+    def mset(self,
+        data: List[StrictStr],
+        ttl: Union[StrictInt, StrictFloat, None] = None) -> DataResults:
         """"""
 
 
     def mset(
         self,
-        data: List[Union[StrictStr | Dict | LiteStashData]]
-        ) -> None:
+        data: List[Union[StrictStr | Dict | LiteStashData]],
+        ttl: Union[StrictInt, StrictFloat, None] = None
+        ) -> DataResults:
         """mset
 
         Batch multiple key-value entries.
+        The entries of each table are written with one executemany upsert per
+        batch and the entries of each database in one transaction.
+
+        Args:
+            data (List[StrictStr | Dict | LiteStashData]): LiteStashData, or
+                dicts (or JSON object strings) of key-value pairs.
+            ttl (int | float): The number of seconds until every entry
+                expires; None keeps the entries until they are deleted.
+
+        Returns:
+            DataResults: The entries stored and the errors of each database,
+            with the BatchResult of every batch.
         """
+        self._writable()
         def parse_str(data):
             parsed = []
             try:
                 for element in data:
                     e = orjson.loads(element)
-                    if isinstance(e, dict):
+                    if not isinstance(e, dict):
                         raise ValueError(f'invalid json: {type(e)} for {e}')
-                    parsed.append(e.popitem())
+                    parsed.extend(e.items())
                 return parsed
             except ValueError as error:
                 logger.error('Expected JSON, not: %s', error)
@@ -257,27 +677,33 @@ class LiteStash:
             to_connect = []
             if all(isinstance(item, dict) for item in data):
                 to_connect = [
-                    mk_datastore(LiteStashData(key=k, value=orjson.dumps(v))) \
+                    mk_datastore(LiteStashData(key=k, value=v), ttl) \
                         for d in data for k, v in d.items()
                 ]
 
             elif all(isinstance(item, str) for item in data):
                 to_connect = [
-                    mk_datastore(LiteStashData(key=e[0],
-                                              value=orjson.dumps(e[1]))) \
+                    mk_datastore(LiteStashData(key=e[0], value=e[1]), ttl) \
                         for e in parse_str(data)
                 ]
             elif all(isinstance(item, LiteStashData) for item in data):
                 to_connect = [
-                    mk_datastore(item) for item in data
+                    mk_datastore(item, ttl) for item in data
                 ]
             return to_connect
 
         try:
-
-            mset_data(connections(setup_data(data)),
-                      self.metadata,
-                      self.db_session)
+            to_store = setup_data(data)
+            if self.write_behind is not None:
+                self.write_behind.flush()
+            results = mset_data(connections(to_store, self.topology),
+                                self.metadata,
+                                self.db_session,
+                                self.executor)
+            if self.read_cache is not None:
+                for item in to_store:
+                    self.read_cache.discard(item.key_hash)
+            return results
 
         except ValueError as invalid:
             logger.error('Invalid data: %s', invalid)
@@ -287,61 +713,70 @@ class LiteStash:
             raise
 
 
-    def expire(self, keys: Union[StrictStr | List[StrictStr] | None] = None,
-               ttl: Union[StrictFloat | StrictInt | GetTime] = None) -> None:
+    def expire(self,
+               keys: Union[StrictStr | List[StrictStr] | None] = None,
+               ttl: Union[StrictFloat | StrictInt | datetime | GetTime] = None
+               ) -> StrictInt:
         """Expire
 
-        Check the time age of a key with a time-to-live value.
+        Delete the data whose time-to-live has passed. Each table runs one
+        set-based `DELETE ... WHERE expires_at <= ?` on its expires_at index.
         One or more keys may be provided to check specific keys.
-        Otherwise if only a time-to-live is given all keys are checked.
+        Otherwise all keys are checked.
         String keys may be separated by spaces.
 
         Args:
-Args:
-        keys (Optional[Union[StrictStr, List[StrictStr]]]):
-            Zero or more strings for checking JSON expiration time.
+            keys (Optional[Union[StrictStr, List[StrictStr]]]):
+                Zero or more keys to check for expiration.
+
+            ttl (Optional[Union[StrictFloat, StrictInt, datetime, GetTime]]):
+                The time to expire against as a Unix timestamp, a datetime or
+                a LiteStash GetTime tuple; defaults to now.
 
-        ttl (Optional[Union[StrictFloat, StrictInt, GetTime]]):
-            A Unix timestamp with or without microseconds or a LiteStash
-            GetTime tuple.
+        Returns:
+            int: The number of keys deleted.
 
         Raises:
             TypeError:
-                If ttl is not provided or cannot be converted to GetTime.
-            ValidationError:
-                todo
+                If ttl or keys are not one of the accepted types.
+            ValueError:
+                If the LiteStash is read-only.
         """
+        self._writable()
         try:
-            if ttl is None:
-                raise TypeError('Time to live required to expire data')
-
-            if isinstance(ttl, datetime):
-                ttl = GetTime(int(ttl.timestamp()), ttl.microsecond)
-
-            elif isinstance(ttl, (float, int)):
-                ttl = datetime.fromtimestamp(ttl)
-                ttl = GetTime(int(ttl.timestamp()), ttl.microsecond)
-
-            if keys is None:
-                keys = self.keys()
-                if keys is None:
-                    return None
-
-            elif isinstance(keys, str):
+            deadline = get_deadline(ttl)
+            expire_connections = None
+            if isinstance(keys, str):
                 keys = keys.split()
 
-            if isinstance(keys, list) and all(
-                    isinstance(k, str) for k in keys
-            ):
-                for key in keys:
-                    data = get_time(key)
-                    if data.timestamp >= ttl.timestamp:
-                        self.delete(key)
+            if keys is not None:
+                if not isinstance(keys, list) or not all(
+                    isinstance(key, str) for key in keys
+                ):
+                    raise TypeError(StashError.KEY_TYPE.value)
+                if not keys:
+                    return 0
+                expire_connections = connections(
+                    [LiteStashData(key=key) for key in keys],
+                    self.topology
+                )
+
+            if self.write_behind is not None:
+                self.write_behind.flush()
+            expired = expire_data(self.metadata,
+                                  self.db_session,
+                                  deadline,
+                                  expire_connections,
+                                  self.executor)
+            if expired and self.read_cache is not None:
+                self.read_cache.clear()
+            return expired
+
         except ValidationError as invalid:
-            logger.error('todo: %s', invalid)
+            logger.error('invalid key: %s', invalid)
             raise
         except TypeError as error:
-            logger.error('ttl required: %s', error)
+            logger.error('invalid expire argument: %s', error)
             raise
 
     def search(text: str = None):
@@ -349,32 +784,243 @@ Args:
         pass
 
 
-    def keys(self) -> Optional[List[StrictStr]]:
-        """Returns a list of all keys in the database."""
-        keys = []
-        for db_name in All_Tables:
-            table_names = mk_table_names(db_name.value)
-            metadata = self.metadata.get(db_name.value).metadata
-            session = self.db_session.get(db_name.value).session
-            for table_name in table_names:
-                table = metadata.tables[table_name]
-                table_keys = get_keys(session, table)
-                keys.extend(table_keys)
-        return keys
+    def keys(self,
+             prefix: Optional[StrictStr] = None,
+             pattern: Optional[StrictStr] = None) -> Optional[List[StrictStr]]:
+        """Returns a list of all keys in the database.
+
+        With a prefix or a glob pattern (e.g. 'sess:*') only the matching
+        keys are read, by a range scan on the key index of each table; the
+        databases are scanned in parallel when the LiteStash has workers.
+
+        Args:
+            prefix (str): The keys must start with this prefix.
+            pattern (str): The keys must match this glob pattern.
+
+        Raises:
+            TypeError: If the prefix or pattern is not a string.
+        """
+        self._open()
+        if prefix is None and pattern is None:
+            return list(self.iter_keys())
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return list(match_keys(self.metadata,
+                               self.db_session,
+                               prefix,
+                               pattern,
+                               self.executor))
 
 
     def values(self) -> Optional[List[Json]]:
         """Returns a list of all values (as dictionaries) in the database."""
-        values = []
-        for db_name in All_Tables:
-            table_names = mk_table_names(db_name.value)
-            metadata = self.metadata.get(db_name.value).metadata
-            session = self.db_session.get(db_name.value).session
-            for table_name in table_names:
-                table = metadata.tables[table_name]
-                table_values = get_values(session, table)
-                values.extend(table_values)
-        return values
+        return list(self.iter_values())
+
+
+    def iter_keys(
+        self,
+        chunk_size: Optional[StrictInt] = None,
+        prefix: Optional[StrictStr] = None,
+        pattern: Optional[StrictStr] = None
+    ) -> Iterator[StrictStr]:
+        """Streams every unexpired key.
+
+        Args:
+            chunk_size (int): The rows fetched from the database at a time.
+            prefix (str): Only stream keys starting with this prefix.
+            pattern (str): Only stream keys matching this glob pattern.
+
+        Returns:
+            Iterator[str]: The keys, one table after another.
+
+        Raises:
+            TypeError: If the prefix or pattern is not a string.
+        """
+        self._open()
+        if prefix is None and pattern is None:
+            return (row[0] for row in self._stream(
+                [ColumnFields.KEY.value], chunk_size
+            ))
+        key_range(prefix, pattern)
+        chunk_size = get_chunk_size(chunk_size)
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        deadline = get_deadline()
+
+        def matches():
+            for db_name in self.topology.databases:
+                metadata = self.metadata.get(db_name).metadata
+                session = self.db_session.get(db_name).reader
+                for table_name in self.topology.table_names(db_name):
+                    yield from match_table(session,
+                                           metadata.tables[table_name],
+                                           prefix,
+                                           pattern,
+                                           chunk_size,
+                                           deadline)
+        return matches()
+
+
+    def iter_values(
+        self,
+        chunk_size: Optional[StrictInt] = None
+    ) -> Iterator[Json]:
+        """Streams every unexpired value.
+
+        Args:
+            chunk_size (int): The rows fetched from the database at a time.
+
+        Returns:
+            Iterator[Json]: The values, one table after another.
+        """
+        return (row[0] for row in self._stream(
+            [ColumnFields.VALUE.value], chunk_size
+        ))
+
+
+    def iter_items(
+        self,
+        chunk_size: Optional[StrictInt] = None
+    ) -> Iterator[tuple]:
+        """Streams every unexpired key and value pair.
+
+        Args:
+            chunk_size (int): The rows fetched from the database at a time.
+
+        Returns:
+            Iterator[tuple]: The (key, value) pairs, one table after another.
+        """
+        return self._stream(
+            [ColumnFields.KEY.value, ColumnFields.VALUE.value], chunk_size
+        )
+
+
+    def iter_sorted(
+        self,
+        start_key: Optional[StrictStr] = None,
+        end_key: Optional[StrictStr] = None,
+        chunk_size: Optional[StrictInt] = None
+    ) -> Iterator[LiteStashData]:
+        """Streams the unexpired data in key order.
+
+        Every table is read in order on its key index and the tables are
+        merged lazily, so memory grows with the number of tables and not
+        with the number of keys.
+
+        Args:
+            start_key (str): The first key, inclusive; None from the start.
+            end_key (str): The key to stop before; None to the end.
+            chunk_size (int): The rows fetched per table at a time.
+
+        Returns:
+            Iterator[LiteStashData]: The data ordered by key.
+
+        Raises:
+            TypeError: If start_key or end_key is not a string.
+            ValueError: If chunk_size is not a positive integer.
+        """
+        self._open()
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return merge_sorted(self.metadata,
+                            self.db_session,
+                            start_key,
+                            end_key,
+                            chunk_size)
+
+
+    def range(self,
+              start_key: Optional[StrictStr] = None,
+              end_key: Optional[StrictStr] = None,
+              limit: Optional[StrictInt] = None) -> List[LiteStashData]:
+        """Returns a page of the unexpired data in key order.
+
+        To read the next page, pass the last key returned followed by
+        '\\0' as the start_key.
+
+        Args:
+            start_key (str): The first key, inclusive; None from the start.
+            end_key (str): The key to stop before; None to the end.
+            limit (int): The most entries returned; None for all of them.
+
+        Returns:
+            List[LiteStashData]: The data ordered by key.
+
+        Raises:
+            TypeError: If start_key or end_key is not a string.
+            ValueError: If limit is not a positive integer.
+        """
+        if limit is None:
+            return list(self.iter_sorted(start_key, end_key))
+        chunk_size = min(get_chunk_size(limit), get_chunk_size())
+        return list(islice(
+            self.iter_sorted(start_key, end_key, chunk_size), limit
+        ))
+
+
+    def scan(self,
+             cursor: Optional[StrictStr] = None,
+             match: Optional[StrictStr] = None,
+             count: Optional[StrictInt] = None) -> tuple:
+        """Scan
+
+        Page through the unexpired keys in bounded units of work. Start with
+        cursor '0' (or None) and pass each returned cursor to the next call
+        until '0' comes back. The cursor names the database, table and last
+        primary key read, so a scan resumes in any process using the same
+        files; no transaction is held between calls. Keys set or deleted
+        during a scan may or may not be returned.
+
+        Args:
+            cursor (str): The cursor returned by the previous call.
+            match (str): A SQLite GLOB pattern, e.g. 'user:*', the keys must
+                match; '[^a]' excludes a character, as in `keys`.
+            count (int): The most rows examined by this call; a call with a
+                match may return fewer keys, or none, before the scan ends.
+
+        Returns:
+            tuple: The next cursor and a list of keys.
+
+        Raises:
+            ValueError: If the cursor or count is invalid.
+        """
+        self._open()
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return scan_tables(self.metadata,
+                           self.db_session,
+                           cursor,
+                           match,
+                           count)
+
+
+    def _stream(self, columns: List[StrictStr], chunk_size):
+        """Returns a generator of the rows of every table in turn.
+
+        Pending writes are flushed and the arguments checked before the
+        first row is requested. Rows are read one chunk of one table at a
+        time, with no transaction held between chunks.
+
+        Raises:
+            ValueError: If chunk_size is not a positive integer.
+        """
+        self._open()
+        chunk_size = get_chunk_size(chunk_size)
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        deadline = get_deadline()
+
+        def rows():
+            for db_name in self.topology.databases:
+                metadata = self.metadata.get(db_name).metadata
+                session = self.db_session.get(db_name).reader
+                for table_name in self.topology.table_names(db_name):
+                    yield from stream_table(session,
+                                            metadata.tables[table_name],
+                                            columns,
+                                            chunk_size,
+                                            deadline)
+        return rows()
 
 
     def exists(self, key: StrictStr) -> StrictBool:
@@ -384,16 +1030,38 @@ Args:
             key (str): The key to check.
 
         Returns:
-            bool: True if the key exists, False otherwise.
+            bool: True if the key exists and has not expired, False otherwise.
         """
+        self._open()
         try:
             if isinstance(key, str):
                 data = LiteStashData(key=key)
-                return does_exist(connect(
-                    data=data,
-                    metadata=self.metadata,
-                    db_session=self.db_session
-                ))
+                key_hash = get_primary_key(key)
+                if self.write_behind is not None:
+                    pending = self.write_behind.pending_many([key_hash])
+                    if key_hash in pending:
+                        return pending[key_hash] is not None
+
+                def read():
+                    if self.fast_path is not None:
+                        return fast_exists(self.fast_path,
+                                           key_hash,
+                                           self.reaper.reap)
+                    return does_exist(connect(
+                        data=data,
+                        metadata=self.metadata,
+                        db_session=self.db_session
+                    ), self.reaper.reap)
+
+                migration = self.migration
+                found = read()
+                migration = migration or self.migration
+                if not found and migration is not None:
+                    found = self._read_previous(migration,
+                                                does_exist,
+                                                key_hash,
+                                                read)
+                return found
         except ValidationError as error:
             logger.error(
                 '%s is not %s: %s',
@@ -419,14 +1087,38 @@ Args:
         Args:
             data: Either a `LiteStashData` object or a string key to delete.
         """
+        self._writable()
         try:
             data = None
             if isinstance(key, str):
                 data = LiteStashData(key=key)
 
-            delete_data(connect(
-                data=data, metadata=self.metadata, db_session=self.db_session
-	        ))
+            if self.write_behind is not None:
+                self.write_behind.discard(get_primary_key(data.key))
+
+            def remove():
+                if self.fast_path is not None:
+                    fast_delete(self.fast_path, get_primary_key(data.key))
+                else:
+                    delete_data(connect(
+                        data=data,
+                        metadata=self.metadata,
+                        db_session=self.db_session,
+                        write=True
+                    ))
+
+            migration = self.migration
+            if migration is None:
+                remove()
+                migration = self.migration
+            if migration is not None:
+                with migration.lock:
+                    remove()
+                    self._delete_previous(migration,
+                                          get_primary_key(data.key))
+
+            if self.read_cache is not None:
+                self.read_cache.discard(get_primary_key(data.key))
         except ValidationError as error:
             logger.error('%s not %s: %s',
                          StashError.KEY_TYPE.value,
@@ -434,14 +1126,410 @@ Args:
                          error)
 
     def clear(self) -> None:
-        """Clears all entries from the database."""
-        for db in self.metadata.__slots__:
+        """Clears all entries from the database.
+
+        A running reshard ends, as it has no rows left to move.
+        """
+        self._writable()
+        if self.write_behind is not None:
+            self.write_behind.clear()
+        fast_path = self.fast_path is not None
+        if fast_path:
+            self.fast_path.close()
+        for db in self.topology.databases:
             metadata = self.metadata.get(db).metadata
             engine = self.engine.get(db).engine
             metadata.drop_all(bind=engine)
-        self.engine = Engine()
+        migration = self.migration
+        if migration is not None:
+            self._finish_reshard(migration)
+        self.metadata = Metadata(self.engine)
+        self.db_session = Session(self.engine, self.metadata)
+        self.fast_path = FastPath(
+            self.engine, self.metadata
+        ) if fast_path else None
+        if self.read_cache is not None:
+            self.read_cache.clear()
+
+
+    def warm_up(self) -> None:
+        """Opens every database now instead of on first use.
+
+        Databases are opened in parallel, on the worker pool when there is
+        one. Opening an already open database does nothing.
+        """
+        self._open()
+        def open_database(db_name: str) -> None:
+            self.db_session.get(db_name)
+            if self.fast_path is not None:
+                self.fast_path.get(db_name)
+
+        if self.executor is not None:
+            list(self.executor.map(open_database, self.topology.databases))
+        else:
+            with ThreadPoolExecutor(
+                max_workers=StashWorkers.max_workers(),
+                thread_name_prefix=StashWorkers.thread_name()
+            ) as executor:
+                list(executor.map(open_database, self.topology.databases))
+
+
+    def reshard(self,
+                topology: Optional[Topology] = None,
+                chunk_size: Optional[StrictInt] = None) -> StrictInt:
+        """Moves every key to the layout of another topology while serving.
+
+        The new layout is prepared and recorded in the manifest along with
+        the current one, then every write goes to it. The rows of each
+        previous table move in chunked transactions; a read that misses in
+        the new layout looks in the previous one, and a delete removes the
+        key from both. Once every table has moved, the manifest drops the
+        previous topology and the previous tables and database files are
+        removed.
+
+        Other processes keep the topology and files they opened, so a
+        reshard of a data directory runs only while no other LiteStash has
+        it open, and no LiteStash can open it until the reshard returns.
+
+        Until reshard returns, iteration, scans, keys, counts and expire
+        only see the rows already moved. A reshard cut short resumes from
+        the manifest: reopen the data directory and call reshard() again.
+
+        Args:
+            topology (Topology): The new layout, e.g. Topology(shards=32);
+                None finishes the reshard already running.
+            chunk_size (int): The rows moved per transaction.
+
+        Returns:
+            int: The number of rows moved.
+
+        Raises:
+            ValueError: If chunk_size is invalid, another reshard has not
+                finished, another LiteStash has the data directory open, or
+                the LiteStash is read-only.
+        """
+        self._writable()
+        chunk_size = get_chunk_size(chunk_size)
+        migration = self.migration
+        if topology is not None:
+            if migration is None and topology.same_layout(self.topology):
+                return 0
+            if migration is not None and not topology.same_layout(
+                self.topology
+            ):
+                logger.error('%s: %s', TopologyConf.reshard_error(), topology)
+                raise ValueError(TopologyConf.reshard_error())
+        elif migration is None:
+            return 0
+
+        lock_alone(self.data_lock)
+        try:
+            if migration is None:
+                migration = self._start_reshard(topology.copy())
+            moved = 0
+            for db_name, table_name in migration.topology.scan_order():
+                moved += migrate_table(db_name,
+                                       table_name,
+                                       self.metadata,
+                                       self.db_session,
+                                       migration,
+                                       chunk_size)
+            self._finish_reshard(migration)
+        finally:
+            lock_shared(self.data_lock)
+        logger.info('moved %s rows to %s', moved, self.topology)
+        return moved
+
+
+    def after_fork(self) -> None:
+        """Rebuilds what a child process cannot share with its parent.
+
+        Runs in the child after every os.fork. The pools forget the SQLite
+        connections of the parent, so the child opens its own on next use,
+        and the fast path, session factories, worker pool, locks and
+        background threads are replaced. The child holds its own shared lock
+        of the data directory, so no reshard runs while it is open. Pending
+        write_behind entries and queued reaps stay with the parent, which
+        writes them. Pages the parent read stay shared with the child until
+        either writes them.
+        """
+        if self.data_lock is not None:
+            close_lock(self.data_lock)
+            self.data_lock = None
+            self.data_lock = open_lock(Path(self.topology.path).parent,
+                                       self.engine.readonly)
+        self.engine.after_fork()
         self.metadata = Metadata(self.engine)
-        self.db_session = Session(self.engine)
+        self.db_session = Session(self.engine, self.metadata)
+        if self.fast_path is not None:
+            self.fast_path = FastPath(self.engine, self.metadata)
+        if self.migration is not None:
+            self.migration = mk_migration(self.engine,
+                                          self.migration.topology)
+        if self.executor is not None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=StashWorkers.thread_name()
+            )
+        for component in (self.read_cache,
+                          self.write_behind,
+                          self.sweeper,
+                          self.checkpointer,
+                          self.reaper):
+            if component is not None:
+                component.after_fork()
+        logger.debug('rebuilt %s after fork in %s', self, os.getpid())
+
+
+    def close(self) -> None:
+        """Releases the threads and connections of the LiteStash.
+
+        Pending write_behind data is written and queued reaps deleted, the
+        background threads and worker pool stop, the fast path returns its
+        connections and every engine is disposed. The LiteStash must not be
+        used once closed: its methods raise ValueError, and closing it again
+        does nothing.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        OPEN_STASHES.discard(self)
+        if self.write_behind is not None:
+            self.write_behind.close()
+        if self.sweeper is not None:
+            self.sweeper.close()
+        if self.checkpointer is not None:
+            self.checkpointer.close()
+        self.reaper.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.fast_path is not None:
+            self.fast_path.close()
+        self.engine.dispose()
+        close_lock(self.data_lock)
+        self.data_lock = None
+
+
+    def __enter__(self) -> 'LiteStash':
+        """Returns the LiteStash to a with block that closes it."""
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Closes the LiteStash at the end of a with block."""
+        self.close()
+
+
+    def _open(self) -> None:
+        """Raises ValueError if the LiteStash is closed."""
+        if self.closed:
+            logger.error('%s: %s', StashError.CLOSED.value, self.topology)
+            raise ValueError(StashError.CLOSED.value)
+
+
+    def _writable(self) -> None:
+        """Raises ValueError if the LiteStash is closed or read-only."""
+        self._open()
+        if self.engine.readonly:
+            logger.error('%s', ReadOnlyConf.write_error())
+            raise ValueError(ReadOnlyConf.write_error())
+
+
+    def _start_reshard(self, topology: Topology) -> Migration:
+        """Switches the store to the new layout of a reshard.
+
+        The manifest records both topologies before any write reaches the
+        new layout, and a database both layouts name keeps its directory.
+        The switch runs while the sweeper and write_behind are idle, and
+        buffered entries are regrouped by the new databases.
+        """
+        topology.path = self.topology.path
+        topology.previous = self.topology
+        if self.topology.placement is not None:
+            topology.place(self.topology.directories,
+                           self.topology.policy,
+                           self.topology.placement)
+        engine = self.engine.with_topology(topology)
+        metadata = Metadata(engine)
+        prepare_layout(engine, metadata, self.topology)
+        topology.save()
+        migration = Migration(self.topology,
+                              self.metadata,
+                              self.db_session,
+                              Lock())
+        db_session = Session(engine, metadata)
+        fast_path = FastPath(
+            engine, metadata
+        ) if self.fast_path is not None else None
+        previous_fast_path = self.fast_path
+
+        def switch():
+            self.migration = migration
+            self.db_session = db_session
+            self.metadata = metadata
+            self.fast_path = fast_path
+            self.engine = engine
+            self.topology = topology
+            self.reaper.use_topology(topology)
+
+        def switch_writes():
+            if self.write_behind is None:
+                switch()
+            else:
+                self.write_behind.use_topology(topology, switch)
+
+        if self.sweeper is None:
+            switch_writes()
+        else:
+            self.sweeper.use_topology(topology, switch_writes)
+        if previous_fast_path is not None:
+            previous_fast_path.close()
+        logger.info('resharding %s to %s', migration.topology, topology)
+        return migration
+
+
+    def _finish_reshard(self, migration: Migration) -> None:
+        """Records the new topology alone and drops the previous layout."""
+        self.topology.previous = None
+        self.topology.save()
+        data = None
+        if self.topology.path is not None:
+            data = Path(self.topology.path).parent
+        with migration.lock:
+            self.migration = None
+            drop_previous(self.engine, self.metadata, migration, data)
+
+
+    def _read_previous(self, migration: Migration, read, key_hash, read_again):
+        """Reads a key that a running reshard may not have moved yet.
+
+        read looks in the previous layout; after a miss read_again looks in
+        the new layout once more, in case the key moved in between.
+        """
+        try:
+            found = read(previous_connection(key_hash, migration))
+        except OperationalError as error:
+            logger.debug('previous layout dropped: %s', error)
+            found = None
+        return found if found else read_again()
+
+
+    def _mget_previous(self,
+                       migration: Migration,
+                       lookups: List[LiteStashData],
+                       found: List[Optional[LiteStashData]]
+                       ) -> List[Optional[LiteStashData]]:
+        """Fills the misses of an mget from the layout of a running reshard,
+        reading the new layout again for keys the previous one lacks."""
+        missing = [data for data, item in zip(lookups, found) if item is None]
+        if not missing:
+            return found
+        previous = order_results(missing, mget_data(
+            connections(missing, migration.topology),
+            migration.metadata,
+            migration.db_session,
+            self.executor
+        ))
+        moved = {data.key: item
+                 for data, item in zip(missing, previous) if item is not None}
+        gone = [data for data, item in zip(missing, previous) if item is None]
+        if gone:
+            again = order_results(gone, mget_data(
+                connections(gone, self.topology),
+                self.metadata,
+                self.db_session,
+                self.executor,
+                self.reaper.reap
+            ))
+            moved.update((data.key, item)
+                         for data, item in zip(gone, again) if item is not None)
+        return [moved.get(data.key) if item is None else item
+                for data, item in zip(lookups, found)]
+
+
+    def _delete_previous(self, migration: Migration, key_hash) -> None:
+        """Deletes a key from the layout of a running reshard."""
+        try:
+            delete_data(previous_connection(key_hash, migration, write=True))
+        except OperationalError as error:
+            logger.debug('previous layout dropped: %s', error)
+
+
+    def _opened(self) -> tuple:
+        """Returns the open databases of the current engine.
+
+        The checkpointer calls these methods rather than bound methods of an
+        engine, since a reshard replaces `self.engine`.
+        """
+        return self.engine.opened()
+
+
+    def _wal_stat(self, db_name: StrictStr) -> Optional[tuple]:
+        """Returns the WAL size and mtime of a database of the engine."""
+        return self.engine.wal_stat(db_name)
+
+
+    def _checkpoint(self, db_name: StrictStr, mode: StrictStr):
+        """Checkpoints the WAL of a database of the current engine."""
+        return self.engine.checkpoint(db_name, mode)
+
+
+    def flush(self) -> Optional[DataResults]:
+        """Writes every pending set in one transaction per database.
+
+        A durability barrier for write_behind: data set before flush returns
+        is committed once it returns.
+
+        Returns:
+            DataResults: The entries stored and the errors of each database,
+            or None without write_behind.
+        """
+        self._open()
+        if self.write_behind is None:
+            return None
+        return self.write_behind.flush()
+
+
+    def dbsize(self) -> StrictInt:
+        """Returns the number of stored entries.
+
+        Read from the row counter of each database instead of counting rows.
+        Entries past their ttl count until they are deleted.
+        """
+        return sum(sum(counts.values()) for counts in self.stats().values())
+
+
+    def stats(self) -> Dict[StrictStr, Dict[StrictStr, StrictInt]]:
+        """Returns the number of stored entries of each table of each database.
+
+        Pending write_behind data is flushed first so it is counted.
+        """
+        self._open()
+        if self.write_behind is not None:
+            self.write_behind.flush()
+        return count_data(self.db_session, self.executor)
+
+
+    def sweep_stats(self) -> Optional[SweepStats]:
+        """Returns the sweeper counters, or None without a sweeper."""
+        if self.sweeper is None:
+            return None
+        return self.sweeper.stats()
+
+
+    def checkpoint_stats(self) -> Optional[CheckpointStats]:
+        """Returns the WAL sizes and checkpoint timings, or None without a
+        checkpointer."""
+        if self.checkpointer is None:
+            return None
+        return self.checkpointer.stats()
+
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Returns the read cache counters, or None without a read cache."""
+        if self.read_cache is None:
+            return None
+        return self.read_cache.stats()
 
 
     def __repr__(self) -> str:
@@ -449,7 +1537,7 @@ Args:
         repr_str = 'LiteStash('
 
         repr_str += '\n  Databases:'
-        for db_name in self.metadata.__slots__:
+        for db_name in self.topology.databases:
             metadata = self.metadata.get(db_name).metadata
             repr_str += f'\n    - {db_name}: {list(metadata.tables.keys())}'
         repr_str += '\n)'
@@ -35,6 +35,7 @@ def test_stasherror():
     assert 'KEY_TYPE' == StashError.KEY_TYPE.name
     assert 'value must be JSON serializable' == StashError.SET_TYPE.value
     assert 'Key must be a string' == StashError.KEY_TYPE.value
+    assert 'LiteStash is closed' == StashError.CLOSED.value
 
 
 def test_data_scheme():
@@ -58,7 +59,25 @@ def test_stash_slots():
     assert StashSlots.ENGINE.value == 'engine'
     assert StashSlots.METADATA.value == 'metadata'
     assert StashSlots.DB_SESSION.value == 'db_session'
-    assert StashSlots.slots() == ('engine', 'metadata', 'db_session')
+    assert StashSlots.EXECUTOR.value == 'executor'
+    assert StashSlots.WORKERS.value == 'workers'
+    assert StashSlots.FAST_PATH.value == 'fast_path'
+    assert StashSlots.READ_CACHE.value == 'read_cache'
+    assert StashSlots.WRITE_BEHIND.value == 'write_behind'
+    assert StashSlots.SWEEPER.value == 'sweeper'
+    assert StashSlots.REAPER.value == 'reaper'
+    assert StashSlots.CHECKPOINTER.value == 'checkpointer'
+    assert StashSlots.TOPOLOGY.value == 'topology'
+    assert StashSlots.MIGRATION.value == 'migration'
+    assert StashSlots.DATA_LOCK.value == 'data_lock'
+    assert StashSlots.CLOSED.value == 'closed'
+    assert StashSlots.WEAKREF.value == '__weakref__'
+    assert StashSlots.slots() == (
+        'engine', 'metadata', 'db_session', 'executor', 'workers',
+        'fast_path', 'read_cache', 'write_behind', 'sweeper', 'checkpointer',
+        'reaper', 'topology', 'migration', 'data_lock', 'closed',
+        '__weakref__'
+    )
 
 def test_utils():
     assert Utils.SIZE.name == 'SIZE'
@@ -77,10 +96,12 @@ def test_engine_attr():
     assert EngineAttr.TYPE_NAME.value == 'EngineAttributes'
     assert EngineAttr.DB_NAME.value == 'db_name'
     assert EngineAttr.ENGINE.value == 'engine'
+    assert EngineAttr.READER.value == 'reader'
     assert EngineAttr.DOC.value == '''Defines a namedtuple for tuple returned by utils.setup_engine.
     Attributes:
         db_name (str): name of the database for this engine
-        engine (Engine): the sqlalchemy engine object
+        engine (Engine): the sqlalchemy engine of the single writer
+        reader (Engine): the sqlalchemy engine of the query_only read pool
     '''
     assert EngineAttr.VALUE_ERROR.value == 'No such engine found'
 
@@ -109,11 +130,13 @@ def test_session_attr():
     assert SessionAttr.TYPE_NAME.value == 'SessionAttributes'
     assert SessionAttr.DB_NAME.value == 'db_name'
     assert SessionAttr.SESSION.value == 'session'
+    assert SessionAttr.READER.value == 'reader'
     assert SessionAttr.VALUE_ERROR.value == 'Invalid database: no tables found'
     assert SessionAttr.DOC.value == '''Defines a namedtuple for all session attributes of a LiteStash.
     Attributes:
         db_name (str): name of the database for this session
-        session (Session): the sqlalchemy session object
+        session (Session): the sqlalchemy session factory of the writer
+        reader (Session): the sqlalchemy session factory of the readers
     '''
 
 def test_engine_conf_attr():
@@ -72,3 +72,15 @@ def test_sql_methods():
     assert Sql.old() == 'OLD'
     assert Sql.end() == 'END;'
 
+
+
+def test_pragma_profiles():
+    from litestash.core.config.schema_conf import PragmaProfile
+    assert PragmaProfile.names() == (
+        'throughput', 'durable', 'memory-lean', 'read-replica'
+    )
+    assert PragmaProfile.default() in PragmaProfile.names()
+    tunables = [name for name, _ in PragmaProfile.settings('throughput')]
+    for profile in PragmaProfile.names():
+        assert [name for name, _ in PragmaProfile.settings(profile)] == tunables
+    assert Pragma.setting('cache_size', -1024) == 'PRAGMA cache_size=-1024;'
@@ -0,0 +1,108 @@
+import pytest
+from litestash.core.checkpointer import Checkpointer, CheckpointStats
+from litestash.core.config.litestash_conf import CheckpointConf
+from litestash.store import LiteStash
+
+
+class Wal:
+    """Fake WAL files of open databases."""
+    def __init__(self, sizes):
+        self.sizes = dict(sizes)
+        self.writes = dict.fromkeys(self.sizes, 0)
+        self.calls = []
+
+    def write(self, db_name, size):
+        self.writes[db_name] += 1
+        self.sizes[db_name] = size
+
+    def stat(self, db_name):
+        return self.sizes[db_name], self.writes[db_name]
+
+    def checkpoint(self, db_name, mode):
+        self.calls.append((db_name, mode))
+        if mode == CheckpointConf.quiet_mode():
+            self.sizes[db_name] = 0
+        return 0, 10, 10
+
+    def checkpointer(self, **options):
+        return Checkpointer(lambda: tuple(self.sizes),
+                            self.stat,
+                            self.checkpoint,
+                            start=False,
+                            **options)
+
+
+@pytest.mark.parametrize('options', [
+    {'threshold': 0}, {'threshold': True}, {'interval': 0},
+    {'quiet_mode': 'PASSIVE'}
+])
+def test_checkpointer_invalid_settings(options):
+    with pytest.raises(ValueError):
+        Wal({}).checkpointer(**options)
+
+
+def test_checkpointer_escalates_once_a_wal_is_quiet():
+    wal = Wal({'shard_0': 500, 'shard_1': 50})
+    checkpointer = wal.checkpointer(threshold=100)
+    assert checkpointer.check() == 1
+    assert wal.calls == [('shard_0', 'PASSIVE')]
+
+    wal.write('shard_1', 60)
+    assert checkpointer.check() == 1
+    assert wal.calls[1:] == [('shard_0', 'TRUNCATE')]
+    assert checkpointer.check() == 1
+    assert wal.calls[2:] == [('shard_1', 'TRUNCATE')]
+    assert checkpointer.check() == 0
+
+    wal.write('shard_0', 700)
+    assert checkpointer.check() == 1
+    assert wal.calls[3:] == [('shard_0', 'PASSIVE')]
+    stats = checkpointer.stats()
+    assert isinstance(stats, CheckpointStats)
+    assert (stats.checkpoints, stats.quiet, stats.busy) == (4, 2, 0)
+    assert stats.wal_bytes == {'shard_0': 700}
+    assert stats.max_duration >= stats.last_duration
+
+
+def test_checkpointer_checkpoints_a_file_store(tmp_path):
+    stash = LiteStash(data=str(tmp_path), checkpoint=True,
+                      checkpoint_threshold=1, checkpoint_interval=60)
+    stash.mset([{f'key_{index}': {'index': index}} for index in range(200)])
+    assert stash.checkpointer.check() == len(stash.engine.opened())
+    assert all(size > 0
+               for size in stash.checkpoint_stats().wal_bytes.values())
+    assert stash.checkpointer.check() == len(stash.engine.opened())
+    assert set(stash.checkpoint_stats().wal_bytes.values()) == {0}
+    assert stash.checkpointer.check() == 0
+    assert stash.get('key_7').value == {'index': 7}
+    stash.checkpointer.close()
+    assert LiteStash(cache=True).checkpoint_stats() is None
+
+
+def test_checkpointer_thread_closes():
+    checkpointer = Checkpointer(tuple, None, None, interval=0.01)
+    checkpointer.close()
+    assert not checkpointer.thread.is_alive()
+
+
+def test_checkpointer_waits_for_new_frames_after_a_passive(tmp_path):
+    threshold = 256 * 1024
+    stash = LiteStash(data=str(tmp_path), shards=1, tables_per_shard=1,
+                      checkpoint=True, checkpoint_threshold=threshold,
+                      checkpoint_interval=60)
+    stash.mset([{f'key_{index}': 'x' * 500} for index in range(2000)])
+    assert stash.checkpointer.check() == 1
+    assert stash.checkpoint_stats().wal_bytes[stash.engine.opened()[0]] > (
+        threshold
+    )
+    stash.set('key_new', 'y')
+    assert stash.checkpointer.check() == 0
+    assert stash.checkpoint_stats().wal_bytes[stash.engine.opened()[0]] < (
+        threshold
+    )
+    assert stash.checkpointer.check() == 1
+    assert stash.checkpointer.check() == 0
+    stats = stash.checkpoint_stats()
+    assert (stats.checkpoints, stats.quiet) == (2, 1)
+    assert stash.get('key_new').value == 'y'
+    stash.close()
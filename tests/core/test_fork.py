@@ -0,0 +1,77 @@
+import os
+import pytest
+from litestash.store import LiteStash
+from litestash.store import OPEN_STASHES
+
+
+KEYS = [f'key_{index}' for index in range(100)]
+
+
+def fill(stash):
+    stash.mset([{key: {'key': key}} for key in KEYS])
+    assert stash.get(KEYS[0]).value == {'key': KEYS[0]}
+
+
+def test_close_releases_threads_and_engines(tmp_path):
+    with LiteStash(data=str(tmp_path), fast_path=True, workers=4,
+                   write_behind=True, sweep=True, checkpoint=True) as stash:
+        fill(stash)
+        stash.set('pending_key', {'pending': True})
+        assert stash in OPEN_STASHES
+    assert stash not in OPEN_STASHES
+    assert stash.engine.opened() == ()
+    assert not stash.write_behind.thread.is_alive()
+    assert not stash.sweeper.thread.is_alive()
+    assert not stash.checkpointer.thread.is_alive()
+    stash.close()
+    reopened = LiteStash(data=str(tmp_path))
+    assert reopened.get('pending_key').value == {'pending': True}
+    reopened.close()
+
+
+@pytest.mark.parametrize('use', [
+    lambda stash: stash.get(KEYS[0]),
+    lambda stash: stash.mget(KEYS),
+    lambda stash: stash.set('key_new', {'new': True}),
+    lambda stash: stash.mset([{'key_new': {'new': True}}]),
+    lambda stash: stash.delete(KEYS[0]),
+    lambda stash: stash.exists(KEYS[0]),
+    lambda stash: stash.keys(),
+    lambda stash: stash.iter_items(),
+    lambda stash: stash.scan(),
+    lambda stash: stash.dbsize(),
+    lambda stash: stash.flush(),
+])
+def test_closed_stash_refuses_use(tmp_path, use):
+    stash = LiteStash(data=str(tmp_path), write_behind=True)
+    fill(stash)
+    stash.close()
+    with pytest.raises(ValueError):
+        use(stash)
+    assert stash.engine.opened() == ()
+    stash.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+@pytest.mark.parametrize('options', [
+    {}, {'fast_path': True, 'workers': 4, 'read_cache': True}
+])
+def test_child_rebuilds_a_stash_made_before_the_fork(tmp_path, options):
+    stash = LiteStash(data=str(tmp_path), **options)
+    fill(stash)
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            stash.set('child_key', {'child': True})
+            if [data.value for data in stash.mget(KEYS)] == [
+                {'key': key} for key in KEYS
+            ] and stash.get('child_key').value == {'child': True}:
+                status = 0
+            stash.close()
+        finally:
+            os._exit(status)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert stash.get('child_key').value == {'child': True}
+    assert stash.get(KEYS[1]).value == {'key': KEYS[1]}
+    stash.close()
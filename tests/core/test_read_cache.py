@@ -0,0 +1,94 @@
+import pytest
+from threading import Event, Thread
+from litestash import store
+from litestash.core.read_cache import CacheStats, ReadCache
+from litestash.core.config.litestash_conf import ReadCacheConf
+from litestash.core.util.litestash_util import set_data
+from litestash.models import LiteStashData
+from litestash.store import LiteStash
+
+
+def data(key, value=None):
+    return LiteStashData(key=key, value=value)
+
+
+def test_read_cache_defaults():
+    cache = ReadCache()
+    assert cache.max_entries == ReadCacheConf.max_entries()
+    assert cache.max_bytes == ReadCacheConf.max_bytes()
+    assert cache.stats() == CacheStats(0, 0, 0, 0, 0)
+
+
+@pytest.mark.parametrize('bounds', [(0, 10), (10, 0), (True, 10), (1.5, 10)])
+def test_read_cache_invalid_bounds(bounds):
+    with pytest.raises(ValueError, match=ReadCacheConf.value_error()):
+        ReadCache(*bounds)
+
+
+def test_read_cache_hits_misses_and_lru_eviction():
+    cache = ReadCache(max_entries=2)
+    cache.fill('hash_a', data('key_a', 1), cache.version())
+    cache.fill('hash_b', data('key_b', 2), cache.version())
+    assert cache.get('hash_a').value == 1
+    cache.fill('hash_c', data('key_c', 3), cache.version())
+    assert cache.get('hash_b') is None
+    assert cache.get_many(['hash_a', 'hash_c', 'hash_d']).keys() == {
+        'hash_a', 'hash_c'
+    }
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (
+        3, 2, 1, 2
+    )
+
+
+def test_read_cache_byte_bound():
+    cache = ReadCache(max_bytes=40)
+    cache.fill('hash_a', data('key_a', 'x' * 10), cache.version())
+    cache.fill('hash_b', data('key_b', 'y' * 10), cache.version())
+    assert len(cache) == 1
+    assert cache.stats().nbytes <= 40
+    cache.fill('hash_c', data('key_c', 'z' * 100), cache.version())
+    assert cache.get('hash_c') is None
+
+
+def test_read_cache_fill_drops_stale_reads():
+    cache = ReadCache()
+    version = cache.version()
+    cache.discard('hash_a')
+    cache.fill('hash_a', data('key_a', 'old'), version)
+    assert cache.get('hash_a') is None
+    cache.fill('hash_a', data('key_a', 'new'), cache.version())
+    assert cache.get('hash_a').value == 'new'
+    cache.clear()
+    assert len(cache) == 0 and cache.stats().nbytes == 0
+
+
+def test_read_cache_drops_expired_entries():
+    cache = ReadCache()
+    cache.fill('hash_a', data('key_a', 1), cache.version(), expires_at=1)
+    cache.fill('hash_b', data('key_b', 2), cache.version(),
+               expires_at=2 ** 62)
+    cache.fill('hash_c', data('key_c', 3), cache.version(), expires_at=1)
+    assert cache.get_many(['hash_a', 'hash_b', 'hash_c']).keys() == {'hash_b'}
+    assert len(cache) == 1
+
+
+def test_racing_sets_never_cache_the_older_value(monkeypatch):
+    stash = LiteStash(cache=True, read_cache=True)
+    written, resume = Event(), Event()
+
+    def paused_set_data(connection):
+        set_data(connection)
+        if 'old' in str(connection[0].value):
+            written.set()
+            resume.wait(5)
+
+    monkeypatch.setattr(store, 'set_data', paused_set_data)
+    first = Thread(target=stash.set, args=('kkk', 'old'))
+    first.start()
+    assert written.wait(5)
+    stash.set('kkk', 'new')
+    assert stash.get('kkk').value == 'new'
+    resume.set()
+    first.join()
+    assert stash.get('kkk').value == 'new'
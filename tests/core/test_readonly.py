@@ -0,0 +1,84 @@
+import pytest
+import sqlite3
+from time import sleep
+from litestash.core.config.litestash_conf import ReadOnlyConf
+from litestash.core.util.engine_util import database_path
+from litestash.core.util.litestash_util import get_primary_key
+from litestash.store import LiteStash
+
+
+KEYS = [f'key_{index}' for index in range(40)]
+
+
+def fill(data):
+    stash = LiteStash(data=data)
+    stash.mset([{key: {'key': key}} for key in KEYS])
+    stash.set('expired_key', {'gone': True}, ttl=0.001)
+    sleep(0.01)
+    return stash
+
+
+def listing(tmp_path):
+    return sorted(str(path) for path in tmp_path.rglob('*')
+                  if not path.name.endswith('-shm'))
+
+
+def test_readonly_reads_without_writing(tmp_path):
+    writer = fill(str(tmp_path))
+    files = listing(tmp_path)
+    reader = LiteStash(data=str(tmp_path), readonly=True, fast_path=True)
+    assert reader.get(KEYS[3]).value == {'key': KEYS[3]}
+    assert [data.value for data in reader.mget(KEYS)] == [
+        {'key': key} for key in KEYS
+    ]
+    assert reader.get('expired_key') is None
+    assert sorted(reader.keys()) == sorted(KEYS)
+    assert reader.get('missing_key') is None
+    assert listing(tmp_path) == files
+
+    writer.set(KEYS[0], {'new': True})
+    assert reader.get(KEYS[0]).value == {'new': True}
+    for write in (lambda: reader.set('new_key', 1),
+                  lambda: reader.mset([{'new_key': 1}]),
+                  lambda: reader.delete(KEYS[1]),
+                  lambda: reader.expire(),
+                  lambda: reader.clear(),
+                  lambda: reader.reshard()):
+        with pytest.raises(ValueError, match=ReadOnlyConf.write_error()):
+            write()
+    assert writer.dbsize() == len(KEYS) + 1
+
+
+@pytest.mark.parametrize('options, error', [
+    ({'cache': True}, ReadOnlyConf.cache_error()),
+    ({'data': 'unused', 'sweep': True}, ReadOnlyConf.option_error()),
+    ({'data': 'unused', 'write_behind': True}, ReadOnlyConf.option_error()),
+    ({'data': 'unused', 'checkpoint': True}, ReadOnlyConf.option_error()),
+])
+def test_readonly_rejects_writing_options(options, error):
+    with pytest.raises(ValueError, match=error):
+        LiteStash(readonly=True, **options)
+
+
+def test_readonly_never_upgrades_a_schema(tmp_path):
+    fill(str(tmp_path))
+    db_name = LiteStash(data=str(tmp_path)).topology.db_name(
+        get_primary_key(KEYS[0])
+    )
+    with sqlite3.connect(database_path(str(tmp_path), db_name)) as connection:
+        connection.execute('PRAGMA user_version=0')
+    with pytest.raises(ValueError, match=ReadOnlyConf.schema_error()):
+        LiteStash(data=str(tmp_path), readonly=True).get(KEYS[0])
+
+
+def test_immutable_needs_a_checkpointed_snapshot(tmp_path):
+    writer = fill(str(tmp_path))
+    with pytest.raises(ValueError, match=ReadOnlyConf.wal_error()):
+        LiteStash(data=str(tmp_path), immutable=True).get(KEYS[0])
+    for db_name in writer.engine.opened():
+        writer.engine.checkpoint(db_name, 'TRUNCATE')
+    snapshot = LiteStash(data=str(tmp_path), immutable=True)
+    assert snapshot.engine.readonly
+    assert [data.value for data in snapshot.mget(KEYS)] == [
+        {'key': key} for key in KEYS
+    ]
@@ -0,0 +1,84 @@
+import pytest
+from time import sleep
+from litestash.core.config.litestash_conf import ReaperConf
+from litestash.core.reaper import Reaper
+from litestash.core.util.litestash_util import get_primary_key
+from litestash.core.util.schema_util import get_route
+
+
+class Deleter:
+    """Fake databases that delete every hash key handed over."""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, db_name, key_hashes, deadline):
+        self.calls.append((db_name, sorted(key_hashes)))
+        return len(key_hashes)
+
+
+def test_reaper_groups_hash_keys_by_database():
+    deleter = Deleter()
+    reaper = Reaper(deleter, delay=60)
+    key_hashes = [get_primary_key(f'key_{index}') for index in range(20)]
+    with reaper.condition:
+        for key_hash in key_hashes + key_hashes[:5]:
+            reaper.pending[key_hash] = None
+    assert reaper.drain() == 20
+    assert len(reaper) == 0
+    assert len(deleter.calls) == len({db for db, _ in deleter.calls})
+    for db_name, db_hashes in deleter.calls:
+        assert all(get_route(h[0]).db_name == db_name for h in db_hashes)
+    assert reaper.reaped == 20
+    reaper.close()
+
+
+def test_reaper_drops_when_full_and_drains_on_close():
+    deleter = Deleter()
+    reaper = Reaper(deleter, max_pending=2, delay=60)
+    for index in range(3):
+        reaper.reap(get_primary_key(f'key_{index}'))
+    assert reaper.dropped == 1
+    reaper.close()
+    assert not reaper.thread.is_alive()
+    assert reaper.reaped == 2 and len(reaper) == 0
+    reaper.reap(get_primary_key('key_late'))
+    assert len(reaper) == 0
+
+
+def test_reaper_thread_deletes_in_background():
+    deleter = Deleter()
+    reaper = Reaper(deleter, delay=0.001)
+    assert reaper.thread is None
+    reaper.reap(get_primary_key('key_one'))
+    assert reaper.thread.is_alive()
+    for _ in range(100):
+        if reaper.reaped:
+            break
+        reaper.thread.join(timeout=0.01)
+    assert reaper.reaped == 1
+    reaper.close()
+
+
+@pytest.mark.parametrize('options', [
+    {'max_pending': 0}, {'max_pending': True}, {'max_pending': 1.5},
+    {'delay': 0}, {'delay': -1}, {'delay': '1'}
+])
+def test_reaper_invalid_settings(options):
+    with pytest.raises(ValueError, match=ReaperConf.value_error()):
+        Reaper(Deleter(), **options)
+
+
+def test_reaper_batches_a_burst_of_reads():
+    deleter = Deleter()
+    reaper = Reaper(deleter, delay=0.5)
+    key_hashes = [get_primary_key(f'key_{index}') for index in range(20)]
+    for key_hash in key_hashes:
+        reaper.reap(key_hash)
+        sleep(0.005)
+    for _ in range(200):
+        if reaper.reaped:
+            break
+        reaper.thread.join(timeout=0.01)
+    assert reaper.reaped == len(key_hashes)
+    assert len(deleter.calls) == len({db for db, _ in deleter.calls})
+    reaper.close()
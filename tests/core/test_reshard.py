@@ -0,0 +1,158 @@
+import pytest
+import orjson
+from threading import Thread
+from litestash.cli import main
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.root import Tables
+from litestash.core.topology import Topology
+from litestash.core.util.reshard_util import migrate_table
+from litestash.core.util.topology_util import lock_alone
+from litestash.core.util.topology_util import lock_shared
+from litestash.core.util.topology_util import manifest_path
+from litestash.core.util.topology_util import read_manifest
+from litestash.store import LiteStash
+
+
+KEYS = [f'key_{index}' for index in range(600)]
+
+
+def fill(stash):
+    stash.mset([{key: {'key': key}} for key in KEYS])
+
+
+def check(stash, keys=KEYS):
+    assert [data.value for data in stash.mget(keys)] == [
+        {'key': key} for key in keys
+    ]
+    assert all(stash.get(key).value == {'key': key} for key in keys[::50])
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'fast_path': True, 'write_behind': True, 'sweep': True, 'workers': 4},
+    {'read_cache': True}
+])
+def test_reshard_moves_every_key(options):
+    stash = LiteStash(cache=True, **options)
+    fill(stash)
+    for topology in (Topology(shards=5, tables_per_shard=3),
+                     Topology(shards=3, tables_per_shard=2),
+                     Topology()):
+        stash.reshard(topology, chunk_size=64)
+        assert stash.topology.same_layout(topology)
+        assert stash.migration is None
+        check(stash)
+        assert stash.dbsize() == len(KEYS)
+        assert sorted(stash.keys()) == sorted(KEYS)
+    assert stash.reshard(Topology()) == 0
+
+
+def test_reads_and_writes_during_a_reshard():
+    stash = LiteStash(cache=True)
+    fill(stash)
+    migration = stash._start_reshard(Topology(shards=4, tables_per_shard=2))
+    assert stash.migration is migration
+    assert stash.topology.previous is migration.topology
+    db_name, table_name = migration.topology.scan_order()[0]
+    migrate_table(db_name, table_name, stash.metadata, stash.db_session,
+                  migration, 32)
+    check(stash)
+    assert stash.exists(KEYS[1])
+
+    stash.set(KEYS[0], {'new': True})
+    stash.delete(KEYS[1])
+    assert stash.get(KEYS[0]).value == {'new': True}
+    assert stash.get(KEYS[1]) is None
+    assert not stash.exists(KEYS[1])
+
+    with pytest.raises(ValueError, match=TopologyConf.reshard_error()):
+        stash.reshard(Topology(shards=9))
+    stash.reshard()
+    assert stash.migration is None
+    assert stash.get(KEYS[0]).value == {'new': True}
+    assert stash.get(KEYS[1]) is None
+    check(stash, KEYS[2:])
+    assert stash.dbsize() == len(KEYS) - 1
+
+
+def test_reads_stay_whole_while_a_reshard_runs():
+    stash = LiteStash(cache=True)
+    fill(stash)
+    worker = Thread(target=stash.reshard,
+                    args=(Topology(shards=6, tables_per_shard=2), 16))
+    worker.start()
+    while worker.is_alive():
+        check(stash, KEYS[::7])
+    worker.join()
+    check(stash)
+
+
+def test_unfinished_reshard_resumes_from_the_manifest(tmp_path):
+    data = str(tmp_path)
+    stash = LiteStash(data=data)
+    fill(stash)
+    stash._start_reshard(Topology(shards=3, tables_per_shard=2))
+    manifest = read_manifest(manifest_path(data))
+    assert manifest[TopologyConf.KEY_PREVIOUS.value] == Topology().manifest()
+    stash.close()
+
+    reopened = LiteStash(data=data, shards=3)
+    assert reopened.migration is not None
+    check(reopened)
+    assert reopened.reshard() == len(KEYS)
+    check(reopened)
+    assert TopologyConf.KEY_PREVIOUS.value not in read_manifest(
+        manifest_path(data)
+    )
+    assert not any((tmp_path / db_name).exists() for db_name in Tables.slots())
+    assert LiteStash(data=data).topology.same_layout(reopened.topology)
+
+
+def test_clear_ends_a_reshard(tmp_path):
+    stash = LiteStash(data=str(tmp_path))
+    fill(stash)
+    stash._start_reshard(Topology(shards=2, tables_per_shard=1))
+    stash.clear()
+    assert stash.migration is None
+    assert stash.dbsize() == 0
+    assert stash.get(KEYS[0]) is None
+
+
+def test_cli_reshards_a_data_directory(tmp_path, capsys):
+    data = str(tmp_path)
+    with LiteStash(data=data) as stash:
+        fill(stash)
+    assert main(['reshard', data, '--shards', '4',
+                 '--tables-per-shard', '2', '--chunk-size', '100']) == 0
+    assert capsys.readouterr().out.startswith('moved 600 keys')
+    assert main(['info', data]) == 0
+    manifest = orjson.loads(capsys.readouterr().out)
+    assert manifest[TopologyConf.KEY_SHARDS.value] == 4
+    stash = LiteStash(data=data)
+    assert stash.topology.shards == 4
+    check(stash)
+    assert main(['reshard', data, '--resume']) == 0
+    assert main(['reshard', data, '--shards', '0']) == 1
+    assert main(['info', str(tmp_path / 'missing')]) == 1
+    assert main(['reshard', str(tmp_path / 'missing'), '--prefix']) == 1
+
+
+def test_reshard_needs_the_data_directory_alone(tmp_path):
+    data = str(tmp_path)
+    stash = LiteStash(data=data)
+    fill(stash)
+    other = LiteStash(data=data, readonly=True)
+    with pytest.raises(ValueError, match=TopologyConf.busy_error()):
+        stash.reshard(Topology(shards=2, tables_per_shard=1))
+    assert main(['reshard', data, '--shards', '2']) == 1
+    assert stash.migration is None and stash.topology.is_prefix()
+    check(other, KEYS[:10])
+    other.close()
+
+    lock_alone(stash.data_lock)
+    with pytest.raises(ValueError, match=TopologyConf.locked_error()):
+        LiteStash(data=data)
+    lock_shared(stash.data_lock)
+    assert stash.reshard(Topology(shards=2, tables_per_shard=1)) == len(KEYS)
+    check(stash)
+    stash.close()
@@ -0,0 +1,50 @@
+import pytest
+from litestash.core.sweeper import Sweeper, SweepStats
+from litestash.core.config.litestash_conf import SweeperConf
+
+
+class Expired:
+    """Fake tables holding a number of expired rows each."""
+    def __init__(self, rows):
+        self.rows = dict(rows)
+        self.calls = []
+
+    def __call__(self, db_name, table_name, deadline, limit):
+        self.calls.append(table_name)
+        deleted = min(limit, self.rows.get(table_name, 0))
+        self.rows[table_name] = self.rows.get(table_name, 0) - deleted
+        return deleted
+
+
+@pytest.mark.parametrize('limits', [(0, 1, 1), (1, 0, 1), (1, 1, 0), (True, 1, 1)])
+def test_sweeper_invalid_limits(limits):
+    with pytest.raises(ValueError, match=SweeperConf.value_error()):
+        Sweeper(Expired({}), *limits, start=False)
+
+
+def test_sweeper_walks_every_table_and_backs_off():
+    expired = Expired({'tables_03_hash_0': 3, 'tables_yz_upper_hash_z': 1})
+    sweeper = Sweeper(expired, limit=2, interval=1, budget=60, start=False)
+    assert sweeper.sweep() == 4
+    assert len(set(expired.calls)) == 64
+    assert expired.calls.count('tables_03_hash_0') == 2
+    assert sweeper.interval == 1
+    assert sweeper.sweep() == 0
+    assert sweeper.interval == 2
+    stats = sweeper.stats()
+    assert isinstance(stats, SweepStats)
+    assert (stats.sweeps, stats.reclaimed, stats.last_reclaimed) == (2, 4, 0)
+
+
+def test_sweeper_speeds_up_when_out_of_budget():
+    expired = Expired({'tables_03_hash_0': 10 ** 6})
+    sweeper = Sweeper(expired, limit=1, interval=1, budget=0.001, start=False)
+    assert sweeper.sweep() > 0
+    assert sweeper.interval == SweeperConf.min_interval()
+    assert sweeper.position == 0
+
+
+def test_sweeper_thread_closes():
+    sweeper = Sweeper(Expired({}), interval=0.01)
+    sweeper.close()
+    assert not sweeper.thread.is_alive()
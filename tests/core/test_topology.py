@@ -0,0 +1,198 @@
+import os
+import pytest
+import orjson
+from collections import Counter
+from pathlib import Path
+from stat import S_ISDIR
+from types import SimpleNamespace
+from litestash.core.config.litestash_conf import PlacementConf
+from litestash.core.config.litestash_conf import TopologyConf
+from litestash.core.config.root import Tables
+from litestash.core.engine import Engine
+from litestash.core.schema import Metadata
+from litestash.core.session import Session
+from litestash.core.topology import PREFIX_TOPOLOGY
+from litestash.core.topology import Topology
+from litestash.core.util.litestash_util import connect
+from litestash.core.util.litestash_util import get_primary_key
+from litestash.core.util.litestash_util import get_stored
+from litestash.core.util.litestash_util import mk_datastore
+from litestash.core.util.litestash_util import set_data
+from litestash.core.util.schema_util import get_route
+from litestash.core.util.schema_util import mk_table_names
+from litestash.core.util import topology_util
+from litestash.core.util.topology_util import manifest_path
+from litestash.core.util.topology_util import read_manifest
+from litestash.core.util.topology_util import write_manifest
+from litestash.models import LiteStashData
+from litestash.store import LiteStash
+
+
+KEY_HASHES = [get_primary_key(f'key_{index}') for index in range(4000)]
+
+
+def test_prefix_topology_matches_prefix_routes():
+    assert PREFIX_TOPOLOGY.is_prefix()
+    assert PREFIX_TOPOLOGY.databases == Tables.slots()
+    for db_name in Tables.slots():
+        assert PREFIX_TOPOLOGY.table_names(db_name) == tuple(
+            mk_table_names(db_name)
+        )
+    for key_hash in KEY_HASHES[:200]:
+        assert PREFIX_TOPOLOGY.route(key_hash) == get_route(key_hash[0])
+
+
+def test_ring_routes_every_key_to_one_of_its_tables():
+    topology = Topology(shards=6, tables_per_shard=3)
+    assert not topology.is_prefix()
+    assert topology.databases == tuple(
+        TopologyConf.db_name(index) for index in range(6)
+    )
+    assert len(topology.scan_order()) == 18
+    routes = Counter(topology.route(key_hash) for key_hash in KEY_HASHES)
+    assert len(routes) == 18
+    for route, count in routes.items():
+        assert route.table_name in topology.table_names(route.db_name)
+        assert route.table is None
+        assert count > len(KEY_HASHES) / 18 / 2
+    again = Topology(shards=6, tables_per_shard=3)
+    assert all(again.route(h) == topology.route(h) for h in KEY_HASHES)
+
+
+def test_adding_a_shard_only_moves_keys_to_it():
+    before = Topology(shards=8, tables_per_shard=2)
+    after = Topology(shards=9, tables_per_shard=2)
+    moved = [
+        key_hash for key_hash in KEY_HASHES
+        if before.db_name(key_hash) != after.db_name(key_hash)
+    ]
+    assert all(after.db_name(h) == after.databases[-1] for h in moved)
+    assert len(moved) < len(KEY_HASHES) / 5
+
+
+@pytest.mark.parametrize('shards, tables', [
+    (0, 4), (TopologyConf.max_shards() + 1, 4), (True, 4), ('8', 4),
+    (8, 0), (8, TopologyConf.max_tables() + 1)
+])
+def test_ring_rejects_invalid_counts(shards, tables):
+    with pytest.raises(ValueError):
+        Topology(shards, tables)
+
+
+def test_manifest_round_trip():
+    topology = Topology(shards=3, tables_per_shard=5)
+    copy = Topology.from_manifest(orjson.loads(orjson.dumps(
+        topology.manifest()
+    )))
+    assert copy.manifest() == topology.manifest()
+    assert Topology.from_manifest(PREFIX_TOPOLOGY.manifest()).is_prefix()
+    with pytest.raises(ValueError):
+        Topology.from_manifest({'version': 99, 'router': 'prefix'})
+    with pytest.raises(ValueError):
+        Topology.from_manifest({'version': 1, 'router': 'unknown'})
+
+
+def test_load_records_and_enforces_the_manifest(tmp_path):
+    data = str(tmp_path / 'ring')
+    topology = Topology.load(data, shards=4, tables_per_shard=2)
+    assert manifest_path(data).exists()
+    reopened = Topology.load(data)
+    assert reopened.manifest() == topology.manifest()
+    assert Topology.load(data, shards=4).manifest() == topology.manifest()
+    with pytest.raises(ValueError, match=TopologyConf.mismatch_error()):
+        Topology.load(data, shards=5)
+
+    prefix = str(tmp_path / 'prefix')
+    assert Topology.load(prefix).is_prefix()
+    with pytest.raises(ValueError, match=TopologyConf.mismatch_error()):
+        Topology.load(prefix, shards=4)
+
+    legacy = tmp_path / 'legacy'
+    (legacy / Tables.TABLES_03.value).mkdir(parents=True)
+    with pytest.raises(ValueError, match=TopologyConf.layout_error()):
+        Topology.load(str(legacy), shards=4)
+
+
+def test_write_manifest_syncs_before_and_after_the_rename(tmp_path,
+                                                        monkeypatch):
+    calls = []
+    fsync, replace = topology_util.os.fsync, topology_util.os.replace
+    def record_fsync(fd):
+        calls.append('dir' if S_ISDIR(os.fstat(fd).st_mode) else 'file')
+        fsync(fd)
+    def record_replace(source, target):
+        calls.append('replace')
+        replace(source, target)
+    monkeypatch.setattr(topology_util.os, 'fsync', record_fsync)
+    monkeypatch.setattr(topology_util.os, 'replace', record_replace)
+    path = manifest_path(str(tmp_path / 'data'))
+    write_manifest(path, Topology(shards=2).manifest())
+    assert calls == ['file', 'replace', 'dir']
+    assert read_manifest(path) == Topology(shards=2).manifest()
+
+
+def test_ring_topology_stores_and_reads_data():
+    topology = Topology(shards=3, tables_per_shard=2)
+    engine = Engine(cache=True, topology=topology)
+    metadata = Metadata(engine)
+    db_session = Session(engine, metadata)
+    data = mk_datastore(LiteStashData(key='ring_key', value={'a': 1}))
+    set_data(connect(data, metadata, db_session))
+    stored = get_stored(connect(LiteStashData(key='ring_key'),
+                                metadata,
+                                db_session))
+    assert stored[0] == LiteStashData(key='ring_key', value={'a': 1})
+    assert engine.opened() == (topology.db_name(data.key_hash),)
+    assert repr(engine).count('.db, ') == 1
+    assert engine.opened() == (topology.db_name(data.key_hash),)
+    with pytest.raises(ValueError):
+        engine.get(Tables.TABLES_03.value)
+
+
+def test_place_spreads_databases_over_directories(tmp_path, monkeypatch):
+    directories = [str(tmp_path / name) for name in 'abc']
+    topology = Topology(shards=7, tables_per_shard=1)
+    topology.place(directories)
+    assert topology.policy == PlacementConf.round_robin()
+    assert [topology.directory(db) for db in topology.databases] == [
+        directories[index % 3] for index in range(7)
+    ]
+    assert Topology().directory('tables_03', 'data') == 'data'
+
+    free = dict(zip(directories, (300, 100, 0)))
+    monkeypatch.setattr(topology_util, 'disk_usage',
+                        lambda path: SimpleNamespace(free=free[path]))
+    topology.place(directories, PlacementConf.free_space())
+    placed = Counter(topology.placement.values())
+    assert placed[directories[0]] > placed[directories[1]] > 0
+    assert directories[2] not in placed
+
+    grown = Topology(shards=8, tables_per_shard=1)
+    grown.place(directories, PlacementConf.free_space(), topology.placement)
+    assert all(grown.directory(db) == topology.directory(db)
+               for db in topology.databases)
+
+    for invalid in ([], 'a', [directories[0], directories[0]]):
+        with pytest.raises(ValueError):
+            topology.place(invalid)
+    with pytest.raises(ValueError, match=PlacementConf.policy_error()):
+        topology.place(directories, 'random')
+
+
+def test_placement_is_recorded_and_enforced(tmp_path):
+    data = str(tmp_path / 'data')
+    directories = [str(tmp_path / 'nvme0'), str(tmp_path / 'nvme1')]
+    stash = LiteStash(data=data, directories=directories)
+    stash.set('placed_key', {'a': 1})
+    db_name = stash.topology.db_name(get_primary_key('placed_key'))
+    assert (Path(stash.topology.directory(db_name)) / db_name).is_dir()
+    assert not (Path(data) / db_name).exists()
+
+    reopened = Topology.load(data)
+    assert reopened.placement == stash.topology.placement
+    assert Topology.load(data, directories=directories[::-1]).placement
+    with pytest.raises(ValueError, match=PlacementConf.mismatch_error()):
+        Topology.load(data, directories=directories[:1])
+    assert LiteStash(data=data).get('placed_key').value == {'a': 1}
+    with pytest.raises(ValueError, match=PlacementConf.cache_error()):
+        LiteStash(cache=True, directories=directories)
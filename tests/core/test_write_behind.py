@@ -0,0 +1,115 @@
+import pytest
+from litestash.core.write_behind import WriteBehind
+from litestash.core.config.litestash_conf import WriteBehindConf
+from litestash.core.util.litestash_util import mk_datastore
+from litestash.models import LiteStashData
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, db_name, entries):
+        self.batches.append((db_name, [entry.key for entry in entries]))
+        return db_name, entries, [], []
+
+
+def store(key, value=None):
+    return mk_datastore(LiteStashData(key=key, value=value))
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.mark.parametrize('limits', [(0, 1), (1, 0), (1.5, 1), (True, 1)])
+def test_write_behind_invalid_limits(recorder, limits):
+    with pytest.raises(ValueError, match=WriteBehindConf.value_error()):
+        WriteBehind(recorder, *limits)
+
+
+def test_write_behind_read_your_writes_and_flush(recorder):
+    buffer = WriteBehind(recorder, flush_interval=60)
+    first = store('key_one', 1)
+    buffer.put(first)
+    buffer.put(store('key_one', 2))
+    buffer.put(store('key_two', 3))
+    assert buffer.pending(first.key_hash).value == 2
+    assert len(buffer) == 2
+    buffer.discard(first.key_hash)
+    assert buffer.pending(first.key_hash) is None
+
+    results = buffer.flush()
+    assert not results.has_errors()
+    assert [keys for _, keys in recorder.batches] == [['key_two']]
+    assert len(buffer) == 0
+    buffer.close()
+    with pytest.raises(ValueError, match=WriteBehindConf.closed_error()):
+        buffer.put(first)
+
+
+def test_write_behind_flushes_one_batch_per_database(recorder):
+    buffer = WriteBehind(recorder, flush_interval=60)
+    for index in range(50):
+        buffer.put(store(f'key_{index}', index))
+    buffer.close()
+    assert len(recorder.batches) == len({db for db, _ in recorder.batches})
+    assert sum(len(keys) for _, keys in recorder.batches) == 50
+
+
+def test_write_behind_keeps_entries_on_failure():
+    def fail(db_name, entries):
+        raise RuntimeError('disk full')
+    buffer = WriteBehind(fail, flush_interval=60)
+    data = store('key_one', 1)
+    buffer.put(data)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert buffer.pending(data.key_hash).value == 1
+    buffer.clear()
+    buffer.close()
+
+
+def test_write_behind_retries_entries_of_failed_batches():
+    written = {}
+    locked = {'key_one', 'key_two'}
+    def writer(db_name, entries):
+        stored = [entry for entry in entries if entry.key not in locked]
+        errors = []
+        if len(stored) < len(entries):
+            errors.append('database is locked')
+            if 'key_one' in locked:
+                buffer.put(store('key_one', 2))
+        written.update((entry.key, entry.value) for entry in stored)
+        return db_name, stored, errors, []
+    buffer = WriteBehind(writer, flush_interval=60)
+    keys = {'key_one': 1, 'key_two': 2, 'key_three': 3}
+    for key, value in keys.items():
+        buffer.put(store(key, value))
+    assert buffer.flush().has_errors()
+    assert list(written) == ['key_three']
+    assert len(buffer) == 2
+    assert buffer.pending(store('key_one').key_hash).value == 2
+    assert buffer.pending(store('key_two').key_hash).value == 2
+    locked.clear()
+    assert not buffer.flush().has_errors()
+    assert len(buffer) == 0
+    assert written == {key: store(key, 2 if key == 'key_one' else value).value
+                       for key, value in keys.items()}
+    buffer.close()
+
+
+def test_write_behind_marks_expired_pending_entries(recorder):
+    buffer = WriteBehind(recorder, flush_interval=60)
+    live = store('key_live', 1)
+    expired = store('key_expired', 2)
+    expired.expires_at = 1
+    buffer.put(live)
+    buffer.put(expired)
+    pending = buffer.pending_many([live.key_hash, expired.key_hash, 'absent'])
+    assert pending[live.key_hash].value == 1
+    assert expired.key_hash in pending and pending[expired.key_hash] is None
+    assert 'absent' not in pending
+    buffer.clear()
+    buffer.close()
@@ -0,0 +1,130 @@
+import pytest
+import sqlite3
+from litestash.core.config.litestash_conf import EngineConf
+from litestash.core.config.litestash_conf import WriterConf
+from litestash.core.config.schema_conf import PragmaProfile
+from litestash.core.util.engine_util import mk_pragmas
+from litestash.core.util.engine_util import checkpoint_wal
+from litestash.core.util.engine_util import setup_engine
+from litestash.core.util.engine_util import wal_stat
+
+
+@pytest.mark.parametrize('profile', PragmaProfile.names())
+def test_mk_pragmas_profiles(profile):
+    assert mk_pragmas(profile) == PragmaProfile.settings(profile)
+
+
+def test_mk_pragmas_overrides():
+    settings = dict(mk_pragmas('durable', {'cache_size': -2048}))
+    assert settings['cache_size'] == -2048
+    assert settings['synchronous'] == 'FULL'
+    assert mk_pragmas() == PragmaProfile.settings(PragmaProfile.default())
+
+
+@pytest.mark.parametrize('profile, pragmas, error', [
+    ('fast', None, EngineConf.profile_error()),
+    (None, {'journal_mode': 'OFF'}, EngineConf.pragma_error()),
+    (None, {'cache_size': '1; DROP TABLE x'}, EngineConf.pragma_error()),
+    (None, {'cache_size': True}, EngineConf.pragma_error()),
+])
+def test_mk_pragmas_invalid(profile, pragmas, error):
+    with pytest.raises(ValueError, match=error):
+        mk_pragmas(profile, pragmas)
+
+
+def test_setup_engine_applies_pragmas(tmp_path):
+    pragmas = mk_pragmas('memory-lean', {'busy_timeout': 1234})
+    engine = setup_engine('tables_03', data_path=str(tmp_path),
+                          pragmas=pragmas).engine
+    connection = engine.raw_connection()
+    try:
+        for name, value in pragmas:
+            if isinstance(value, int):
+                assert connection.execute(f'PRAGMA {name}').fetchone()[0] \
+                    == value
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert connection.execute('PRAGMA temp_store').fetchone()[0] == 1
+    finally:
+        connection.close()
+        engine.dispose()
+
+
+def test_setup_engine_memory_connections():
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+    engine_attr = setup_engine('tables_03', cache=True)
+    engine, reader = engine_attr.engine, engine_attr.reader
+    other = setup_engine('tables_03', cache=True).reader
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE shared (x INTEGER)')
+        connection.exec_driver_sql('INSERT INTO shared VALUES (1)')
+    barrier = Barrier(4)
+
+    def read(_):
+        connection = reader.raw_connection()
+        try:
+            barrier.wait(timeout=5)
+            return (id(connection.dbapi_connection),
+                    connection.execute('SELECT x FROM shared').fetchone()[0])
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(read, range(4)))
+    assert len({connection for connection, _ in results}) == 4
+    assert all(x == 1 for _, x in results)
+    engine.dispose()
+    reader.dispose()
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql(
+            'SELECT x FROM shared'
+        ).scalar() == 1
+    with other.connect() as connection:
+        assert connection.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE name = 'shared'"
+        ).scalar() == 0
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_setup_engine_reader_writer(cache, tmp_path):
+    from sqlalchemy.exc import OperationalError
+    engine_attr = setup_engine('tables_03', cache=cache,
+                               data_path=str(tmp_path))
+    engine, reader = engine_attr.engine, engine_attr.reader
+    assert engine.pool.size() == WriterConf.pool_size()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE split (x INTEGER)')
+        assert connection.exec_driver_sql(
+            'PRAGMA query_only'
+        ).scalar() == 0
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql(
+            'PRAGMA query_only'
+        ).scalar() == 1
+        with pytest.raises(OperationalError, match='readonly'):
+            connection.exec_driver_sql('INSERT INTO split VALUES (1)')
+    if not cache:
+        other = sqlite3.connect(tmp_path / 'tables_03' / 'tables_03.db',
+                                timeout=0)
+        with engine.begin() as connection:
+            connection.exec_driver_sql('SELECT 1')
+            with pytest.raises(sqlite3.OperationalError, match='locked'):
+                other.execute('BEGIN IMMEDIATE')
+        other.close()
+    engine.dispose()
+    reader.dispose()
+
+
+def test_checkpoint_wal_truncates_the_wal(tmp_path):
+    engine_stash = setup_engine('tables_03', data_path=str(tmp_path))
+    with engine_stash.engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE t (x)')
+        connection.exec_driver_sql('INSERT INTO t VALUES (1)')
+    assert wal_stat(engine_stash)[0] > 0
+    busy, log, checkpointed = checkpoint_wal(engine_stash)
+    assert busy == 0 and log == checkpointed > 0
+    assert checkpoint_wal(engine_stash, 'TRUNCATE') == (0, 0, 0)
+    assert wal_stat(engine_stash)[0] == 0
+    engine_stash.engine.dispose()
+    engine_stash.reader.dispose()
+    assert wal_stat(setup_engine('tables_03', cache=True)) is None
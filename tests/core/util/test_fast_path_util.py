@@ -0,0 +1,47 @@
+import pytest
+from litestash.core.engine import Engine
+from litestash.core.fast_path import FastPath
+from litestash.core.schema import Metadata
+from litestash.core.config.schema_conf import FastSql
+from litestash.core.util.core_util import mk_statements
+from litestash.core.util.fast_path_util import *
+from litestash.core.util.litestash_util import get_primary_key
+from litestash.core.util.litestash_util import mk_datastore
+from litestash.core.util.schema_util import mk_table_names
+from litestash.models import LiteStashData
+
+
+@pytest.fixture
+def fast_path():
+    engine = Engine(cache=True)
+    fast_path = FastPath(engine, Metadata(engine))
+    yield fast_path
+    fast_path.close()
+
+
+def test_mk_statements():
+    statements = mk_statements('tables_03')
+    assert list(statements) == list(mk_table_names('tables_03'))
+    assert statements['tables_03_hash_0'].get == FastSql.get('tables_03_hash_0')
+
+
+def test_load_value():
+    assert load_value('{"a": [1, 2]}') == {'a': [1, 2]}
+    assert load_value('null') is None
+    assert load_value(3.5) == 3.5
+
+
+def test_fast_set_get_exists_delete(fast_path):
+    data = mk_datastore(LiteStashData(key='fast_key', value={'a': [1, 2]}))
+    key_hash = get_primary_key('fast_key')
+    assert fast_get(fast_path, key_hash) is None
+    assert not fast_exists(fast_path, key_hash)
+
+    fast_set(fast_path, data)
+    assert fast_exists(fast_path, key_hash)
+    assert fast_get(fast_path, key_hash) == LiteStashData(
+        key='fast_key', value={'a': [1, 2]}
+    )
+
+    fast_delete(fast_path, key_hash)
+    assert fast_get(fast_path, key_hash) is None
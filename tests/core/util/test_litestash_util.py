@@ -29,7 +29,11 @@ from litestash.core.config.litestash_conf import SessionAttr
 from litestash.core.config.litestash_conf import EngineConf
 from litestash.core.config.litestash_conf import Utils
 from litestash.core.config.litestash_conf import DataScheme
+from litestash.core.config.litestash_conf import StashError
+from litestash.core.config.litestash_conf import ScanConf
 from litestash.core.util.litestash_util import *
+from litestash.core.util.schema_util import get_route
+from litestash.core.util.schema_util import mk_table_names
 from litestash.core.config.tables import *
 
 @pytest.fixture
@@ -212,6 +216,406 @@ def test_get_time():
     assert isinstance(result[1], int)  # microseconds
 
 
+def test_chunks():
+    items = list(range(10))
+    assert list(chunks(items, 4)) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert list(chunks([], 4)) == []
+    assert len(next(chunks(list(range(5000))))) == Utils.MAX_VARIABLES.value
+
+
+def test_table_keys():
+    data = [KeyHash(get_primary_key(f'key_{n}'), f'key_{n}') for n in range(64)]
+    data.append(data[0])
+    tables = table_keys(data)
+    assert sum(len(hashes) for hashes in tables.values()) == 64
+    for table_name, hashes in tables.items():
+        assert all(get_route(h[0]).table_name == table_name for h in hashes)
+
+
+def test_order_results():
+    keys = [LiteStashData(key=k) for k in ('key_a', 'key_b', 'key_c')]
+    results = DataResults()
+    results[Tables.TABLES_03.value] = LiteStashData(key='key_c', value=3)
+    results[Tables.TABLES_AB.value] = LiteStashData(key='key_a', value=1)
+    ordered = order_results(keys, results)
+    assert [data.key if data else None for data in ordered] == [
+        'key_a', None, 'key_c'
+    ]
+
+
+def test_fan_out():
+    from concurrent.futures import ThreadPoolExecutor
+    db_connections = GetDataConnections()
+    for n in range(32):
+        key = f'key_{n}'
+        key_hash = KeyHash(get_primary_key(key), key)
+        db_connections[get_route(key_hash.key_hash[0]).db_name] = key_hash
+
+    def process(db_name, data):
+        return db_name, len(data)
+
+    serial = list(fan_out(process, db_connections))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = list(fan_out(process, db_connections, executor))
+    assert serial == parallel
+    assert sum(count for _, count in parallel) == 32
+
+
+def test_data_results_errors():
+    results = DataResults()
+    assert not results.has_errors()
+    results.add_errors(Tables.TABLES_03.value, [])
+    assert not results.has_errors()
+    results.add_errors(Tables.TABLES_03.value, ['database is locked'])
+    assert results.errors == {Tables.TABLES_03.value: ['database is locked']}
+
+
+def test_data_results_batches():
+    results = DataResults()
+    stored = BatchResult(Tables.TABLES_03.value, 'tables_03_hash_0', 2, None)
+    failed = BatchResult(Tables.TABLES_03.value, 'tables_03_hash_1', 1, 'full')
+    results.add_batches([stored, failed])
+    assert results.batches == [stored, failed]
+    assert results.failed_batches() == [failed]
+
+
+def test_table_entries_and_store_row():
+    first = mk_datastore(LiteStashData(key='key_one', value=1))
+    second = mk_datastore(LiteStashData(key='key_two', value=2))
+    latest = mk_datastore(LiteStashData(key='key_one', value=3))
+    tables = table_entries([first, second, latest])
+    assert sum(len(entries) for entries in tables.values()) == 2
+    assert latest in tables[get_route(first.key_hash[0]).table_name]
+    assert store_row(latest) == {
+        'key_hash': latest.key_hash,
+        'key': 'key_one',
+        'value': 3,
+        'timestamp': latest.timestamp,
+        'microsecond': latest.microsecond,
+        'expires_at': None
+    }
+
+
+def test_get_expires_at():
+    now = GetTime(1700000000, 250000)
+    assert get_expires_at(2, now) == 1700000002250000
+    assert get_expires_at(0.5, now) == 1700000000750000
+    for ttl in (0, -1, True, '5'):
+        with pytest.raises(ValueError, match=StashError.TTL_VALUE.value):
+            get_expires_at(ttl, now)
+
+
+def test_get_deadline():
+    assert get_deadline(GetTime(1700000000, 5)) == 1700000000000005
+    assert get_deadline(1700000000.5) == 1700000000500000
+    assert get_deadline(datetime.fromtimestamp(1700000000)) == \
+        1700000000000000
+    assert get_deadline() >= get_deadline(1700000000)
+    with pytest.raises(TypeError, match=StashError.DEADLINE_TYPE.value):
+        get_deadline('now')
+
+
+def test_mk_datastore_ttl():
+    assert mk_datastore(LiteStashData(key='no_ttl')).expires_at is None
+    data = mk_datastore(LiteStashData(key='with_ttl', value=1), ttl=10)
+    written = data.timestamp * 1000000 + data.microsecond
+    assert data.expires_at == written + 10000000
+
+
+def test_expire_data():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    now = get_time()
+    expired = mk_datastore(LiteStashData(key='expired', value=1), ttl=1)
+    kept = mk_datastore(LiteStashData(key='kept', value=2), ttl=100)
+    forever = mk_datastore(LiteStashData(key='forever', value=3))
+    mset_data(connections([expired, kept, forever]), metadata, manager)
+    deadline = get_expires_at(2, now)
+    only_kept = connections([LiteStashData(key='kept')])
+    assert expire_data(metadata, manager, deadline, only_kept) == 0
+    assert expire_data(metadata, manager, deadline) == 1
+    assert expire_data(metadata, manager, deadline) == 0
+
+
+
+def test_lazy_expiry_on_read():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    live = mk_datastore(LiteStashData(key='live', value=1), ttl=100)
+    expired = mk_datastore(LiteStashData(key='gone', value=2))
+    expired.expires_at = 1
+    mset_data(connections([live, expired]), metadata, manager)
+    reaped = []
+    def read(key):
+        return connect(LiteStashData(key=key), metadata, manager)
+    assert get_data(read('gone'), reaped.append) is None
+    assert not does_exist(read('gone'), reaped.append)
+    data, expires_at = get_stored(read('live'), reaped.append)
+    assert data.value == 1 and expires_at == live.expires_at
+    keys = [LiteStashData(key='live'), LiteStashData(key='gone')]
+    results = mget_data(connections(keys), metadata, manager, reap=reaped.append)
+    assert order_results(keys, results)[1] is None
+    assert results.expires_at == {'live': live.expires_at}
+    assert set(reaped) == {expired.key_hash}
+    deadline = get_deadline()
+    for data, reaped_rows in ((expired, 1), (live, 0)):
+        db_name = get_route(data.key_hash[0]).db_name
+        assert reap_database(db_name, [data.key_hash], metadata, manager,
+                             deadline) == reaped_rows
+
+
+
+@pytest.mark.parametrize('chunk_size', [0, -1, 1.5, True, '10'])
+def test_get_chunk_size_invalid(chunk_size):
+    with pytest.raises(ValueError, match=StashError.CHUNK_SIZE.value):
+        get_chunk_size(chunk_size)
+
+
+def test_stream_table():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    assert get_chunk_size() == Utils.chunk_size()
+    stored = [mk_datastore(LiteStashData(key=f'key_{index}', value=index))
+              for index in range(200)]
+    expired = mk_datastore(LiteStashData(key='key_gone', value=-1))
+    expired.expires_at = 1
+    mset_data(connections(stored + [expired]), metadata, manager)
+    route = get_route(expired.key_hash[0])
+    table = metadata.get(route.db_name).metadata.tables[route.table_name]
+    session = manager.get(route.db_name).session
+    in_table = sorted(
+        (data.key_hash, data.key, data.value) for data in stored
+        if get_route(data.key_hash[0]).table_name == route.table_name
+    )
+    rows = list(stream_table(session, table, ['key', 'value'], chunk_size=1))
+    assert rows == [(key, value) for _, key, value in in_table]
+    assert list(stream_table(session, table, ['key'], deadline=0)) == sorted(
+        [(key,) for _, key, _ in in_table] + [('key_gone',)],
+        key=lambda row: get_primary_key(row[0])
+    )
+
+
+
+def test_scan_cursor_round_trip():
+    assert read_scan_cursor(None) == (0, '')
+    assert read_scan_cursor(ScanConf.start()) == (0, '')
+    db_name, table_name = scan_order()[5]
+    cursor = mk_scan_cursor(db_name, table_name, 'abc')
+    assert read_scan_cursor(cursor) == (5, 'abc')
+
+
+@pytest.mark.parametrize('cursor', [
+    'garbage',
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+    base64.urlsafe_b64encode(b'["tables_03", "nope", "abc"]').decode(),
+])
+def test_read_scan_cursor_invalid(cursor):
+    with pytest.raises(ValueError, match=ScanConf.cursor_error()):
+        read_scan_cursor(cursor)
+
+
+def test_scan_tables():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    stored = [mk_datastore(LiteStashData(key=f'{kind}:{index}', value=index))
+              for kind in ('user', 'item') for index in range(100)]
+    mset_data(connections(stored), metadata, manager)
+    with pytest.raises(ValueError, match=ScanConf.count_error()):
+        scan_tables(metadata, manager, count=0)
+    cursor, found, calls = None, [], 0
+    while cursor != ScanConf.start():
+        cursor, keys = scan_tables(metadata, manager, cursor, 'user:*', 7)
+        assert len(keys) <= 7
+        found.extend(keys)
+        calls += 1
+    assert sorted(found) == sorted(f'user:{index}' for index in range(100))
+    assert calls >= 200 // 7
+
+
+@pytest.mark.parametrize('pattern, matches', [
+    ('user:[^a]', ['user:!', 'user:b']),
+    ('user:[!a]', ['user:!', 'user:a']),
+    ('user:[a-b]', ['user:a', 'user:b']),
+])
+def test_scan_and_match_keys_share_glob(pattern, matches):
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    stored = [mk_datastore(LiteStashData(key=f'user:{kind}'))
+              for kind in 'ab!']
+    mset_data(connections(stored), metadata, manager)
+    assert sorted(match_keys(metadata, manager, pattern=pattern)) == matches
+    cursor, found = None, []
+    while cursor != ScanConf.start():
+        cursor, keys = scan_tables(metadata, manager, cursor, pattern)
+        found.extend(keys)
+    assert sorted(found) == matches
+
+
+
+@pytest.mark.parametrize('prefix, pattern, bounds', [
+    (None, None, ('', None)),
+    ('user:42:', None, ('user:42:', 'user:42;')),
+    (None, 'sess:*', ('sess:', 'sess;')),
+    ('se', 'sess:[ab]?', ('sess:', 'sess;')),
+    ('sess:42', 'sess*', ('sess:42', 'sess:43')),
+    ('u', 'sess:*', ('u', 'u')),
+    ('a\U0010ffff', None, ('a\U0010ffff', 'b')),
+    ('\ud7ff', None, ('\ud7ff', '\ue000')),
+])
+def test_key_range(prefix, pattern, bounds):
+    assert key_range(prefix, pattern) == bounds
+
+
+def test_key_range_invalid():
+    with pytest.raises(TypeError, match=StashError.MATCH_TYPE.value):
+        key_range(42)
+
+
+def test_match_keys(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    stored = [mk_datastore(LiteStashData(key=f'user:{tenant}:{index}'))
+              for tenant in range(12) for index in range(10)]
+    expired = mk_datastore(LiteStashData(key='user:1:gone'))
+    expired.expires_at = 1
+    mset_data(connections(stored + [expired]), metadata, manager)
+    tenant = sorted(f'user:1:{index}' for index in range(10))
+    assert sorted(match_keys(metadata, manager, prefix='user:1:')) == tenant
+    assert list(match_keys(metadata, manager, 'sess', 'user:1:*')) == []
+    with ThreadPoolExecutor(4) as executor:
+        found = match_keys(metadata, manager, pattern='user:1?:[0-4]',
+                           executor=executor)
+        assert sorted(found) == sorted(
+            f'user:{tenant}:{index}' for tenant in (10, 11) for index in range(5)
+        )
+    with ThreadPoolExecutor(4) as executor:
+        monkeypatch.setattr(Utils, 'batch_size', staticmethod(lambda: 3))
+        found = match_keys(metadata, manager, prefix='user:',
+                           executor=executor)
+        assert sorted(found) == sorted(data.key for data in stored)
+    route = get_route(expired.key_hash[0])
+    table = metadata.get(route.db_name).metadata.tables[route.table_name]
+    session = manager.get(route.db_name).session
+    in_table = sorted(key for key in tenant
+                      if get_route(get_primary_key(key)[0]) == route)
+    assert list(match_table(session, table, 'user:1:', chunk_size=1)) == in_table
+
+
+
+def test_merge_sorted():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    stored = [mk_datastore(LiteStashData(key=f'key_{index:03d}', value=index))
+              for index in range(300)]
+    expired = mk_datastore(LiteStashData(key='key_150x'))
+    expired.expires_at = 1
+    mset_data(connections(stored + [expired]), metadata, manager)
+    merged = list(merge_sorted(metadata, manager, chunk_size=2))
+    assert [data.key for data in merged] == [data.key for data in stored]
+    assert [data.value for data in merged] == list(range(300))
+    window = merge_sorted(metadata, manager, 'key_100', 'key_200')
+    assert [data.key for data in window] == [
+        f'key_{index:03d}' for index in range(100, 200)
+    ]
+    with pytest.raises(TypeError, match=StashError.KEY_TYPE.value):
+        merge_sorted(metadata, manager, 1)
+
+
+
+def test_count_data():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    from litestash.core.util.core_util import upgrade_schema
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    counts = count_data(manager)
+    assert len(counts) == len(Tables)
+    assert sum(sum(tables.values()) for tables in counts.values()) == 0
+    stored = [mk_datastore(LiteStashData(key=f'key_{index}', value=index))
+              for index in range(100)]
+    mset_data(connections(stored), metadata, manager)
+    mset_data(connections(stored[:10]), metadata, manager)
+    route = get_route(stored[0].key_hash[0])
+    delete_data(connect(LiteStashData(key='key_0'), metadata, manager,
+                        write=True))
+    db_name, tables = count_database(route.db_name, manager)
+    in_table = sum(1 for data in stored[1:]
+                   if get_route(data.key_hash[0]) == route)
+    assert tables[route.table_name] == in_table
+    counts = count_data(manager)
+    assert sum(sum(tables.values()) for tables in counts.values()) == 99
+    upgrade_schema(engine.get(db_name), metadata.get(db_name).metadata)
+    assert count_data(manager)[db_name][route.table_name] == in_table
+
+
+def test_lazy_schema_version():
+    from litestash.core.engine import Engine as StashEngine
+    from litestash.core.schema import Metadata
+    from litestash.core.session import Session as StashSession
+    from litestash.core.util.core_util import get_schema_version
+    from litestash.core.config.schema_conf import VersionSql
+    engine = StashEngine(cache=True)
+    metadata = Metadata(engine)
+    manager = StashSession(engine, metadata)
+    assert engine.opened() == ()
+    manager.get('tables_ab')
+    assert engine.opened() == metadata.opened() == ('tables_ab',)
+    assert get_schema_version(engine.get('tables_ab')) == VersionSql.version()
+    with pytest.raises(ValueError, match=SessionAttr.VALUE_ERROR.value):
+        StashSession(engine).get('tables_cd')
+    old_table = next(mk_table_names('tables_cd'))
+    with engine.get('tables_cd').engine.begin() as connection:
+        connection.exec_driver_sql(
+            f'CREATE TABLE {old_table} (key_hash VARCHAR PRIMARY KEY, '
+            'key VARCHAR UNIQUE, value JSON, timestamp INTEGER, '
+            'microsecond INTEGER)'
+        )
+    stored = metadata.get('tables_cd').metadata
+    with engine.get('tables_cd').engine.connect() as connection:
+        columns = connection.exec_driver_sql(
+            VersionSql.columns(old_table)
+        ).fetchall()
+        assert C.EXPIRES_AT.value in (column[1] for column in columns)
+        indexes = connection.exec_driver_sql(
+            f'PRAGMA index_list({old_table})'
+        ).fetchall()
+        assert f'ix_{old_table}_expires_at' in (index[1] for index in indexes)
+    assert get_schema_version(engine.get('tables_cd')) == VersionSql.version()
+    stored.drop_all(bind=engine.get('tables_cd').engine)
+    assert get_schema_version(engine.get('tables_cd')) == 0
+
+
 # get_datastore test
 valid_key = "valid_key"
 valid_value = {"data": "some_value"}
@@ -94,3 +94,24 @@ def test_get_primary_key():
 # Test Cases for get_time()
 # ... (from previous responses)
 
+
+
+# Test Cases for get_route()
+def test_get_route_all_prefixes():
+    from litestash.core.util.schema_util import ROUTES, get_route
+    from litestash.core.util.schema_util import get_db_name, get_table_name
+    from litestash.core.util.schema_util import mk_table_names
+    assert len(ROUTES) == 64
+    for char, route in ROUTES.items():
+        assert get_route(char) is route
+        assert get_db_name(char) == route.db_name
+        assert get_table_name(char) == route.table_name
+        assert route.table.value == char
+        assert route.table_name in list(mk_table_names(route.db_name))
+
+def test_get_route_invalid_char():
+    from litestash.core.util.schema_util import get_route
+    with pytest.raises(ValueError, match=Utils.DB_NAME_ERROR.value):
+        get_route('!')
+    with pytest.raises(ValueError, match=Utils.INVALID_CHAR_LENGTH.value):
+        get_route('ab')